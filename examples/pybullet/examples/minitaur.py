@@ -27,7 +27,15 @@ class Minitaur:
     self.motorIdList.append(self.jointNameToId['motor_back_rightR_joint'])
 
 
-  def reset(self):
+  def reset(self, reloadUrdf=True):
+    if not reloadUrdf:
+      # keep the loaded body and its knee constraints, only put it back to the start pose
+      p.resetBasePositionAndOrientation(self.quadruped, [0, 0, .2], [0, 0, 0, 1])
+      p.resetBaseVelocity(self.quadruped, [0, 0, 0], [0, 0, 0])
+      self.resetPose(addConstraint=False)
+      for i in range(100):
+        p.stepSimulation()
+      return
     self.quadruped = p.loadURDF("%s/quadruped/minitaur.urdf" % self.urdfRootPath,0,0,.2)
     self.kp = 1
     self.kd = 0.1
@@ -46,7 +54,7 @@ class Minitaur:
   def setMotorAngleByName(self, motorName, desiredAngle):
     self.setMotorAngleById(self.jointNameToId[motorName], desiredAngle)
 
-  def resetPose(self):
+  def resetPose(self, addConstraint=True):
     kneeFrictionForce = 0
     halfpi = 1.57079632679
     kneeangle = -2.1834 #halfpi - acos(upper_leg_length / lower_leg_length)
@@ -56,7 +64,8 @@ class Minitaur:
     p.resetJointState(self.quadruped,self.jointNameToId['knee_front_leftL_link'],self.motorDir[0]*kneeangle)
     p.resetJointState(self.quadruped,self.jointNameToId['motor_front_leftR_joint'],self.motorDir[1]*halfpi)
     p.resetJointState(self.quadruped,self.jointNameToId['knee_front_leftR_link'],self.motorDir[1]*kneeangle)
-    p.createConstraint(self.quadruped,self.jointNameToId['knee_front_leftR_link'],self.quadruped,self.jointNameToId['knee_front_leftL_link'],p.JOINT_POINT2POINT,[0,0,0],[0,0.005,0.2],[0,0.01,0.2])
+    if addConstraint:
+      p.createConstraint(self.quadruped,self.jointNameToId['knee_front_leftR_link'],self.quadruped,self.jointNameToId['knee_front_leftL_link'],p.JOINT_POINT2POINT,[0,0,0],[0,0.005,0.2],[0,0.01,0.2])
     self.setMotorAngleByName('motor_front_leftL_joint', self.motorDir[0]*halfpi)
     self.setMotorAngleByName('motor_front_leftR_joint', self.motorDir[1]*halfpi)
     p.setJointMotorControl2(bodyIndex=self.quadruped,jointIndex=self.jointNameToId['knee_front_leftL_link'],controlMode=p.VELOCITY_CONTROL,targetVelocity=0,force=kneeFrictionForce)
@@ -67,7 +76,8 @@ class Minitaur:
     p.resetJointState(self.quadruped,self.jointNameToId['knee_back_leftL_link'],self.motorDir[2]*kneeangle)
     p.resetJointState(self.quadruped,self.jointNameToId['motor_back_leftR_joint'],self.motorDir[3]*halfpi)
     p.resetJointState(self.quadruped,self.jointNameToId['knee_back_leftR_link'],self.motorDir[3]*kneeangle)
-    p.createConstraint(self.quadruped,self.jointNameToId['knee_back_leftR_link'],self.quadruped,self.jointNameToId['knee_back_leftL_link'],p.JOINT_POINT2POINT,[0,0,0],[0,0.005,0.2],[0,0.01,0.2])
+    if addConstraint:
+      p.createConstraint(self.quadruped,self.jointNameToId['knee_back_leftR_link'],self.quadruped,self.jointNameToId['knee_back_leftL_link'],p.JOINT_POINT2POINT,[0,0,0],[0,0.005,0.2],[0,0.01,0.2])
     self.setMotorAngleByName('motor_back_leftL_joint',self.motorDir[2]*halfpi)
     self.setMotorAngleByName('motor_back_leftR_joint',self.motorDir[3]*halfpi)
     p.setJointMotorControl2(bodyIndex=self.quadruped,jointIndex=self.jointNameToId['knee_back_leftL_link'],controlMode=p.VELOCITY_CONTROL,targetVelocity=0,force=kneeFrictionForce)
@@ -78,7 +88,8 @@ class Minitaur:
     p.resetJointState(self.quadruped,self.jointNameToId['knee_front_rightL_link'],self.motorDir[4]*kneeangle)
     p.resetJointState(self.quadruped,self.jointNameToId['motor_front_rightR_joint'],self.motorDir[5]*halfpi)
     p.resetJointState(self.quadruped,self.jointNameToId['knee_front_rightR_link'],self.motorDir[5]*kneeangle)
-    p.createConstraint(self.quadruped,self.jointNameToId['knee_front_rightR_link'],self.quadruped,self.jointNameToId['knee_front_rightL_link'],p.JOINT_POINT2POINT,[0,0,0],[0,0.005,0.2],[0,0.01,0.2])
+    if addConstraint:
+      p.createConstraint(self.quadruped,self.jointNameToId['knee_front_rightR_link'],self.quadruped,self.jointNameToId['knee_front_rightL_link'],p.JOINT_POINT2POINT,[0,0,0],[0,0.005,0.2],[0,0.01,0.2])
     self.setMotorAngleByName('motor_front_rightL_joint',self.motorDir[4]*halfpi)
     self.setMotorAngleByName('motor_front_rightR_joint',self.motorDir[5]*halfpi)
     p.setJointMotorControl2(bodyIndex=self.quadruped,jointIndex=self.jointNameToId['knee_front_rightL_link'],controlMode=p.VELOCITY_CONTROL,targetVelocity=0,force=kneeFrictionForce)
@@ -90,7 +101,8 @@ class Minitaur:
     p.resetJointState(self.quadruped,self.jointNameToId['knee_back_rightL_link'],self.motorDir[6]*kneeangle)
     p.resetJointState(self.quadruped,self.jointNameToId['motor_back_rightR_joint'],self.motorDir[7]*halfpi)
     p.resetJointState(self.quadruped,self.jointNameToId['knee_back_rightR_link'],self.motorDir[7]*kneeangle)
-    p.createConstraint(self.quadruped,self.jointNameToId['knee_back_rightR_link'],self.quadruped,self.jointNameToId['knee_back_rightL_link'],p.JOINT_POINT2POINT,[0,0,0],[0,0.005,0.2],[0,0.01,0.2])
+    if addConstraint:
+      p.createConstraint(self.quadruped,self.jointNameToId['knee_back_rightR_link'],self.quadruped,self.jointNameToId['knee_back_rightL_link'],p.JOINT_POINT2POINT,[0,0,0],[0,0.005,0.2],[0,0.01,0.2])
     self.setMotorAngleByName('motor_back_rightL_joint',self.motorDir[6]*halfpi)
     self.setMotorAngleByName('motor_back_rightR_joint',self.motorDir[7]*halfpi)
     p.setJointMotorControl2(bodyIndex=self.quadruped,jointIndex=self.jointNameToId['knee_back_rightL_link'],controlMode=p.VELOCITY_CONTROL,targetVelocity=0,force=kneeFrictionForce)
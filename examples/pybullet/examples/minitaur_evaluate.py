@@ -25,6 +25,7 @@ def is_fallen():
 def evaluate_desired_motorAngle_8Amplitude8Phase(i, params):
   nMotors = 8
   speed = 0.35
+  joint_values = [0] * nMotors
   for jthMotor in range(nMotors):
     joint_values[jthMotor] = math.sin(i*speed + params[nMotors + jthMotor])*params[jthMotor]*+1.57
   return joint_values
@@ -69,10 +70,25 @@ def evaluate_params(evaluateFunc, params, objectiveParams, urdfRoot='', timeStep
 
   global minitaur
   minitaur = Minitaur(urdfRoot)
+  finalReturn, final_distance, total_energy, _ = run_trial(
+      evaluateFunc, params, objectiveParams, timeStep, maxNumSteps, sleepTime, verbose=True)
+  print(' ')
+
+  elapsedTime = time.time() - beforeTime
+  print ("trial for ", params, " final_distance", final_distance, "total_energy", total_energy, "finalReturn", finalReturn, "elapsed_time", elapsedTime)
+  return finalReturn
+
+
+def run_trial(evaluateFunc, params, objectiveParams, timeStep=0.01, maxNumSteps=10000, sleepTime=0, verbose=False):
+  """Roll out the gait of params on the already loaded minitaur until it falls.
+
+  Returns the objective (distance - alpha * energy), the distance, the energy
+  and the number of steps taken.
+  """
   start_position = current_position()
-  last_position = None  # for tracing line
   total_energy = 0
 
+  steps = 0
   for i in range(maxNumSteps):
     torques = minitaur.getMotorTorques()
     velocities = minitaur.getMotorVelocities()
@@ -81,19 +97,16 @@ def evaluate_params(evaluateFunc, params, objectiveParams, urdfRoot='', timeStep
     joint_values = evaluate_func_map[evaluateFunc](i, params)
     minitaur.applyAction(joint_values)
     p.stepSimulation()
+    steps = i + 1
     if (is_fallen()):
       break
 
-    if i % 100 == 0:
+    if verbose and i % 100 == 0:
       sys.stdout.write('.')
       sys.stdout.flush()
     time.sleep(sleepTime)
 
-  print(' ')
-
   alpha = objectiveParams[0]
   final_distance = np.linalg.norm(start_position - current_position())
   finalReturn = final_distance - alpha * total_energy
-  elapsedTime = time.time() - beforeTime
-  print ("trial for ", params, " final_distance", final_distance, "total_energy", total_energy, "finalReturn", finalReturn, "elapsed_time", elapsedTime)
-  return finalReturn
+  return finalReturn, final_distance, total_energy, steps
@@ -0,0 +1,99 @@
+#evaluate many gait parameter vectors of minitaur_evaluate in parallel, each worker process
+#owns a DIRECT physics server with one loaded minitaur that is reset between trials
+import sys
+#some python interpreters need '.' added
+sys.path.append(".")
+
+import multiprocessing
+import time
+import argparse
+import numpy as np
+import pybullet as p
+from minitaur import Minitaur
+import minitaur_evaluate
+
+_trialSettings = None
+_trialCount = 0
+
+
+def _init_worker(urdfRoot, timeStep, maxNumSteps):
+  global _trialSettings
+  _trialSettings = (timeStep, maxNumSteps)
+  p.connect(p.DIRECT)
+  p.resetSimulation()
+  p.setTimeStep(timeStep)
+  p.loadURDF("%s/plane.urdf" % urdfRoot)
+  p.setGravity(0,0,-10)
+  minitaur_evaluate.minitaur = Minitaur(urdfRoot)
+
+
+def _evaluate_row(args):
+  global _trialCount
+  index, evaluateFunc, params, objectiveParams = args
+  timeStep, maxNumSteps = _trialSettings
+  if _trialCount > 0:  # the freshly loaded minitaur has already settled
+    minitaur_evaluate.minitaur.reset(reloadUrdf=False)
+  _trialCount += 1
+  finalReturn, final_distance, total_energy, steps = minitaur_evaluate.run_trial(
+      evaluateFunc, params, objectiveParams, timeStep, maxNumSteps)
+  return index, finalReturn, final_distance, total_energy, steps
+
+
+def sweep(evaluateFunc, paramMatrix, objectiveParams, numProcesses=None, urdfRoot='', timeStep=0.01, maxNumSteps=1000):
+  """Evaluate the rows of the (K, P) paramMatrix with evaluateFunc of minitaur_evaluate.
+
+  Yields (row index, finalReturn, final_distance, total_energy, steps) in the order the
+  trials finish. A trial stops early once minitaur_evaluate.is_fallen().
+  """
+  pool = multiprocessing.Pool(numProcesses, initializer=_init_worker, initargs=(urdfRoot, timeStep, maxNumSteps))
+  try:
+    rows = [(k, evaluateFunc, list(params), objectiveParams) for k, params in enumerate(paramMatrix)]
+    for result in pool.imap_unordered(_evaluate_row, rows):
+      yield result
+    pool.close()
+  finally:
+    pool.terminate()
+    pool.join()
+
+
+def sweep_returns(evaluateFunc, paramMatrix, objectiveParams, **kwargs):
+  """finalReturn of every row of paramMatrix, as an array of length K."""
+  returns = np.zeros(len(paramMatrix))
+  for result in sweep(evaluateFunc, paramMatrix, objectiveParams, **kwargs):
+    returns[result[0]] = result[1]
+  return returns
+
+
+def main():
+  parser = argparse.ArgumentParser(formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+  parser.add_argument('--evaluate_func', help='gait evaluator of minitaur_evaluate', default='evaluate_desired_motorAngle_hop')
+  parser.add_argument('--trials', help='number of random parameter vectors', type=int, default=64)
+  parser.add_argument('--processes', help='number of worker processes, default: number of cpus', type=int, default=None)
+  parser.add_argument('--steps', help='maximum number of simulation steps per trial', type=int, default=1000)
+  parser.add_argument('--energy_weight', help='weight of the energy in the objective', type=float, default=0.01)
+  parser.add_argument('--seed', help='random search seed', type=int, default=0)
+  args = parser.parse_args()
+
+  numParams = {'evaluate_desired_motorAngle_8Amplitude8Phase': 16,
+               'evaluate_desired_motorAngle_2Amplitude4Phase': 6,
+               'evaluate_desired_motorAngle_hop': 2}[args.evaluate_func]
+  rng = np.random.RandomState(args.seed)
+  paramMatrix = rng.uniform(0, 1, size=(args.trials, numParams))
+  if args.evaluate_func == 'evaluate_desired_motorAngle_8Amplitude8Phase':
+    paramMatrix[:, 8:] *= 2 * np.pi  # phases
+  elif args.evaluate_func == 'evaluate_desired_motorAngle_2Amplitude4Phase':
+    paramMatrix[:, 2:] *= 2 * np.pi
+
+  start = time.time()
+  best = None
+  for index, finalReturn, final_distance, total_energy, steps in sweep(
+      args.evaluate_func, paramMatrix, [args.energy_weight], numProcesses=args.processes, maxNumSteps=args.steps):
+    print("trial %d return %.4f distance %.3f energy %.3f steps %d" % (index, finalReturn, final_distance, total_energy, steps))
+    if best is None or finalReturn > best[1]:
+      best = (index, finalReturn)
+  elapsed = time.time() - start
+  print("%d trials in %.2f s, %.2f trials/sec" % (args.trials, elapsed, args.trials / elapsed))
+  print("best trial %d return %.4f params %s" % (best[0], best[1], paramMatrix[best[0]].tolist()))
+
+if __name__ == '__main__':
+  main()
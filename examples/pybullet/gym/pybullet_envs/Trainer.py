@@ -19,6 +19,7 @@ def add_opts(parser):
 	parser.add_argument('--test-for', type=int, default=0, help="The number of epoch to test for.")
 	parser.add_argument('--load-file', type=str, default=None, help="The weight file to load for training.")
 	parser.add_argument('--save-file', type=str, default=None, help="The weight file to save after training.")
+	parser.add_argument('--seed', type=int, default=None, help="Seed of numpy and the environment, for reproducible runs. Defaults to the current time.")
 	
 
 class Trainer:
@@ -28,9 +29,6 @@ class Trainer:
 	# TODO: Make training fail-safe by catching "not connected to server" and save the current state to disk (see primitive examples, they can do it)
 
 	def __init__(self):
-		# initialize random seed
-		np.random.seed(int(time.time()))
-
 		cid = p.connect(p.SHARED_MEMORY) # only show graphics if the browser is already running....
 		self.visualize = (cid >= 0)
 		if cid < 0:
@@ -38,6 +36,10 @@ class Trainer:
 
 	def setup_exercise(self, opts):
 
+			# initialize random seed
+			seed = opts.seed if opts.seed is not None else int(time.time())
+			np.random.seed(seed)
+
 			# setup agent
 			agent = agent_register.make(opts.agent, opts=opts)
 
@@ -50,7 +52,7 @@ class Trainer:
 			env.render(mode=mode)
 			
 			# configurations
-			env.seed(int(time.time()))
+			env.seed(seed)
 			#env.configureActions(agent.metadata['discrete_actions']) # configure environment to accepts discrete actions
 			if agent.metadata['discrete_actions']:
 				agent.configure(env.observation_space.shape, env.action_space.n) # configure agent to use the environment properties
@@ -36,6 +36,23 @@ def default():
   num_agents = 30
   eval_episodes = 30
   use_gpu = False
+  shared_memory_envs = False
+  env_seed = None  # Seeds the environments with seeds derived from it.
+  # Step the environments in Python instead of inside the graph, this many
+  # steps of all environments per iteration of the training loop.
+  host_simulation = False
+  host_algorithm = ppo.HostPPOAlgorithm
+  host_chunk = 100
+  # Collect episodes in actor processes while the learner trains, dropping
+  # episodes of policies more than max_staleness updates behind the learner.
+  actor_learner = False
+  host_actor = ppo.HostPPOActor
+  num_actors = 4
+  max_staleness = 1
+  actor_queue_size = 16  # Messages of finished episodes in flight.
+  # Normalize observations in the environments instead of the graph, with the
+  # statistics of all actors merged by the learner. Requires actor_learner.
+  worker_normalize = False
   # Network
   network = networks.feed_forward_gaussian
   weight_summaries = dict(
@@ -121,7 +138,7 @@ def pybullet_racecar():
 
 def pybullet_humanoid():
   locals().update(default())
-  randomizer = (minitaur_env_randomizer.MinitaurEnvRandomizer())
+  randomizer = minitaur_env_randomizer.MinitaurEnvRandomizer
   env = 'HumanoidBulletEnv-v0'
   max_length = 1000
   steps = 3e8  # 300M
@@ -131,7 +148,7 @@ def pybullet_humanoid():
 def pybullet_minitaur():
   """Configuration specific to minitaur_gym_env.MinitaurBulletEnv class."""
   locals().update(default())
-  randomizer = (minitaur_env_randomizer.MinitaurEnvRandomizer())
+  randomizer = minitaur_env_randomizer.MinitaurEnvRandomizer
   env = functools.partial(
       minitaur_gym_env.MinitaurBulletEnv,
       accurate_motor_model_enabled=True,
@@ -144,11 +161,11 @@ def pybullet_minitaur():
   return locals()
 
 def pybullet_duck_minitaur():
-  """Configuration specific to minitaur_gym_env.MinitaurBulletDuckEnv class."""
+  """Configuration specific to minitaur_duck_gym_env.MinitaurBulletDuckEnv."""
   locals().update(default())
-  randomizer = (minitaur_env_randomizer.MinitaurEnvRandomizer())
+  randomizer = minitaur_env_randomizer.MinitaurEnvRandomizer
   env = functools.partial(
-      minitaur_gym_env.MinitaurBulletDuckEnv,
+      minitaur_duck_gym_env.MinitaurBulletDuckEnv,
       accurate_motor_model_enabled=True,
       motor_overheat_protection=True,
       pd_control_enabled=True,
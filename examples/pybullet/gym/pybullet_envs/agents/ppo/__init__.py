@@ -19,3 +19,5 @@ from __future__ import division
 from __future__ import print_function
 
 from .algorithm import PPOAlgorithm
+from .host_algorithm import HostPPOActor
+from .host_algorithm import HostPPOAlgorithm
@@ -0,0 +1,117 @@
+# Copyright 2017 The TensorFlow Agents Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Returns and advantages of episodes stored in NumPy arrays.
+
+Host-side counterparts of the return functions in the utility module, for
+batches of padded episodes such as the ones of rollout_buffer.RolloutBuffer.
+Instead of a scan over time, the reverse discounted sums are computed for all
+time steps at once, by a linear filter if SciPy is available and otherwise as
+the product with a triangular matrix of discount powers. Only the steps up to
+the longest episode are processed, and rewards and values after the end of each
+episode are treated as zero, whatever the padding contains. With zero padding,
+the results match the in-graph versions.
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import numpy as np
+
+try:
+  from scipy import signal
+except ImportError:
+  signal = None
+
+
+_discount_matrices = {}
+
+
+def discounted_return(reward, length, discount):
+  """Discounted Monte-Carlo returns."""
+  shape = np.shape(reward)
+  reward, mask = _trim(reward, length)
+  return_ = _reverse_discounted_sum(mask * reward, discount)
+  return _pad(return_, reward.dtype, shape)
+
+
+def lambda_return(reward, value, length, discount, lambda_):
+  """TD-lambda returns."""
+  shape = np.shape(reward)
+  reward, mask = _trim(reward, length)
+  value = np.asarray(value)[:, :reward.shape[1]]
+  sequence = mask * (reward + discount * value * (1 - lambda_))
+  return_ = _reverse_discounted_sum(sequence, discount * lambda_)
+  return _pad(return_, reward.dtype, shape)
+
+
+def lambda_advantage(reward, value, length, discount):
+  """Generalized Advantage Estimation."""
+  shape = np.shape(reward)
+  reward, mask = _trim(reward, length)
+  value = mask * np.asarray(value)[:, :reward.shape[1]]
+  next_value = np.concatenate([value[:, 1:], np.zeros_like(value[:, -1:])], 1)
+  delta = mask * (reward + discount * next_value - value)
+  advantage = _reverse_discounted_sum(delta, discount)
+  return _pad(advantage, reward.dtype, shape)
+
+
+def discount_matrix(size, discount):
+  """Matrix whose product with sequences gives their reverse discounted sums.
+
+  Entry [s, t] holds discount ** (s - t) for s >= t and zero otherwise. The
+  most recently used matrix is cached.
+
+  Args:
+    size: Number of time steps.
+    discount: Discount factor per time step.
+
+  Returns:
+    Array of shape [size, size].
+  """
+  key = size, discount
+  if key not in _discount_matrices:
+    timestep = np.arange(size)
+    exponent = timestep[:, None] - timestep[None, :]
+    # Negative exponents are masked out; clamp them to avoid overflows.
+    matrix = np.where(
+        exponent >= 0, float(discount) ** np.maximum(exponent, 0), 0.0)
+    _discount_matrices.clear()
+    _discount_matrices[key] = matrix
+  return _discount_matrices[key]
+
+
+def _reverse_discounted_sum(sequence, discount):
+  """Compute sum_{s >= t} discount ** (s - t) * sequence[:, s] for every t."""
+  if signal is not None:
+    return signal.lfilter(
+        [1], [1, -discount], sequence[:, ::-1], axis=1)[:, ::-1]
+  return sequence.dot(discount_matrix(sequence.shape[1], discount))
+
+
+def _trim(reward, length):
+  """Cut sequences after the longest episode and mask the steps after each."""
+  reward = np.asarray(reward)
+  length = np.asarray(length)
+  used = int(length.max()) if len(length) else 0
+  mask = np.arange(used)[None, :] < length[:, None]
+  return reward[:, :used], mask.astype(reward.dtype)
+
+
+def _pad(sequence, dtype, shape):
+  """Place trimmed sequences into zeros of the original shape."""
+  result = np.zeros(shape, dtype)
+  result[:, :sequence.shape[1]] = sequence
+  return result
@@ -49,8 +49,12 @@ class PPOAlgorithm(object):
     self._is_training = is_training
     self._should_log = should_log
     self._config = config
+    # Observations normalized by the environments pass through the filter, which
+    # then only tracks their statistics for the summaries.
+    normalize_observ = not config.get('worker_normalize', False)
     self._observ_filter = normalize.StreamingNormalize(
-        self._batch_env.observ[0], center=True, scale=True, clip=5,
+        self._batch_env.observ[0], center=normalize_observ,
+        scale=normalize_observ, clip=5 if normalize_observ else None,
         name='normalize_observ')
     self._reward_filter = normalize.StreamingNormalize(
         self._batch_env.reward[0], center=False, scale=True, clip=10,
@@ -158,6 +162,78 @@ class PPOAlgorithm(object):
               self._last_logstd, agent_indices, output.logstd[:, 0])]):
         return tf.check_numerics(action[:, 0], 'action'), tf.identity(summary)
 
+  def act(self, observ):
+    """Compute a batch of actions for observations collected outside the graph.
+
+    The host-side counterpart of perform(), for stepping the environments in
+    Python and storing the transitions in a rollout_buffer.RolloutBuffer. The
+    returned mean and log stddev are stored with the transitions and passed to
+    train() as the behavioral policy.
+
+    Args:
+      observ: Tensor of a batch of observations, e.g. a placeholder.
+
+    Raises:
+      ValueError: The network is recurrent.
+
+    Returns:
+      Tuple of action, mean, and log stddev batch tensors.
+    """
+    if self._last_state is not None:
+      raise ValueError('Acting outside the graph needs a feed forward network.')
+    with tf.name_scope('act/'):
+      observ = self._observ_filter.transform(observ)
+      output = self._network(observ[:, None], tf.ones(tf.shape(observ)[0]))
+      action = tf.cond(
+          self._is_training, output.policy.sample, lambda: output.mean)
+      return (
+          tf.check_numerics(action[:, 0], 'action'),
+          output.mean[:, 0], output.logstd[:, 0])
+
+  def policy_variables(self):
+    """Variables that determine the actions computed by act().
+
+    These are the weights of the network and the observation statistics, for
+    copying the current policy into actors in other processes.
+
+    Returns:
+      List of variables.
+    """
+    return (
+        list(self._network.trainable_variables) +
+        self._observ_filter.variables)
+
+  def train(self, observ, action, old_mean, old_logstd, reward, length):
+    """Train on a batch of episodes collected outside the graph.
+
+    The host-side counterpart of experience() and end_episode() during
+    training. Updates the streaming statistics for observations and rewards
+    with the valid steps of the episodes and performs the update steps of
+    policy and value baseline on them.
+
+    Args:
+      observ: Sequences of observations, with static time dimension.
+      action: Sequences of actions.
+      old_mean: Sequences of action means of the behavioral policy.
+      old_logstd: Sequences of action log stddevs of the behavioral policy.
+      reward: Sequences of rewards.
+      length: Batch of sequence lengths.
+
+    Returns:
+      Summary tensor.
+    """
+    with tf.name_scope('train/'):
+      mask = tf.sequence_mask(length, reward.shape[1].value)
+      update_filters = tf.summary.merge([
+          self._observ_filter.update(tf.boolean_mask(observ, mask)),
+          self._reward_filter.update(tf.boolean_mask(reward, mask))])
+      with tf.control_dependencies([update_filters]):
+        summary = self._train_on(
+            observ, action, old_mean, old_logstd, reward, length)
+      return tf.summary.merge([
+          update_filters, self._observ_filter.summary(),
+          self._reward_filter.summary(), summary])
+
   def experience(
       self, agent_indices, observ, action, reward, unused_done, unused_nextob):
     """Process the transition tuple of the current step.
@@ -261,31 +337,50 @@ class PPOAlgorithm(object):
       with tf.control_dependencies([assert_full]):
         data = self._memory.data()
       (observ, action, old_mean, old_logstd, reward), length = data
-      with tf.control_dependencies([tf.assert_greater(length, 0)]):
-        length = tf.identity(length)
-      observ = self._observ_filter.transform(observ)
-      reward = self._reward_filter.transform(reward)
-      update_summary = self._perform_update_steps(
+      summary = self._train_on(
           observ, action, old_mean, old_logstd, reward, length)
-      with tf.control_dependencies([update_summary]):
-        penalty_summary = self._adjust_penalty(
-            observ, old_mean, old_logstd, length)
-      with tf.control_dependencies([penalty_summary]):
+      with tf.control_dependencies([summary]):
         clear_memory = tf.group(
             self._memory.clear(), self._memory_index.assign(0))
       with tf.control_dependencies([clear_memory]):
-        weight_summary = utility.variable_summaries(
-            tf.trainable_variables(), self._config.weight_summaries)
-        return tf.summary.merge([
-            update_summary, penalty_summary, weight_summary])
+        return tf.identity(summary)
+
+  def _train_on(self, observ, action, old_mean, old_logstd, reward, length):
+    """Normalize a batch of episodes and perform the training iterations.
+
+    Args:
+      observ: Sequences of observations.
+      action: Sequences of actions.
+      old_mean: Sequences of action means of the behavioral policy.
+      old_logstd: Sequences of action log stddevs of the behavioral policy.
+      reward: Sequences of rewards.
+      length: Batch of sequence lengths.
+
+    Returns:
+      Summary tensor.
+    """
+    with tf.control_dependencies([tf.assert_greater(length, 0)]):
+      length = tf.identity(length)
+    observ = self._observ_filter.transform(observ)
+    reward = self._reward_filter.transform(reward)
+    update_summary = self._perform_update_steps(
+        observ, action, old_mean, old_logstd, reward, length)
+    with tf.control_dependencies([update_summary]):
+      penalty_summary = self._adjust_penalty(
+          observ, old_mean, old_logstd, length)
+    with tf.control_dependencies([penalty_summary]):
+      weight_summary = utility.variable_summaries(
+          tf.trainable_variables(), self._config.weight_summaries)
+      return tf.summary.merge([
+          update_summary, penalty_summary, weight_summary])
 
   def _perform_update_steps(
       self, observ, action, old_mean, old_logstd, reward, length):
     """Perform multiple update steps of value function and policy.
 
-    The advantage is computed once at the beginning and shared across
-    iterations. We need to decide for the summary of one iteration, and thus
-    choose the one after half of the iterations.
+    The return and advantage are computed once at the beginning and shared
+    across iterations. We need to decide for the summary of one iteration, and
+    thus choose the one after half of the iterations.
 
     Args:
       observ: Sequences of observations.
@@ -318,7 +413,7 @@ class PPOAlgorithm(object):
     # pylint: disable=g-long-lambda
     value_loss, policy_loss, summary = tf.scan(
         lambda _1, _2: self._update_step(
-            observ, action, old_mean, old_logstd, reward, advantage, length),
+            observ, action, old_mean, old_logstd, return_, advantage, length),
         tf.range(self._config.update_epochs),
         [0., 0., ''], parallel_iterations=1)
     print_losses = tf.group(
@@ -328,7 +423,7 @@ class PPOAlgorithm(object):
       return summary[self._config.update_epochs // 2]
 
   def _update_step(
-      self, observ, action, old_mean, old_logstd, reward, advantage, length):
+      self, observ, action, old_mean, old_logstd, return_, advantage, length):
     """Compute the current combined loss and perform a gradient update step.
 
     Args:
@@ -336,14 +431,14 @@ class PPOAlgorithm(object):
       action: Sequences of actions.
       old_mean: Sequences of action means of the behavioral policy.
       old_logstd: Sequences of action log stddevs of the behavioral policy.
-      reward: Sequences of reward.
+      return_: Sequences of discounted returns.
       advantage: Sequences of advantages.
       length: Batch of sequence lengths.
 
     Returns:
       Tuple of value loss, policy loss, and summary tensor.
     """
-    value_loss, value_summary = self._value_loss(observ, reward, length)
+    value_loss, value_summary = self._value_loss(observ, return_, length)
     network = self._network(observ, length)
     policy_loss, policy_summary = self._policy_loss(
         network.mean, network.logstd, old_mean, old_logstd, action,
@@ -369,7 +464,7 @@ class PPOAlgorithm(object):
     with tf.control_dependencies([optimize]):
       return [tf.identity(x) for x in (value_loss, policy_loss, summary)]
 
-  def _value_loss(self, observ, reward, length):
+  def _value_loss(self, observ, return_, length):
     """Compute the loss function for the value baseline.
 
     The value loss is the difference between empirical and approximated returns
@@ -377,7 +472,7 @@ class PPOAlgorithm(object):
 
     Args:
       observ: Sequences of observations.
-      reward: Sequences of reward.
+      return_: Sequences of discounted returns.
       length: Batch of sequence lengths.
 
     Returns:
@@ -385,8 +480,6 @@ class PPOAlgorithm(object):
     """
     with tf.name_scope('value_loss'):
       value = self._network(observ, length).value
-      return_ = utility.discounted_return(
-          reward, length, self._config.discount)
       advantage = return_ - value
       value_loss = 0.5 * self._mask(advantage ** 2, length)
       summary = tf.summary.merge([
@@ -0,0 +1,307 @@
+# Copyright 2017 The TensorFlow Agents Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""PPO algorithm for environments stepped outside the graph."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import numpy as np
+import tensorflow as tf
+
+from . import rollout_buffer
+
+
+class HostPPOAlgorithm(object):
+  """Host side of a PPOAlgorithm, driven by tools.RolloutDriver.
+
+  Collects the transitions of all agents in a RolloutBuffer and trains the
+  PPOAlgorithm on it once update_every episodes are complete. Only the action
+  computation and the training are session runs.
+  """
+
+  def __init__(self, algo, batch_env, is_training, config):
+    """Create the placeholders and operations of the host side.
+
+    Args:
+      algo: The PPOAlgorithm to act with and to train.
+      batch_env: Batch environment stepped in Python.
+      is_training: Boolean tensor for whether the algorithm should train.
+      config: Object containing the agent configuration as attributes.
+    """
+    self._is_training = is_training
+    observ_shape = batch_env.observation_space.shape
+    action_shape = batch_env.action_space.shape
+    template = (
+        (observ_shape, np.float32), (action_shape, np.float32),
+        (action_shape, np.float32), (action_shape, np.float32),
+        ((), np.float32))
+    self._capacity = config.update_every
+    self._buffer = rollout_buffer.RolloutBuffer(
+        template, len(batch_env), config.update_every, config.max_length)
+    self._updates = 0
+    self._last_mean = None
+    self._last_logstd = None
+    with tf.name_scope('host/'):
+      self._observ = tf.placeholder(tf.float32, (None,) + observ_shape)
+      self._act = algo.act(self._observ)
+      self._episodes = tuple(
+          tf.placeholder(tf.float32, (None, config.max_length) + shape)
+          for shape, _ in template)
+      self._length = tf.placeholder(tf.int32, (None,))
+      self._train = algo.train(*(self._episodes + (self._length,)))
+
+  @property
+  def updates(self):
+    """Number of updates performed so far."""
+    return self._updates
+
+  def begin_episode(self, sess, feed, agent_indices):
+    """Discard the stored steps of the agents that start a new episode.
+
+    Args:
+      sess: Session to run operations in.
+      feed: Feed dictionary of the current phase.
+      agent_indices: Batch indices starting an episode.
+    """
+    self._buffer.begin_episodes(agent_indices)
+
+  def perform(self, sess, feed, observ):
+    """Compute a batch of actions for all agents.
+
+    Args:
+      sess: Session to run operations in.
+      feed: Feed dictionary of the current phase.
+      observ: Batch of observations of all agents.
+
+    Returns:
+      Batch of actions.
+    """
+    feed = dict(feed)
+    feed[self._observ] = observ
+    action, self._last_mean, self._last_logstd = sess.run(self._act, feed)
+    return action
+
+  def experience(
+      self, sess, feed, agent_indices, observ, action, reward, unused_done,
+      unused_nextob):
+    """Store the transitions of the current step when training.
+
+    Args:
+      sess: Session to run operations in.
+      feed: Feed dictionary of the current phase.
+      agent_indices: Batch indices of the transitions.
+      observ: Batch of observations.
+      action: Batch of actions.
+      reward: Batch of rewards.
+      unused_done: Batch of done flags.
+      unused_nextob: Batch of successor observations.
+    """
+    if not feed.get(self._is_training):
+      return
+    self._buffer.append((
+        observ, action, self._last_mean[agent_indices],
+        self._last_logstd[agent_indices], reward), agent_indices)
+
+  def end_episode(self, sess, feed, agent_indices):
+    """Store the finished episodes and train once the buffer is full.
+
+    Args:
+      sess: Session to run operations in.
+      feed: Feed dictionary of the current phase.
+      agent_indices: Batch indices that end their episodes.
+
+    Returns:
+      Summary string, empty unless an update was performed.
+    """
+    if not feed.get(self._is_training):
+      return b''
+    self._buffer.end_episodes(agent_indices)
+    return self._update(sess, feed)
+
+  def add_episodes(self, sess, feed, episodes, length):
+    """Store finished episodes collected elsewhere and train when possible.
+
+    Episodes beyond the ones needed to complete an update are kept for the
+    next update rather than overwriting stored episodes.
+
+    Args:
+      sess: Session to run operations in.
+      feed: Feed dictionary of the current phase.
+      episodes: Tuple of transition quantities with batch and time dimensions.
+      length: Batch of sequence lengths.
+
+    Returns:
+      Summary string, empty unless an update was performed.
+    """
+    summaries = []
+    while len(length):
+      count = self._capacity - len(self._buffer)
+      self._buffer.add_episodes(
+          [elements[:count] for elements in episodes], length[:count])
+      episodes = [elements[count:] for elements in episodes]
+      length = length[count:]
+      summaries.append(self._update(sess, feed))
+    # Concatenated serialized summaries parse as one merged summary.
+    return b''.join(summaries)
+
+  def _update(self, sess, feed):
+    """Train on the stored episodes and clear them once the buffer is full.
+
+    Args:
+      sess: Session to run operations in.
+      feed: Feed dictionary of the current phase.
+
+    Returns:
+      Summary string, empty unless an update was performed.
+    """
+    if not self._buffer.is_full():
+      return b''
+    episodes, length = self._buffer.data()
+    feed = dict(feed)
+    feed.update(zip(self._episodes, episodes))
+    feed[self._length] = length
+    summary = sess.run(self._train, feed)
+    self._buffer.clear()
+    self._updates += 1
+    return summary
+
+
+class HostPPOActor(object):
+  """Actor side of a PPOAlgorithm that collects episodes for another process.
+
+  Driven by tools.RolloutDriver like HostPPOAlgorithm, but never trains.
+  Actions come from a snapshot of the policy that is loaded from the learner,
+  and each finished episode is passed on together with the version of the
+  oldest snapshot that acted in it.
+  """
+
+  def __init__(self, algo, batch_env, is_training, config, send):
+    """Create the placeholders and operations of the actor side.
+
+    Args:
+      algo: The PPOAlgorithm to act with.
+      batch_env: Batch environment stepped in Python.
+      is_training: Boolean tensor for whether the algorithm should train.
+      config: Object containing the agent configuration as attributes.
+      send: Callable receiving the version, the episodes, and their lengths.
+    """
+    self._send = send
+    observ_shape = batch_env.observation_space.shape
+    action_shape = batch_env.action_space.shape
+    template = (
+        (observ_shape, np.float32), (action_shape, np.float32),
+        (action_shape, np.float32), (action_shape, np.float32),
+        ((), np.float32))
+    self._buffer = rollout_buffer.RolloutBuffer(
+        template, len(batch_env), len(batch_env), config.max_length)
+    self._version = -1
+    self._episode_version = np.zeros(len(batch_env), np.int64)
+    self._last_mean = None
+    self._last_logstd = None
+    with tf.name_scope('actor/'):
+      self._observ = tf.placeholder(tf.float32, (None,) + observ_shape)
+      self._act = algo.act(self._observ)
+      variables = algo.policy_variables()
+      self._weights = [
+          tf.placeholder(variable.dtype.base_dtype, variable.shape)
+          for variable in variables]
+      self._load = tf.group(*[
+          variable.assign(weight)
+          for variable, weight in zip(variables, self._weights)])
+
+  @property
+  def version(self):
+    """Version of the loaded policy, negative before the first load."""
+    return self._version
+
+  def load(self, sess, version, weights):
+    """Replace the policy by a snapshot of the learner.
+
+    Args:
+      sess: Session to run operations in.
+      version: Number of updates of the learner behind the snapshot.
+      weights: Values of the policy variables of the learner.
+    """
+    sess.run(self._load, dict(zip(self._weights, weights)))
+    self._version = version
+
+  def begin_episode(self, sess, feed, agent_indices):
+    """Discard the stored steps of the agents that start a new episode.
+
+    Args:
+      sess: Session to run operations in.
+      feed: Feed dictionary of the current phase.
+      agent_indices: Batch indices starting an episode.
+    """
+    self._buffer.begin_episodes(agent_indices)
+    self._episode_version[agent_indices] = self._version
+
+  def perform(self, sess, feed, observ):
+    """Compute a batch of actions for all agents.
+
+    Args:
+      sess: Session to run operations in.
+      feed: Feed dictionary of the current phase.
+      observ: Batch of observations of all agents.
+
+    Returns:
+      Batch of actions.
+    """
+    feed = dict(feed)
+    feed[self._observ] = observ
+    action, self._last_mean, self._last_logstd = sess.run(self._act, feed)
+    return action
+
+  def experience(
+      self, sess, feed, agent_indices, observ, action, reward, unused_done,
+      unused_nextob):
+    """Store the transitions of the current step.
+
+    Args:
+      sess: Session to run operations in.
+      feed: Feed dictionary of the current phase.
+      agent_indices: Batch indices of the transitions.
+      observ: Batch of observations.
+      action: Batch of actions.
+      reward: Batch of rewards.
+      unused_done: Batch of done flags.
+      unused_nextob: Batch of successor observations.
+    """
+    self._buffer.append((
+        observ, action, self._last_mean[agent_indices],
+        self._last_logstd[agent_indices], reward), agent_indices)
+
+  def end_episode(self, sess, feed, agent_indices):
+    """Send the finished episodes tagged with their policy version.
+
+    Args:
+      sess: Session to run operations in.
+      feed: Feed dictionary of the current phase.
+      agent_indices: Batch indices that end their episodes.
+
+    Returns:
+      Empty summary string.
+    """
+    if self._buffer.end_episodes(agent_indices):
+      episodes, length = self._buffer.data()
+      used = length.max()
+      version = self._episode_version[agent_indices].min()
+      # Copy, because the buffer is reused while the episodes are in flight.
+      self._send(
+          int(version), [np.array(elements[:, :used]) for elements in episodes],
+          np.array(length))
+      self._buffer.clear()
+    return b''
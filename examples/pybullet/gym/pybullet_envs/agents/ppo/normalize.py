@@ -47,6 +47,11 @@ class StreamingNormalize(object):
       self._mean = tf.Variable(tf.zeros_like(template), False)
       self._var_sum = tf.Variable(tf.zeros_like(template), False)
 
+  @property
+  def variables(self):
+    """Variables holding the count, mean, and variance sum estimates."""
+    return [self._count, self._mean, self._var_sum]
+
   def transform(self, value):
     """Normalize a single or batch tensor.
 
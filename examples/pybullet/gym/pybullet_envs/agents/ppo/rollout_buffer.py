@@ -0,0 +1,182 @@
+# Copyright 2017 The TensorFlow Agents Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Memory that stores episodes in NumPy arrays on the host."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import numpy as np
+
+
+class RolloutBuffer(object):
+  """Memory that stores episodes in preallocated NumPy arrays on the host.
+
+  The counterpart of EpisodeMemory for transitions collected outside of the
+  TensorFlow graph. Each agent appends the transitions of its current episode
+  to its own staging row. Finished episodes move into a ring of rows that
+  overwrites the oldest episodes once it is full. The stored episodes are
+  handed to the learner as one batch of arrays per update.
+  """
+
+  def __init__(self, template, num_agents, capacity, max_length):
+    """Create a buffer that stores episodes.
+
+    Each transition tuple consists of quantities specified by the template.
+    These quantities would typically be observations, actions, and rewards.
+
+    Args:
+      template: List of (shape, dtype) tuples of the transition quantities.
+      num_agents: Number of agents that collect episodes at the same time.
+      capacity: Number of finished episodes, or rows, held by the buffer.
+      max_length: Allocated sequence length for the episodes.
+    """
+    self._capacity = capacity
+    self._max_length = max_length
+    self._staging = [
+        np.zeros((num_agents, max_length) + tuple(shape), dtype)
+        for shape, dtype in template]
+    self._staging_length = np.zeros(num_agents, np.int32)
+    self._buffers = [
+        np.zeros((capacity, max_length) + tuple(shape), dtype)
+        for shape, dtype in template]
+    self._length = np.zeros(capacity, np.int32)
+    self._size = 0
+    self._next_row = 0
+
+  def __len__(self):
+    """Number of finished episodes in the buffer."""
+    return self._size
+
+  def is_full(self):
+    """Whether the buffer holds capacity finished episodes."""
+    return self._size >= self._capacity
+
+  def length(self, agents=None):
+    """Current length of the episodes that the agents are collecting.
+
+    Args:
+      agents: Agents to select the length from, defaults to all.
+
+    Returns:
+      Array of sequence lengths.
+    """
+    agents = self._agents(agents)
+    return self._staging_length[agents]
+
+  def append(self, transitions, agents=None):
+    """Append a batch of transitions to the current episodes of agents.
+
+    Args:
+      transitions: Tuple of transition quantities with batch dimension.
+      agents: Agents to append to, defaults to all.
+
+    Raises:
+      ValueError: An episode would exceed the max length.
+    """
+    agents = self._agents(agents)
+    timestep = self._staging_length[agents]
+    if len(timestep) and timestep.max() >= self._max_length:
+      raise ValueError('max length exceeded')
+    for staging, elements in zip(self._staging, transitions):
+      staging[agents, timestep] = elements
+    self._staging_length[agents] += 1
+
+  def begin_episodes(self, agents=None):
+    """Discard the current episodes of agents to start new ones.
+
+    Args:
+      agents: Agents starting an episode, defaults to all.
+    """
+    agents = self._agents(agents)
+    self._staging_length[agents] = 0
+
+  def end_episodes(self, agents=None):
+    """Move the finished episodes of agents into the ring.
+
+    Empty episodes are skipped. Only the steps up to the longest of the
+    episodes are copied.
+
+    Args:
+      agents: Agents that finished their episodes, defaults to all.
+
+    Returns:
+      Number of stored episodes.
+    """
+    agents = self._agents(agents)
+    length = self._staging_length[agents]
+    used = length.max() if len(length) else 0
+    stored = self.add_episodes(
+        [staging[agents, :used] for staging in self._staging], length)
+    self._staging_length[agents] = 0
+    return stored
+
+  def add_episodes(self, episodes, length):
+    """Move finished episodes that were collected elsewhere into the ring.
+
+    Empty episodes are skipped. Only the steps up to the longest of the
+    episodes are copied.
+
+    Args:
+      episodes: Tuple of transition quantities with batch and time dimensions.
+      length: Batch of sequence lengths.
+
+    Raises:
+      ValueError: An episode exceeds the max length.
+
+    Returns:
+      Number of stored episodes.
+    """
+    length = np.asarray(length, np.int32)
+    index = np.where(length > 0)[0][-self._capacity:]
+    if not len(index):
+      return 0
+    used = length[index].max()
+    if used > self._max_length:
+      raise ValueError('max length exceeded')
+    rows = (self._next_row + np.arange(len(index))) % self._capacity
+    for buffer_, elements in zip(self._buffers, episodes):
+      buffer_[rows, :used] = elements[index, :used]
+    self._length[rows] = length[index]
+    self._next_row = (self._next_row + len(index)) % self._capacity
+    self._size = min(self._size + len(index), self._capacity)
+    return len(index)
+
+  def data(self):
+    """Access the finished episodes in the buffer.
+
+    Padding elements after the length of each episode are unspecified and might
+    contain old data. The arrays are views of the buffer and are only valid
+    until the next call to end_episodes().
+
+    Returns:
+      Tuple containing a list of transition quantities with batch and time
+      dimensions, and a batch of sequence lengths.
+    """
+    episodes = [buffer_[:self._size] for buffer_ in self._buffers]
+    return episodes, self._length[:self._size]
+
+  def clear(self):
+    """Remove all finished episodes from the buffer.
+
+    The episodes that the agents are collecting are kept.
+    """
+    self._size = 0
+    self._next_row = 0
+
+  def _agents(self, agents):
+    if agents is None:
+      return np.arange(len(self._staging_length))
+    return np.asarray(agents, np.int32)
@@ -19,6 +19,7 @@ from __future__ import division
 from __future__ import print_function
 
 from . import wrappers
+from .actor_learner import ActorLearner
 from .attr_dict import AttrDict
 from .batch_env import BatchEnv
 from .count_weights import count_weights
@@ -27,5 +28,8 @@ from .in_graph_env import InGraphEnv
 from .loop import Loop
 from .mock_algorithm import MockAlgorithm
 from .mock_environment import MockEnvironment
+from .rollout_driver import RolloutDriver
+from .running_stats import RunningStats
+from .shm_batch_env import ShmBatchEnv
 from .simulate import simulate
 from .streaming_mean import StreamingMean
@@ -0,0 +1,281 @@
+# Copyright 2017 The TensorFlow Agents Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Collect episodes in actor processes while the learner trains."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import atexit
+import multiprocessing
+import sys
+import traceback
+
+try:
+  import queue
+except ImportError:
+  import Queue as queue  # Python 2.
+
+import numpy as np
+import tensorflow as tf
+
+from . import wrappers
+from .batch_env import BatchEnv
+from .batch_env import derive_seeds
+from .in_graph_batch_env import InGraphBatchEnv
+from .rollout_driver import RolloutDriver
+from .running_stats import RunningStats
+
+
+class ActorLearner(object):
+  """Collect episodes in actor processes while the learner trains.
+
+  Every actor process builds its own graph of the algorithm and steps its share
+  of the environments with a RolloutDriver and a snapshot of the policy. The
+  finished episodes are tagged with the version of the snapshot and pushed into
+  a bounded queue, so the actors keep collecting during the updates of the
+  learner and block once the learner falls behind. The learner publishes a new
+  snapshot after each update. Episodes whose version lags more than a maximum
+  staleness behind the learner are dropped.
+
+  With worker normalization, the environments normalize their observations
+  themselves and the actors send the statistics of the new observations along
+  with the episodes. The learner merges them and publishes the merged
+  statistics together with each snapshot.
+
+  No cluster setup is involved; actors are local processes that exchange NumPy
+  arrays with the learner through multiprocessing queues.
+  """
+
+  def __init__(self, constructor, config):
+    """Start the actor processes.
+
+    The observation and action spaces are read once from a temporary external
+    process, so that the learner can define its graph without environments.
+
+    Args:
+      constructor: Callable that creates and returns an OpenAI gym environment.
+      config: Object containing the agent configuration as attributes.
+
+    Raises:
+      ValueError: There are fewer environments than actors.
+    """
+    if not 0 < config.num_actors <= config.num_agents:
+      message = 'Cannot split {} environments among {} actors.'
+      raise ValueError(message.format(config.num_agents, config.num_actors))
+    probe = wrappers.ExternalProcess(constructor)
+    self.observation_space = probe.observation_space
+    self.action_space = probe.action_space
+    probe.close()
+    self._num_agents = config.num_agents
+    self._max_staleness = config.max_staleness
+    if config.get('worker_normalize', False):
+      self._observ_stats = RunningStats(self.observation_space.shape)
+    else:
+      self._observ_stats = None
+    self._episodes = multiprocessing.Queue(config.actor_queue_size)
+    self._policies = [
+        multiprocessing.Queue() for _ in range(config.num_actors)]
+    self._stop = multiprocessing.Event()
+    if config.env_seed is None:
+      seeds = [None] * config.num_actors
+    else:
+      seeds = [int(seed) for seed in derive_seeds(
+          config.env_seed, config.num_actors)]
+    self._processes = []
+    for index, policies in enumerate(self._policies):
+      num_agents = len(range(index, config.num_agents, config.num_actors))
+      process = multiprocessing.Process(
+          target=_worker, args=(
+              constructor, config, index, num_agents, seeds[index],
+              policies, self._episodes, self._stop))
+      self._processes.append(process)
+    atexit.register(self.close)
+    for process in self._processes:
+      process.start()
+    self._staleness = []
+    self._dropped = 0
+
+  def __len__(self):
+    """Number of environments stepped by all actors together."""
+    return self._num_agents
+
+  def observ_moments(self):
+    """Merged observation statistics of all actors, or None."""
+    if self._observ_stats is None:
+      return None
+    return self._observ_stats.moments
+
+  def load_observ_moments(self, moments):
+    """Continue from observation statistics of a previous run.
+
+    Args:
+      moments: Tuple of count, mean, and variance sum.
+    """
+    self._observ_stats = RunningStats(self.observation_space.shape, moments)
+
+  def publish(self, version, weights):
+    """Make a new snapshot of the policy available to all actors.
+
+    Args:
+      version: Number of updates of the learner behind the snapshot.
+      weights: Values of the policy variables.
+    """
+    moments = self.observ_moments()
+    for policies in self._policies:
+      policies.put((version, weights, moments))
+
+  def receive(self, version, timeout=1.0):
+    """Wait for finished episodes of the actors.
+
+    Args:
+      version: Current version of the policy of the learner.
+      timeout: Seconds to wait for episodes.
+
+    Raises:
+      Exception: An exception was raised inside an actor process.
+      RuntimeError: An actor process terminated unexpectedly.
+
+    Returns:
+      Tuple of transition quantities and lengths of the episodes, or None if no
+      episodes arrived in time or they were too stale.
+    """
+    try:
+      actor, episode_version, episodes, length, moments = self._episodes.get(
+          timeout=timeout)
+    except queue.Empty:
+      for index, process in enumerate(self._processes):
+        if not process.is_alive():
+          message = 'Actor {} terminated with exit code {}.'
+          raise RuntimeError(message.format(index, process.exitcode))
+      return None
+    if episode_version is None:
+      # Re-raise exceptions of the actor processes in the main process.
+      stacktrace = episodes
+      raise Exception('Actor {}: {}'.format(actor, stacktrace))
+    if moments is not None:
+      # The observations count for the statistics even if the episodes are
+      # too stale to train on.
+      self._observ_stats.merge(moments)
+    staleness = version - episode_version
+    if staleness > self._max_staleness:
+      self._dropped += len(length)
+      return None
+    self._staleness.extend([staleness] * len(length))
+    return episodes, length
+
+  def statistics(self):
+    """Staleness of the received episodes since the last call.
+
+    Returns:
+      Tuple of the mean staleness of the accepted episodes and the number of
+      dropped episodes.
+    """
+    staleness = float(np.mean(self._staleness)) if self._staleness else 0.0
+    dropped = self._dropped
+    self._staleness = []
+    self._dropped = 0
+    return staleness, dropped
+
+  def close(self):
+    """Stop the actor processes and join them."""
+    self._stop.set()
+    for process in self._processes:
+      while process.is_alive():
+        # Actors can be blocked on a full queue, so keep taking episodes.
+        try:
+          self._episodes.get(timeout=0.1)
+        except queue.Empty:
+          pass
+        process.join(0.1)
+
+
+def _worker(
+    constructor, config, index, num_agents, seed, policies, episodes, stop):
+  """The actor process steps its environments with the latest policy.
+
+  Args:
+    constructor: Constructor for the OpenAI Gym environment.
+    config: Object containing the agent configuration as attributes.
+    index: Index of the actor, sent with the episodes.
+    num_agents: Number of environments of this actor.
+    seed: If set, seed the environments with seeds derived from it.
+    policies: Queue of policy versions and weights from the learner.
+    episodes: Queue of finished episodes to the learner.
+    stop: Event that is set when the actor should terminate.
+  """
+  batch_env = None
+  try:
+    batch_env = BatchEnv(
+        [constructor() for _ in range(num_agents)], blocking=True)
+    if seed is not None:
+      batch_env.seed(seed)
+    def send(version, *message):
+      moments = None
+      if config.get('worker_normalize', False):
+        moments = _take_statistics(batch_env)
+      episodes.put((index, version) + message + (moments,))
+    with tf.Graph().as_default():
+      step = tf.Variable(0, False, dtype=tf.int32, name='global_step')
+      is_training = tf.placeholder(tf.bool, name='is_training')
+      should_log = tf.placeholder(tf.bool, name='should_log')
+      with tf.variable_scope('environments'):
+        in_graph_env = InGraphBatchEnv(batch_env)
+      algo = config.algorithm(
+          in_graph_env, step, is_training, should_log, config)
+      actor = config.host_actor(algo, batch_env, is_training, config, send)
+      driver = RolloutDriver(batch_env, actor)
+      feed = {is_training: True, should_log: False}
+      with tf.Session(config=tf.ConfigProto(device_count={'GPU': 0})) as sess:
+        sess.run(tf.global_variables_initializer())
+        while not stop.is_set():
+          # Wait for the first snapshot, then only load the latest one.
+          policy = None
+          try:
+            policy = policies.get(block=actor.version < 0, timeout=0.1)
+            while True:
+              policy = policies.get_nowait()
+          except queue.Empty:
+            pass
+          if policy is not None:
+            version, weights, moments = policy
+            actor.load(sess, version, weights)
+            if moments is not None:
+              for env_index in range(len(batch_env)):
+                batch_env[env_index].load_statistics(moments)
+          if actor.version >= 0:
+            driver.run(sess, feed, config.host_chunk)
+  except Exception:  # pylint: disable=broad-except
+    stacktrace = ''.join(traceback.format_exception(*sys.exc_info()))
+    tf.logging.error('Error in actor process: {}'.format(stacktrace))
+    episodes.put((index, None, stacktrace, None, None))
+  finally:
+    if batch_env is not None:
+      batch_env.close()
+
+
+def _take_statistics(batch_env):
+  """Merge the observation statistics that the environments collected.
+
+  Args:
+    batch_env: Batch of environments wrapped in wrappers.NormalizeObserv.
+
+  Returns:
+    Tuple of count, mean, and variance sum of the new observations.
+  """
+  stats = RunningStats(batch_env.observation_space.shape)
+  for index in range(len(batch_env)):
+    stats.merge(batch_env[index].take_statistics())
+  return stats.moments
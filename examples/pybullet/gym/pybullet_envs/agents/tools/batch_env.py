@@ -18,9 +18,27 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
+import time
+
 import numpy as np
 
 
+def derive_seeds(seed, count):
+  """Derive one seed per environment from a single seed.
+
+  The seeds are drawn in order from a random state seeded with `seed`, so
+  environment `i` receives the same seed for any batch size of at least `i+1`.
+
+  Args:
+    seed: Seed of the whole batch; None draws fresh seeds.
+    count: Number of environments.
+
+  Returns:
+    Integer array of seeds.
+  """
+  return np.random.RandomState(seed).randint(0, 2**31 - 1, size=count)
+
+
 class BatchEnv(object):
   """Combine multiple environments to step them in batch."""
 
@@ -29,7 +47,9 @@ class BatchEnv(object):
 
     To step environments in parallel, environments must support a
     `blocking=False` argument to their step and reset functions that makes them
-    return callables instead to receive the result at a later time.
+    return callables instead to receive the result at a later time. To collect
+    results as they arrive with `step_async()` and `step_wait()`, they must also
+    provide a `poll(timeout)` method, like `wrappers.ExternalProcess`.
 
     Args:
       envs: List of environments.
@@ -46,6 +66,8 @@ class BatchEnv(object):
     action_space = self._envs[0].action_space
     if not all(env.action_space == action_space for env in self._envs):
       raise ValueError('All environments must use the same observation space.')
+    self._promises = {}
+    self._results = {}
 
   def __len__(self):
     """Number of combined environments."""
@@ -78,6 +100,7 @@ class BatchEnv(object):
     Returns:
       Batch of observations, rewards, and done flags.
     """
+    self._check_idle(range(len(self._envs)))
     for index, (env, action) in enumerate(zip(self._envs, actions)):
       if not env.action_space.contains(action):
         message = 'Invalid action at index {}: {}'
@@ -109,6 +132,7 @@ class BatchEnv(object):
     """
     if indices is None:
       indices = np.arange(len(self._envs))
+    self._check_idle(indices)
     if self._blocking:
       observs = [self._envs[index].reset() for index in indices]
     else:
@@ -117,6 +141,124 @@ class BatchEnv(object):
     observ = np.stack(observs)
     return observ
 
+  def seed(self, seed=None):
+    """Seed every environment with its own seed derived from one seed.
+
+    Args:
+      seed: Seed of the whole batch; None draws fresh seeds.
+
+    Returns:
+      Integer array of the seeds passed to the environments.
+    """
+    indices = np.arange(len(self._envs))
+    self._check_idle(indices)
+    seeds = derive_seeds(seed, len(self._envs))
+    if self._blocking:
+      for env, env_seed in zip(self._envs, seeds):
+        env.seed(int(env_seed))
+    else:
+      promises = [
+          env.call('seed', int(env_seed))
+          for env, env_seed in zip(self._envs, seeds)]
+      for promise in promises:
+        promise()
+    return seeds
+
+  @property
+  def pending(self):
+    """Indices of environments that are still computing a step."""
+    return np.array(sorted(self._promises), dtype=np.int32)
+
+  @property
+  def ready(self):
+    """Indices of environments whose step result was not yet collected."""
+    return np.array(sorted(self._results), dtype=np.int32)
+
+  def step_async(self, actions, indices=None):
+    """Send actions to environments without waiting for the results.
+
+    Environments that are still pending or whose results were not collected by
+    `step_wait()` yet cannot receive a new action.
+
+    Args:
+      actions: Batch of actions, one for every selected environment.
+      indices: The batch indices of environments to step; defaults to all.
+
+    Raises:
+      ValueError: Invalid actions.
+      RuntimeError: A selected environment is busy.
+    """
+    if indices is None:
+      indices = np.arange(len(self._envs))
+    self._check_idle(indices)
+    for index, action in zip(indices, actions):
+      if not self._envs[index].action_space.contains(action):
+        message = 'Invalid action at index {}: {}'
+        raise ValueError(message.format(index, action))
+    for index, action in zip(indices, actions):
+      index = int(index)
+      if self._blocking:
+        self._results[index] = self._envs[index].step(action)
+      else:
+        self._promises[index] = self._envs[index].step(action, blocking=False)
+
+  def step_wait(self, timeout=None, min_ready=None):
+    """Collect the transitions of environments that finished stepping.
+
+    Returns as soon as `min_ready` environments are ready or the timeout has
+    passed, whichever comes first; by default waits for all pending steps.
+    Slower environments keep stepping in the background and can be collected
+    by a later call.
+
+    Args:
+      timeout: Seconds to wait for results; None waits without limit.
+      min_ready: Number of ready environments to return early for.
+
+    Returns:
+      Batch indices of the collected environments, and their observations,
+      rewards, done flags, and infos.
+    """
+    if min_ready is None:
+      min_ready = len(self._promises) + len(self._results)
+    deadline = None if timeout is None else time.time() + timeout
+    self._collect(0)
+    while self._promises and len(self._results) < min_ready:
+      wait = 0.001
+      if deadline is not None:
+        remaining = deadline - time.time()
+        if remaining <= 0:
+          break
+        wait = min(remaining, wait)
+      # Block briefly on one pending environment, then check all of them.
+      self._collect(wait)
+    indices = sorted(self._results)
+    if not indices:
+      observ_shape = self._envs[0].observation_space.shape
+      return (np.zeros((0,), np.int32), np.zeros((0,) + observ_shape),
+              np.zeros((0,)), np.zeros((0,), np.bool_), ())
+    transitions = [self._results.pop(index) for index in indices]
+    observs, rewards, dones, infos = zip(*transitions)
+    return (np.array(indices, dtype=np.int32), np.stack(observs),
+            np.stack(rewards), np.stack(dones), tuple(infos))
+
+  def _collect(self, timeout):
+    """Move finished steps from pending to ready.
+
+    Args:
+      timeout: Seconds to block on the first pending environment.
+    """
+    for index in sorted(self._promises):
+      if self._envs[index].poll(timeout):
+        self._results[index] = self._promises.pop(index)()
+      timeout = 0
+
+  def _check_idle(self, indices):
+    busy = [index for index in indices
+            if index in self._promises or index in self._results]
+    if busy:
+      message = 'Environments {} have an uncollected asynchronous step.'
+      raise RuntimeError(message.format(busy))
+
   def close(self):
     """Send close messages to the external process and join them."""
     for env in self._envs:
@@ -21,6 +21,7 @@ from __future__ import print_function
 import collections
 import os
 
+import numpy as np
 import tensorflow as tf
 
 from . import streaming_mean
@@ -29,7 +30,7 @@ from . import streaming_mean
 _Phase = collections.namedtuple(
     'Phase',
     'name, writer, op, batch, steps, feed, report_every, log_every,'
-    'checkpoint_every')
+    'checkpoint_every, driver, chunk')
 
 
 class Loop(object):
@@ -62,6 +63,9 @@ class Loop(object):
     self._report = tf.placeholder(tf.bool) if report is None else report
     self._reset = tf.placeholder(tf.bool) if reset is None else reset
     self._phases = []
+    self._num_steps = None
+    self._increment_step = None
+    self._host_scores = {}
 
   def add_phase(
       self, name, done, score, summary, steps,
@@ -103,7 +107,39 @@ class Loop(object):
     batch = 1 if score.shape.ndims == 0 else score.shape[0].value
     self._phases.append(_Phase(
         name, writer, op, batch, int(steps), feed, report_every,
-        log_every, checkpoint_every))
+        log_every, checkpoint_every, None, None))
+
+  def add_host_phase(
+      self, name, driver, steps, chunk,
+      report_every=None, log_every=None, checkpoint_every=None, feed=None):
+    """Add a phase that steps the environments outside the graph.
+
+    Every iteration of the phase runs a chunk of steps of all environments of
+    the driver. The mean score is computed in Python from the scores of the
+    episodes finished by the driver, and the global step is advanced by the
+    number of environment steps made.
+
+    Args:
+      name: Name for the phase, used for the summary writer.
+      driver: Driver with a run() method like tools.RolloutDriver.
+      steps: Duration of the phase in steps.
+      chunk: Number of steps of every environment per iteration.
+      report_every: Yield mean score every this number of steps.
+      log_every: Request summaries from the driver every this number of steps.
+      checkpoint_every: Write checkpoint every this number of steps.
+      feed: Feed dictionary for the session run calls of the driver.
+    """
+    feed = feed or {}
+    writer = self._logdir and tf.summary.FileWriter(
+        os.path.join(self._logdir, name), tf.get_default_graph(),
+        flush_secs=60)
+    if self._increment_step is None:
+      self._num_steps = tf.placeholder(tf.int32, (), name='num_steps')
+      self._increment_step = self._step.assign_add(self._num_steps)
+    batch = chunk * len(driver)
+    self._phases.append(_Phase(
+        name, writer, None, batch, int(steps), feed, report_every,
+        log_every, checkpoint_every, driver, chunk))
 
   def run(self, sess, saver, max_step=None):
     """Run the loop schedule for a specified number of steps.
@@ -132,14 +168,21 @@ class Loop(object):
         message += 'Phase {} (phase step {}, global step {}).'
         tf.logging.info(message.format(phase.name, phase_step, global_step))
       # Populate book keeping tensors.
-      phase.feed[self._reset] = (steps_in < steps_made)
-      phase.feed[self._log] = (
+      reset = (steps_in < steps_made)
+      log = bool(
           phase.writer and
           self._is_every_steps(phase_step, phase.batch, phase.log_every))
-      phase.feed[self._report] = (
-          self._is_every_steps(phase_step, phase.batch, phase.report_every))
-      summary, mean_score, global_step, steps_made = sess.run(
-          phase.op, phase.feed)
+      report = self._is_every_steps(
+          phase_step, phase.batch, phase.report_every)
+      phase.feed[self._reset] = reset
+      phase.feed[self._log] = log
+      phase.feed[self._report] = report
+      if phase.driver is None:
+        summary, mean_score, global_step, steps_made = sess.run(
+            phase.op, phase.feed)
+      else:
+        summary, mean_score, global_step, steps_made = self._run_host_step(
+            sess, phase, reset, log, report)
       if self._is_every_steps(phase_step, phase.batch, phase.checkpoint_every):
         self._store_checkpoint(sess, saver, global_step)
       if self._is_every_steps(phase_step, phase.batch, phase.report_every):
@@ -151,6 +194,32 @@ class Loop(object):
         summary_step = epoch * longest_phase + steps_in
         phase.writer.add_summary(summary, summary_step)
 
+  def _run_host_step(self, sess, phase, reset, log, report):
+    """Run one chunk of a host phase.
+
+    Args:
+      sess: Session to use to run the operations of the driver.
+      phase: The current phase.
+      reset: Whether to start new episodes in all environments.
+      log: Whether to request summaries from the driver.
+      report: Whether to compute the mean score.
+
+    Returns:
+      Tuple of summary string, mean score, new global step, and number of
+      steps made. The mean score is zero for non reporting steps.
+    """
+    summary, scores, steps_made = phase.driver.run(
+        sess, phase.feed, phase.chunk, reset, log)
+    pending = self._host_scores.setdefault(phase.name, [])
+    pending.extend(scores)
+    mean_score = 0.0
+    if report and pending:
+      mean_score = float(np.mean(pending))
+      del pending[:]
+    global_step = sess.run(
+        self._increment_step, {self._num_steps: steps_made})
+    return summary, mean_score, global_step, steps_made
+
   def _is_every_steps(self, phase_step, batch, every):
     """Determine whether a periodic event should happen at this step.
 
@@ -0,0 +1,152 @@
+# Copyright 2017 The TensorFlow Agents Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Simulation of a vectorized algorithm with environments outside the graph."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import numpy as np
+import tensorflow as tf
+
+
+class RolloutDriver(object):
+  """Step a batch of environments in Python and feed an algorithm on the host.
+
+  The out-of-graph counterpart of simulate(). Each call of run() steps all
+  environments for a chunk of steps. Per step, the algorithm computes the
+  actions of all agents in one batch and receives the transitions as NumPy
+  arrays, so no environment step goes through a py_func or a session run of
+  its own. Scores and lengths of finished episodes are tracked in Python.
+  """
+
+  def __init__(self, batch_env, algo):
+    """Step a batch of environments in Python and feed an algorithm on the host.
+
+    The algorithm provides begin_episode(), perform(), experience(), and
+    end_episode() like the in-graph algorithms, but takes NumPy arrays, a
+    session and the feed dictionary of the current phase, for example
+    ppo.HostPPOAlgorithm.
+
+    Args:
+      batch_env: Batch environment stepped in Python, like tools.BatchEnv.
+      algo: Host algorithm to compute actions and receive transitions.
+    """
+    self._batch_env = batch_env
+    self._algo = algo
+    self._observ = None
+    self._done = np.ones(len(batch_env), np.bool_)
+    self._score = np.zeros(len(batch_env), np.float32)
+    self._length = np.zeros(len(batch_env), np.int32)
+    self._done_scores = []
+    self._done_lengths = []
+
+  def __len__(self):
+    """Number of environments that are stepped together."""
+    return len(self._batch_env)
+
+  def run(self, sess, feed, steps, reset=False, log=False):
+    """Step all environments for a chunk of steps.
+
+    Args:
+      sess: Session to run the operations of the algorithm.
+      feed: Feed dictionary of the current phase.
+      steps: Number of steps of every environment.
+      reset: Whether to start new episodes in all environments first.
+      log: Whether to return summaries.
+
+    Returns:
+      Tuple of a summary string, the scores of the episodes finished during
+      the chunk, and the number of environment steps made.
+    """
+    if reset:
+      self._done[:] = True
+    summaries = []
+    scores = []
+    for _ in range(steps):
+      agent_indices = np.where(self._done)[0]
+      if len(agent_indices):
+        self._begin_episode(sess, feed, agent_indices)
+      prevob = self._observ
+      action = self._algo.perform(sess, feed, prevob)
+      observ, reward, done, _ = self._batch_env.step(action)
+      self._score += reward
+      self._length += 1
+      self._algo.experience(
+          sess, feed, np.arange(len(self)), prevob, action, reward, done,
+          observ)
+      self._observ, self._done = observ, done
+      agent_indices = np.where(done)[0]
+      if len(agent_indices):
+        scores.extend(self._score[agent_indices])
+        summaries.append(self._end_episode(sess, feed, agent_indices))
+    if log:
+      summaries.append(self._summaries())
+    return (self._merge(summaries), np.array(scores, np.float32),
+            steps * len(self))
+
+  def _begin_episode(self, sess, feed, agent_indices):
+    """Reset environments, intermediate scores and durations for new episodes.
+
+    Args:
+      sess: Session to run the operations of the algorithm.
+      feed: Feed dictionary of the current phase.
+      agent_indices: Batch indices starting an episode.
+    """
+    observ = self._batch_env.reset(agent_indices)
+    if self._observ is None:
+      self._observ = np.zeros((len(self),) + observ.shape[1:], observ.dtype)
+    self._observ[agent_indices] = observ
+    self._score[agent_indices] = 0
+    self._length[agent_indices] = 0
+    self._algo.begin_episode(sess, feed, agent_indices)
+
+  def _end_episode(self, sess, feed, agent_indices):
+    """Notify the algorithm of ending episodes.
+
+    Also records the scores and lengths used for summaries.
+
+    Args:
+      sess: Session to run the operations of the algorithm.
+      feed: Feed dictionary of the current phase.
+      agent_indices: Batch indices that end their episodes.
+
+    Returns:
+      Summary string.
+    """
+    self._done_scores.extend(self._score[agent_indices])
+    self._done_lengths.extend(self._length[agent_indices])
+    return self._algo.end_episode(sess, feed, agent_indices)
+
+  def _summaries(self):
+    """Mean score and length since the last summaries, as summary string."""
+    values = []
+    if self._done_scores:
+      values.append(tf.Summary.Value(
+          tag='mean_score', simple_value=float(np.mean(self._done_scores))))
+    if self._done_lengths:
+      values.append(tf.Summary.Value(
+          tag='mean_length', simple_value=float(np.mean(self._done_lengths))))
+    self._done_scores = []
+    self._done_lengths = []
+    return tf.Summary(value=values).SerializeToString() if values else b''
+
+  def _merge(self, summaries):
+    """Merge serialized summaries into one summary string."""
+    merged = tf.Summary()
+    for summary in summaries:
+      if summary:
+        merged.MergeFromString(summary)
+    return merged.SerializeToString() if merged.value else b''
@@ -0,0 +1,131 @@
+# Copyright 2017 The TensorFlow Agents Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Running estimates of mean and variance that can be merged."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import numpy as np
+
+
+class RunningStats(object):
+  """Running estimates of mean and variance that can be merged.
+
+  The NumPy counterpart of ppo.normalize.StreamingNormalize for computing the
+  statistics outside of the graph. Batches are folded in with Welford's update
+  and estimates from different processes are combined with the parallel
+  formula of Chan et al., so that merging the statistics of several workers
+  gives the same result as one worker seeing all values.
+  """
+
+  def __init__(self, shape, moments=None):
+    """Running estimates of mean and variance that can be merged.
+
+    Args:
+      shape: Shape of a single value.
+      moments: Optional tuple of count, mean, and variance sum to start from.
+    """
+    self._count = 0
+    self._mean = np.zeros(shape, np.float64)
+    self._var_sum = np.zeros(shape, np.float64)
+    if moments is not None:
+      self.merge(moments)
+
+  @property
+  def count(self):
+    """Number of values seen."""
+    return self._count
+
+  @property
+  def moments(self):
+    """Tuple of count, mean, and sum of squared differences from the mean."""
+    return self._count, self._mean.copy(), self._var_sum.copy()
+
+  def update(self, value):
+    """Update the estimates with a single or batch value.
+
+    Args:
+      value: Single value or batch of values along the first dimension.
+    """
+    value = np.asarray(value, np.float64)
+    if value.ndim == self._mean.ndim:
+      # Add a batch dimension if necessary.
+      value = value[None, ...]
+    if not len(value):
+      return
+    mean = value.mean(0)
+    var_sum = ((value - mean[None, ...]) ** 2).sum(0)
+    self.merge((len(value), mean, var_sum))
+
+  def merge(self, moments):
+    """Combine the estimates with those of a disjoint set of values.
+
+    Args:
+      moments: Tuple of count, mean, and variance sum, e.g. the moments of
+          another instance.
+    """
+    count, mean, var_sum = moments
+    if not count:
+      return
+    total = self._count + count
+    delta = mean - self._mean
+    self._mean = self._mean + delta * (count / total)
+    self._var_sum = (
+        self._var_sum + var_sum + delta ** 2 * (self._count * count / total))
+    self._count = total
+
+  def reset(self):
+    """Reset the estimates of mean and variance."""
+    self._count = 0
+    self._mean = np.zeros_like(self._mean)
+    self._var_sum = np.zeros_like(self._var_sum)
+
+  def transform(self, value, center=True, scale=True, clip=None):
+    """Normalize a single or batch value by the current estimates.
+
+    Matches the transform of ppo.normalize.StreamingNormalize.
+
+    Args:
+      value: Single or batch value.
+      center: Whether to subtract the mean.
+      scale: Whether to divide by the standard deviation.
+      clip: If and when to clip normalized values.
+
+    Returns:
+      Normalized value.
+    """
+    value = np.asarray(value, np.float64)
+    if center:
+      value = value - self._mean
+    # We cannot scale before seeing at least two samples.
+    if scale and self._count > 1:
+      value = value / (self.std() + 1e-8)
+    if clip:
+      value = np.clip(value, -clip, clip)
+    return value
+
+  def std(self):
+    """Current estimate of the standard deviation.
+
+    The small constant corrects for negative variance values caused by rounding,
+    like in ppo.normalize.StreamingNormalize.
+
+    Returns:
+      Array of standard deviations, NaN before two values were seen.
+    """
+    if self._count < 2:
+      return np.full_like(self._var_sum, np.nan)
+    return np.sqrt(self._var_sum / (self._count - 1) + 1e-4)
@@ -0,0 +1,264 @@
+# Copyright 2017 The TensorFlow Agents Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Step environments in external processes that share memory with the batch."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import atexit
+import multiprocessing
+import multiprocessing.sharedctypes
+import sys
+import traceback
+
+import gym
+import gym.spaces
+import numpy as np
+import tensorflow as tf
+
+from . import wrappers
+from .batch_env import derive_seeds
+
+
+class ShmBatchEnv(object):
+  """Step environments in external processes that share memory with the batch.
+
+  Every worker process owns one environment and one row of shared arrays for
+  actions, observations, rewards, and done flags. Workers write their results
+  directly into those rows, so observations are never pickled or stacked. This
+  matters most for image observations such as the ones of KukaCamGymEnv.
+  Commands and completions are signalled through one pair of semaphores per
+  worker. Info dictionaries are not transferred and are returned empty.
+  """
+
+  # Commands written to the shared command array.
+  _STEP = 1
+  _RESET = 2
+  _CLOSE = 3
+  _SEED = 4
+
+  def __init__(self, constructor, num_envs):
+    """Step environments in external processes that share memory with the batch.
+
+    The observation and action spaces are read once from a temporary external
+    process, since the shared arrays must exist before the workers start.
+
+    Args:
+      constructor: Callable that creates and returns an OpenAI gym environment.
+      num_envs: Number of environments to combine in the batch.
+    """
+    probe = wrappers.ExternalProcess(constructor)
+    self.observation_space = probe.observation_space
+    self.action_space = probe.action_space
+    probe.close()
+    self._num_envs = num_envs
+    observ_shape, observ_dtype = self._parse_space(self.observation_space)
+    action_shape, action_dtype = self._parse_space(self.action_space)
+    self._buffers = dict(
+        observ=self._allocate((num_envs,) + observ_shape, observ_dtype),
+        action=self._allocate((num_envs,) + action_shape, action_dtype),
+        reward=self._allocate((num_envs,), np.float32),
+        done=self._allocate((num_envs,), np.bool_),
+        command=self._allocate((num_envs,), np.int32),
+        failed=self._allocate((num_envs,), np.bool_),
+        seed=self._allocate((num_envs,), np.int64))
+    self._observ, self._action, self._reward, self._done, self._command, \
+        self._failed, self._seed = [
+            self._as_array(self._buffers[name]) for name in (
+                'observ', 'action', 'reward', 'done', 'command', 'failed',
+                'seed')]
+    self._requests = [multiprocessing.Semaphore(0) for _ in range(num_envs)]
+    self._responses = [multiprocessing.Semaphore(0) for _ in range(num_envs)]
+    self._conns = []
+    self._processes = []
+    for index in range(num_envs):
+      conn, worker_conn = multiprocessing.Pipe()
+      process = multiprocessing.Process(
+          target=_worker,
+          args=(constructor, index, self._buffers, self._requests[index],
+                self._responses[index], worker_conn))
+      process.start()
+      self._conns.append(conn)
+      self._processes.append(process)
+    self._closed = False
+    atexit.register(self.close)
+
+  def __len__(self):
+    """Number of combined environments."""
+    return self._num_envs
+
+  def step(self, actions):
+    """Forward a batch of actions to the worker processes.
+
+    Args:
+      actions: Batched action to apply to the environment.
+
+    Raises:
+      ValueError: Invalid actions.
+
+    Returns:
+      Batch of observations, rewards, and done flags.
+    """
+    for index, action in enumerate(actions):
+      if not self.action_space.contains(action):
+        message = 'Invalid action at index {}: {}'
+        raise ValueError(message.format(index, action))
+    self._action[:] = actions
+    indices = np.arange(self._num_envs)
+    self._send(indices, self._STEP)
+    self._wait(indices)
+    info = tuple({} for _ in indices)
+    return self._observ.copy(), self._reward.copy(), self._done.copy(), info
+
+  def reset(self, indices=None):
+    """Reset the environments.
+
+    Args:
+      indices: The batch indices of environments to reset; defaults to all.
+
+    Returns:
+      Batch of observations.
+    """
+    if indices is None:
+      indices = np.arange(self._num_envs)
+    self._send(indices, self._RESET)
+    self._wait(indices)
+    return self._observ[indices]
+
+  def seed(self, seed=None):
+    """Seed every environment with its own seed derived from one seed.
+
+    Args:
+      seed: Seed of the whole batch; None draws fresh seeds.
+
+    Returns:
+      Integer array of the seeds passed to the environments.
+    """
+    seeds = derive_seeds(seed, self._num_envs)
+    self._seed[:] = seeds
+    indices = np.arange(self._num_envs)
+    self._send(indices, self._SEED)
+    self._wait(indices)
+    return seeds
+
+  def close(self):
+    """Send close commands to the worker processes and join them."""
+    if self._closed:
+      return
+    self._closed = True
+    alive = [index for index, process in enumerate(self._processes)
+             if process.is_alive()]
+    self._send(alive, self._CLOSE)
+    for process in self._processes:
+      process.join()
+
+  def _send(self, indices, command):
+    for index in indices:
+      self._command[index] = command
+      self._requests[index].release()
+
+  def _wait(self, indices):
+    """Block until the given workers signal completion.
+
+    Raises:
+      Exception: An exception was raised inside a worker process.
+      RuntimeError: A worker process died.
+    """
+    for index in indices:
+      while not self._responses[index].acquire(True, 0.1):
+        if not self._processes[index].is_alive():
+          message = 'Environment process {} died unexpectedly.'
+          raise RuntimeError(message.format(index))
+      if self._failed[index]:
+        raise Exception(self._conns[index].recv())
+
+  def _allocate(self, shape, dtype):
+    size = int(np.prod(shape)) * np.dtype(dtype).itemsize
+    raw = multiprocessing.sharedctypes.RawArray('b', max(size, 1))
+    return raw, shape, dtype
+
+  @staticmethod
+  def _as_array(buffer_):
+    raw, shape, dtype = buffer_
+    size = int(np.prod(shape))
+    return np.frombuffer(raw, dtype, size).reshape(shape)
+
+  def _parse_space(self, space):
+    """Get the shape and numpy data type of an OpenAI Gym space.
+
+    Args:
+      space: Gym space.
+
+    Returns:
+      Shape tuple and data type.
+    """
+    if isinstance(space, gym.spaces.Discrete):
+      return (), np.int32
+    if isinstance(space, gym.spaces.Box):
+      return space.shape, np.float32
+    raise NotImplementedError()
+
+
+def _worker(constructor, index, buffers, request, response, conn):
+  """The process waits for commands and writes results into shared memory.
+
+  Args:
+    constructor: Constructor for the OpenAI Gym environment.
+    index: Row of the shared arrays owned by this worker.
+    buffers: Dictionary of shared arrays created by ShmBatchEnv.
+    request: Semaphore released by the main process to issue a command.
+    response: Semaphore released by this process when a command is done.
+    conn: Connection to send exception stack traces to the main process.
+  """
+  arrays = {name: ShmBatchEnv._as_array(buffer_)
+            for name, buffer_ in buffers.items()}
+  # One-element slices, so that assigning to [0] writes into shared memory.
+  observ = arrays['observ'][index:index + 1]
+  reward = arrays['reward'][index:index + 1]
+  done = arrays['done'][index:index + 1]
+  action = arrays['action'][index]
+  command, failed, seed = arrays['command'], arrays['failed'], arrays['seed']
+  env = None
+  try:
+    env = constructor()
+    while True:
+      try:
+        # Only block for short times to have keyboard exceptions be raised.
+        if not request.acquire(True, 0.1):
+          continue
+      except KeyboardInterrupt:
+        break
+      if command[index] == ShmBatchEnv._STEP:
+        observ[0], reward[0], done[0], _ = env.step(
+            action.copy() if action.ndim else action.item())
+      elif command[index] == ShmBatchEnv._RESET:
+        observ[0] = env.reset()
+      elif command[index] == ShmBatchEnv._SEED:
+        env.seed(int(seed[index]))
+      elif command[index] == ShmBatchEnv._CLOSE:
+        break
+      else:
+        raise KeyError('Received unknown command {}'.format(command[index]))
+      response.release()
+  except Exception:  # pylint: disable=broad-except
+    stacktrace = ''.join(traceback.format_exception(*sys.exc_info()))
+    tf.logging.error('Error in environment process: {}'.format(stacktrace))
+    failed[index] = True
+    conn.send(stacktrace)
+    response.release()
+  if env is not None and hasattr(env, 'close'):
+    env.close()
+  conn.close()
@@ -28,6 +28,8 @@ import gym.spaces
 import numpy as np
 import tensorflow as tf
 
+from .running_stats import RunningStats
+
 
 class AutoReset(object):
   """Automatically reset environment when the episode is done."""
@@ -79,13 +81,18 @@ class RandomStart(object):
   def __init__(self, env, max_steps):
     self._env = env
     self._max_steps = max_steps
+    self._random = np.random.RandomState()
 
   def __getattr__(self, name):
     return getattr(self._env, name)
 
+  def seed(self, seed=None):
+    self._random.seed(seed)
+    return self._env.seed(seed)
+
   def reset(self):
     observ = self._env.reset()
-    random_steps = np.random.randint(0, self._max_steps)
+    random_steps = self._random.randint(0, self._max_steps)
     for _ in range(random_steps):
       action = self._env.action_space.sample()
       observ, unused_reward, done, unused_info = self._env.step(action)
@@ -251,6 +258,57 @@ class RangeNormalize(object):
     return np.isfinite(space.low).all() and np.isfinite(space.high).all()
 
 
+class NormalizeObserv(object):
+  """Normalize observations by running estimates of mean and variance.
+
+  The estimates start from the statistics merged by a learner, if any, and
+  include all observations of this environment since. The observations seen
+  since the last call to take_statistics() are tracked separately, so that the
+  learner can merge them without counting any observation twice.
+  """
+
+  def __init__(self, env, center=True, scale=True, clip=5):
+    self._env = env
+    self._center = center
+    self._scale = scale
+    self._clip = clip
+    self._shape = self._env.observation_space.shape
+    self._stats = RunningStats(self._shape)
+    self._delta = RunningStats(self._shape)
+
+  def __getattr__(self, name):
+    return getattr(self._env, name)
+
+  @property
+  def observation_space(self):
+    shape = self._env.observation_space.shape
+    return gym.spaces.Box(-np.inf * np.ones(shape), np.inf * np.ones(shape))
+
+  def step(self, action):
+    observ, reward, done, info = self._env.step(action)
+    return self._normalize_observ(observ), reward, done, info
+
+  def reset(self):
+    return self._normalize_observ(self._env.reset())
+
+  def take_statistics(self):
+    """Moments of the observations since the last call."""
+    moments = self._delta.moments
+    self._delta.reset()
+    return moments
+
+  def load_statistics(self, moments):
+    """Continue from merged moments that do not include our recent ones."""
+    self._stats = RunningStats(self._shape, moments)
+    self._stats.merge(self._delta.moments)
+
+  def _normalize_observ(self, observ):
+    self._stats.update(observ)
+    self._delta.update(observ)
+    return self._stats.transform(
+        observ, self._center, self._scale, self._clip)
+
+
 class ClipAction(object):
   """Clip out of range actions to the action space of the environment."""
 
@@ -372,6 +430,17 @@ class ExternalProcess(object):
     self._conn.send((self._CALL, payload))
     return self._receive
 
+  def poll(self, timeout=0):
+    """Check whether the result of an asynchronous call has arrived.
+
+    Args:
+      timeout: Seconds to wait for the result; zero returns immediately.
+
+    Returns:
+      Whether calling the promise would return without blocking.
+    """
+    return self._conn.poll(timeout)
+
   def close(self):
     """Send a close message to the external process and join it."""
     try:
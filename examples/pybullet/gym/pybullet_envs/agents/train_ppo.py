@@ -27,6 +27,7 @@ import datetime
 import os
 
 import gym
+import numpy as np
 import tensorflow as tf
 
 from . import tools
@@ -50,6 +51,8 @@ def _create_environment(config):
   if config.max_length:
     env = tools.wrappers.LimitDuration(env, config.max_length)
   env = tools.wrappers.RangeNormalize(env)
+  if config.get('worker_normalize', False):
+    env = tools.wrappers.NormalizeObserv(env)
   env = tools.wrappers.ClipAction(env)
   env = tools.wrappers.ConvertTo32Bit(env)
   return env
@@ -85,6 +88,37 @@ def _define_loop(graph, logdir, train_steps, eval_steps):
   return loop
 
 
+def _define_host_loop(graph, logdir, train_steps, eval_steps, chunk):
+  """Create a training loop whose phases step the environments in Python.
+
+  Args:
+    graph: Object providing graph elements via attributes.
+    logdir: Log directory for storing checkpoints and summaries.
+    train_steps: Number of training steps per epoch.
+    eval_steps: Number of evaluation steps per epoch.
+    chunk: Number of steps of every environment per loop iteration.
+
+  Returns:
+    Loop object.
+  """
+  loop = tools.Loop(
+      logdir, graph.step, graph.should_log, graph.do_report,
+      graph.force_reset)
+  loop.add_host_phase(
+      'train', graph.driver, train_steps, chunk,
+      report_every=train_steps,
+      log_every=train_steps // 2,
+      checkpoint_every=None,
+      feed={graph.is_training: True})
+  loop.add_host_phase(
+      'eval', graph.driver, eval_steps, chunk,
+      report_every=eval_steps,
+      log_every=eval_steps // 2,
+      checkpoint_every=10 * eval_steps,
+      feed={graph.is_training: False})
+  return loop
+
+
 def train(config, env_processes):
   """Training and evaluation entry point yielding scores.
 
@@ -95,22 +129,47 @@ def train(config, env_processes):
     config: Object providing configurations via attributes.
     env_processes: Whether to step environments in separate processes.
 
+  Raises:
+    ValueError: Worker normalization is enabled without the actor/learner mode.
+
   Yields:
     Evaluation scores.
   """
+  if config.get('actor_learner', False):
+    for score in train_actor_learner(config):
+      yield score
+    return
+  if config.get('worker_normalize', False):
+    # Only the learner of the actor/learner mode merges and stores the
+    # statistics of the environments.
+    raise ValueError('Worker normalization requires the actor/learner mode.')
   tf.reset_default_graph()
   if config.update_every % config.num_agents:
     tf.logging.warn('Number of agents should divide episodes per update.')
   with tf.device('/cpu:0'):
-    batch_env = utility.define_batch_env(
-        lambda: _create_environment(config),
-        config.num_agents, env_processes)
-    graph = utility.define_simulation_graph(
-        batch_env, config.algorithm, config)
-    loop = _define_loop(
-        graph, config.logdir,
-        config.update_every * config.max_length,
-        config.eval_episodes * config.max_length)
+    if config.get('host_simulation', False):
+      batch_env = utility.define_host_batch_env(
+          lambda: _create_environment(config),
+          config.num_agents, env_processes,
+          config.get('shared_memory_envs', False), config.get('env_seed'))
+      graph = utility.define_host_simulation_graph(
+          batch_env, config.algorithm, config.host_algorithm, config)
+      loop = _define_host_loop(
+          graph, config.logdir,
+          config.update_every * config.max_length,
+          config.eval_episodes * config.max_length,
+          config.host_chunk)
+    else:
+      batch_env = utility.define_batch_env(
+          lambda: _create_environment(config),
+          config.num_agents, env_processes,
+          config.get('shared_memory_envs', False), config.get('env_seed'))
+      graph = utility.define_simulation_graph(
+          batch_env, config.algorithm, config)
+      loop = _define_loop(
+          graph, config.logdir,
+          config.update_every * config.max_length,
+          config.eval_episodes * config.max_length)
     total_steps = int(
         config.steps / config.update_every *
         (config.update_every + config.eval_episodes))
@@ -126,6 +185,81 @@ def train(config, env_processes):
   batch_env.close()
 
 
+def train_actor_learner(config):
+  """Training entry point with actor processes yielding training scores.
+
+  The actors step the environments in their own processes and keep collecting
+  episodes while the learner updates. There is no separate evaluation phase;
+  the scores are those of the training episodes received since the last
+  update.
+
+  Args:
+    config: Object providing configurations via attributes.
+
+  Yields:
+    Training scores.
+  """
+  tf.reset_default_graph()
+  # Start the actors before the learner creates its session.
+  actors = tools.ActorLearner(lambda: _create_environment(config), config)
+  try:
+    with tf.device('/cpu:0'):
+      graph = utility.define_learner_graph(
+          actors, config.algorithm, config.host_algorithm, config)
+    saver = utility.define_saver(exclude=(r'.*_temporary/.*',))
+    writer = config.logdir and tf.summary.FileWriter(
+        os.path.join(config.logdir, 'train'), tf.get_default_graph(),
+        flush_secs=60)
+    feed = {graph.is_training: True, graph.should_log: bool(writer)}
+    sess_config = tf.ConfigProto(allow_soft_placement=True)
+    sess_config.gpu_options.allow_growth = True
+    with tf.Session(config=sess_config) as sess:
+      utility.initialize_variables(sess, saver, config.logdir)
+      moments = None
+      if config.get('worker_normalize', False):
+        moments = utility.load_observ_moments(config.logdir)
+      if moments:
+        actors.load_observ_moments(moments)
+      actors.publish(graph.host_algo.updates, sess.run(graph.policy))
+      global_step = sess.run(graph.step)
+      scores = []
+      while global_step < config.steps:
+        received = actors.receive(graph.host_algo.updates)
+        if received is None:
+          continue
+        episodes, length = received
+        # Rewards are the last transition quantity.
+        scores.extend(
+            reward[:steps].sum() for reward, steps in zip(episodes[-1], length))
+        updates = graph.host_algo.updates
+        summary = graph.host_algo.add_episodes(sess, feed, episodes, length)
+        global_step = sess.run(
+            graph.increment_step, {graph.num_steps: int(length.sum())})
+        if graph.host_algo.updates == updates:
+          continue
+        actors.publish(graph.host_algo.updates, sess.run(graph.policy))
+        mean_score = float(np.mean(scores))
+        staleness, dropped = actors.statistics()
+        scores = []
+        if writer:
+          writer.add_summary(summary, global_step)
+          writer.add_summary(tf.Summary(value=[
+              tf.Summary.Value(tag='mean_score', simple_value=mean_score),
+              tf.Summary.Value(tag='staleness', simple_value=staleness),
+              tf.Summary.Value(tag='dropped', simple_value=dropped),
+          ]), global_step)
+        if config.logdir and graph.host_algo.updates % 10 == 0:
+          tf.gfile.MakeDirs(config.logdir)
+          saver.save(
+              sess, os.path.join(config.logdir, 'model.ckpt'), global_step)
+          if config.get('worker_normalize', False):
+            utility.save_observ_moments(
+                actors.observ_moments(), config.logdir)
+        yield mean_score
+  finally:
+    actors.close()
+
+
 def main(_):
   """Create or load configuration and launch the trainer."""
   utility.set_up_logging()
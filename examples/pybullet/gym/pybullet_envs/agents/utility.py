@@ -22,6 +22,7 @@ import logging
 import os
 import re
 
+import numpy as np
 import ruamel.yaml as yaml
 import tensorflow as tf
 
@@ -54,18 +55,84 @@ def define_simulation_graph(batch_env, algo_cls, config):
   return tools.AttrDict(locals())
 
 
-def define_batch_env(constructor, num_agents, env_processes):
-  """Create environments and apply all desired wrappers.
+def define_host_simulation_graph(batch_env, algo_cls, host_algo_cls, config):
+  """Define the algorithm and its host side for stepping outside the graph.
+
+  Args:
+    batch_env: Batch environment stepped in Python.
+    algo_cls: Constructor of a batch algorithm.
+    host_algo_cls: Constructor of the host side of the algorithm.
+    config: Configuration object for the algorithm.
+
+  Returns:
+    Object providing graph elements via attributes.
+  """
+  # pylint: disable=unused-variable
+  step = tf.Variable(0, False, dtype=tf.int32, name='global_step')
+  is_training = tf.placeholder(tf.bool, name='is_training')
+  should_log = tf.placeholder(tf.bool, name='should_log')
+  do_report = tf.placeholder(tf.bool, name='do_report')
+  force_reset = tf.placeholder(tf.bool, name='force_reset')
+  with tf.variable_scope('environments'):
+    # Only provides the shapes and dtypes of the environments to the algorithm.
+    in_graph_env = tools.InGraphBatchEnv(batch_env)
+  algo = algo_cls(in_graph_env, step, is_training, should_log, config)
+  host_algo = host_algo_cls(algo, batch_env, is_training, config)
+  driver = tools.RolloutDriver(batch_env, host_algo)
+  message = 'Graph contains {} trainable variables.'
+  tf.logging.info(message.format(tools.count_weights()))
+  # pylint: enable=unused-variable
+  return tools.AttrDict(locals())
+
+
+def define_learner_graph(actors, algo_cls, host_algo_cls, config):
+  """Define the algorithm of a learner that trains on episodes of actors.
+
+  Args:
+    actors: Actor processes providing the spaces of their environments.
+    algo_cls: Constructor of a batch algorithm.
+    host_algo_cls: Constructor of the host side of the algorithm.
+    config: Configuration object for the algorithm.
+
+  Returns:
+    Object providing graph elements via attributes.
+  """
+  # pylint: disable=unused-variable
+  step = tf.Variable(0, False, dtype=tf.int32, name='global_step')
+  num_steps = tf.placeholder(tf.int32, (), name='num_steps')
+  increment_step = step.assign_add(num_steps)
+  is_training = tf.placeholder(tf.bool, name='is_training')
+  should_log = tf.placeholder(tf.bool, name='should_log')
+  with tf.variable_scope('environments'):
+    # Only provides the shapes and dtypes of the environments to the algorithm.
+    in_graph_env = tools.InGraphBatchEnv(actors)
+  algo = algo_cls(in_graph_env, step, is_training, should_log, config)
+  host_algo = host_algo_cls(algo, actors, is_training, config)
+  policy = algo.policy_variables()
+  message = 'Graph contains {} trainable variables.'
+  tf.logging.info(message.format(tools.count_weights()))
+  # pylint: enable=unused-variable
+  return tools.AttrDict(locals())
+
+
+def define_host_batch_env(constructor, num_agents, env_processes,
+                          shared_memory=False, seed=None):
+  """Create environments stepped in Python and apply all desired wrappers.
 
   Args:
     constructor: Constructor of an OpenAI gym environment.
     num_agents: Number of environments to combine in the batch.
     env_processes: Whether to step environment in external processes.
+    shared_memory: Whether external processes exchange observations through
+        shared memory instead of pickling them through pipes.
+    seed: If set, seed the environments with seeds derived from it.
 
   Returns:
-    In-graph environments object.
+    Batch environment.
   """
-  with tf.variable_scope('environments'):
+  if env_processes and shared_memory:
+    batch_env = tools.ShmBatchEnv(constructor, num_agents)
+  else:
     if env_processes:
       envs = [
           tools.wrappers.ExternalProcess(constructor)
@@ -73,6 +140,29 @@ def define_batch_env(constructor, num_agents, env_processes):
     else:
       envs = [constructor() for _ in range(num_agents)]
     batch_env = tools.BatchEnv(envs, blocking=not env_processes)
+  if seed is not None:
+    batch_env.seed(seed)
+  return batch_env
+
+
+def define_batch_env(
+    constructor, num_agents, env_processes, shared_memory=False, seed=None):
+  """Create environments and apply all desired wrappers.
+
+  Args:
+    constructor: Constructor of an OpenAI gym environment.
+    num_agents: Number of environments to combine in the batch.
+    env_processes: Whether to step environment in external processes.
+    shared_memory: Whether external processes exchange observations through
+        shared memory instead of pickling them through pipes.
+    seed: If set, seed the environments with seeds derived from it.
+
+  Returns:
+    In-graph environments object.
+  """
+  with tf.variable_scope('environments'):
+    batch_env = define_host_batch_env(
+        constructor, num_agents, env_processes, shared_memory, seed)
     batch_env = tools.InGraphBatchEnv(batch_env)
   return batch_env
 
@@ -184,6 +274,37 @@ def load_config(logdir):
   return config
 
 
+def save_observ_moments(moments, logdir):
+  """Store observation statistics computed outside the graph.
+
+  Args:
+    moments: Tuple of count, mean, and variance sum.
+    logdir: The logging directory to store the statistics in.
+  """
+  tf.gfile.MakeDirs(logdir)
+  count, mean, var_sum = moments
+  path = os.path.join(logdir, 'observ_moments.npz')
+  with tf.gfile.GFile(path, 'wb') as file_:
+    np.savez(file_, count=count, mean=mean, var_sum=var_sum)
+
+
+def load_observ_moments(logdir):
+  """Load observation statistics computed outside the graph if available.
+
+  Args:
+    logdir: The logging directory containing the statistics.
+
+  Returns:
+    Tuple of count, mean, and variance sum, or None.
+  """
+  path = logdir and os.path.join(logdir, 'observ_moments.npz')
+  if not path or not tf.gfile.Exists(path):
+    return None
+  with tf.gfile.GFile(path, 'rb') as file_:
+    data = np.load(file_)
+    return int(data['count']), data['mean'], data['var_sum']
+
+
 def set_up_logging():
   """Configure the TensorFlow logger."""
   tf.logging.set_verbosity(tf.logging.INFO)
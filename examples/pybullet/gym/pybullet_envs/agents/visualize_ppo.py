@@ -56,6 +56,11 @@ def _create_environment(config, outdir):
   env = gym.wrappers.Monitor(
       env, outdir, lambda unused_episode_number: True)
   env = tools.wrappers.RangeNormalize(env)
+  if config.get('worker_normalize', False):
+    env = tools.wrappers.NormalizeObserv(env)
+    moments = utility.load_observ_moments(config.logdir)
+    if moments:
+      env.load_statistics(moments)
   env = tools.wrappers.ClipAction(env)
   env = tools.wrappers.ConvertTo32Bit(env)
   return env
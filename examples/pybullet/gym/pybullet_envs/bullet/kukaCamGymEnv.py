@@ -12,7 +12,6 @@ import numpy as np
 import time
 import pybullet as p
 from . import kuka
-import random
 import pybullet_data
 from pkg_resources import parse_version
 
@@ -79,9 +78,9 @@ class KukaCamGymEnv(gym.Env):
 
     p.loadURDF(os.path.join(self._urdfRoot,"table/table.urdf"), 0.5000000,0.00000,-.820000,0.000000,0.000000,0.0,1.0)
 
-    xpos = 0.5 +0.2*random.random()
-    ypos = 0 +0.25*random.random()
-    ang = 3.1415925438*random.random()
+    xpos = 0.5 +0.2*self.np_random.uniform()
+    ypos = 0 +0.25*self.np_random.uniform()
+    ang = 3.1415925438*self.np_random.uniform()
     orn = p.getQuaternionFromEuler([0,0,ang])
     self.blockUid =p.loadURDF(os.path.join(self._urdfRoot,"block.urdf"), xpos,ypos,-0.1,orn[0],orn[1],orn[2],orn[3])
 
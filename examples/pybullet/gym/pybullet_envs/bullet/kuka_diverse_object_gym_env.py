@@ -1,5 +1,4 @@
 from pybullet_envs.bullet.kukaGymEnv import KukaGymEnv
-import random
 import os
 from gym import spaces
 import time
@@ -111,12 +110,12 @@ class KukaDiverseObjectEnv(KukaGymEnv):
     # Set the camera settings.
     look = [0.23, 0.2, 0.54]
     distance = 1.
-    pitch = -56 + self._cameraRandom*np.random.uniform(-3, 3)
-    yaw = 245 + self._cameraRandom*np.random.uniform(-3, 3)
+    pitch = -56 + self._cameraRandom*self.np_random.uniform(-3, 3)
+    yaw = 245 + self._cameraRandom*self.np_random.uniform(-3, 3)
     roll = 0
     self._view_matrix = p.computeViewMatrixFromYawPitchRoll(
         look, distance, yaw, pitch, roll, 2)
-    fov = 20. + self._cameraRandom*np.random.uniform(-2, 2)
+    fov = 20. + self._cameraRandom*self.np_random.uniform(-2, 2)
     aspect = self._width / self._height
     near = 0.01
     far = 10
@@ -160,9 +159,9 @@ class KukaDiverseObjectEnv(KukaGymEnv):
     # Randomize positions of each object urdf.
     objectUids = []
     for urdf_name in urdfList:
-      xpos = 0.4 +self._blockRandom*random.random()
-      ypos = self._blockRandom*(random.random()-.5)
-      angle = np.pi/2 + self._blockRandom * np.pi * random.random()
+      xpos = 0.4 +self._blockRandom*self.np_random.uniform()
+      ypos = self._blockRandom*(self.np_random.uniform()-.5)
+      angle = np.pi/2 + self._blockRandom * np.pi * self.np_random.uniform()
       orn = p.getQuaternionFromEuler([0, 0, angle])
       urdf_path = os.path.join(self._urdfRoot, urdf_name)
       uid = p.loadURDF(urdf_path, [xpos, ypos, .15],
@@ -317,10 +316,10 @@ class KukaDiverseObjectEnv(KukaGymEnv):
       urdf_pattern = os.path.join(self._urdfRoot, 'random_urdfs/*0/*.urdf')
     else:
       urdf_pattern = os.path.join(self._urdfRoot, 'random_urdfs/*[^0]/*.urdf')
-    found_object_directories = glob.glob(urdf_pattern)
+    found_object_directories = sorted(glob.glob(urdf_pattern))
     total_num_objects = len(found_object_directories)
-    selected_objects = np.random.choice(np.arange(total_num_objects),
-                                        num_objects)
+    selected_objects = self.np_random.choice(np.arange(total_num_objects),
+                                             num_objects)
     selected_objects_filenames = []
     for object_index in selected_objects:
       selected_objects_filenames += [found_object_directories[object_index]]
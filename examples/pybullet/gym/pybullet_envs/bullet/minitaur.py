@@ -1,7 +1,6 @@
 """This file implements the functionalities of a minitaur using pybullet.
 
 """
-import copy
 import math
 import numpy as np
 from . import motor
@@ -24,6 +23,56 @@ LEG_LINK_ID = [2, 3, 5, 6, 8, 9, 11, 12, 15, 16, 18, 19, 21, 22, 24, 25]
 MOTOR_LINK_ID = [1, 4, 7, 10, 14, 17, 20, 23]
 FOOT_LINK_ID = [3, 6, 9, 12, 16, 19, 22, 25]
 BASE_LINK_ID = -1
+NUM_MOTORS = 8
+SCALE_FOR_SINGULARITY = 1
+OFFSET_FOR_SINGULARITY = 1.5
+
+
+def _LegModelMatrixAndOffset():
+  """Get the linear map from the leg model actions to the motor angles.
+
+  Motor i combines the swing action[i // 2 + 4] (forward backward component)
+  and the extension action[i // 2], with the extension sign alternating between
+  the two motors of a leg and flipped for the legs on the right side.
+
+  Returns:
+    The (8, 8) matrix and the offset, motor_angles = matrix * actions + offset.
+  """
+  half_num_motors = NUM_MOTORS // 2
+  quater_pi = math.pi / 4
+  matrix = np.zeros((NUM_MOTORS, NUM_MOTORS))
+  for i in range(NUM_MOTORS):
+    action_idx = i // 2
+    matrix[i, action_idx + half_num_motors] = (
+        -SCALE_FOR_SINGULARITY * quater_pi)
+    extension_sign = (-1)**i if i < half_num_motors else -(-1)**i
+    matrix[i, action_idx] = extension_sign * quater_pi
+  offset = math.pi - (
+      SCALE_FOR_SINGULARITY * quater_pi * OFFSET_FOR_SINGULARITY)
+  return matrix, offset
+
+
+LEG_MODEL_MATRIX, LEG_MODEL_OFFSET = _LegModelMatrixAndOffset()
+
+
+def UpdateOverheatProtection(actual_torque, overheat_counter, motor_enabled,
+                             max_overheat_steps):
+  """Shut down the motors that exerted a large torque for too long.
+
+  A motor is disabled once its torque exceeded OVERHEAT_SHUTDOWN_TORQUE for more
+  than max_overheat_steps consecutive steps, and stays disabled until reset.
+  The arguments can have any shape, e.g. (8,) for one or (N, 8) for N robots.
+
+  Args:
+    actual_torque: The torques that are about to be applied to the motors.
+    overheat_counter: The number of consecutive steps with a large torque,
+      updated in place.
+    motor_enabled: Boolean array of the enabled motors, updated in place.
+    max_overheat_steps: The number of steps after which a motor is disabled.
+  """
+  overheat_counter += 1
+  overheat_counter *= np.absolute(actual_torque) > OVERHEAT_SHUTDOWN_TORQUE
+  motor_enabled &= overheat_counter <= max_overheat_steps
 
 
 class Minitaur(object):
@@ -79,11 +128,20 @@ class Minitaur(object):
     self._motor_direction = [-1, -1, -1, -1, 1, 1, 1, 1]
     self._observed_motor_torques = np.zeros(self.num_motors)
     self._applied_motor_torques = np.zeros(self.num_motors)
+    # observation[0:8] are motor angles, [8:16] motor velocities, [16:24] motor
+    # torques and [24:28] the base orientation, see GetObservation().
+    self._observation = np.zeros(3 * self.num_motors + 4)
+    self._motor_angles = self._observation[0:self.num_motors]
+    self._motor_velocities = self._observation[
+        self.num_motors:2 * self.num_motors]
+    self._joint_torques = np.zeros(self.num_motors)
+    self._base_position_and_orientation = None
     self._max_force = 3.5
     self._accurate_motor_model_enabled = accurate_motor_model_enabled
     self._torque_control_enabled = torque_control_enabled
     self._motor_overheat_protection = motor_overheat_protection
     self._on_rack = on_rack
+    self._rack_constraint = None
     if self._accurate_motor_model_enabled:
       self._kp = motor_kp
       self._kd = motor_kd
@@ -142,11 +200,14 @@ class Minitaur(object):
       self._BuildJointNameToIdDict()
       self._BuildMotorIdList()
       self._RecordMassInfoFromURDF()
+      # The dynamics last set with changeDynamics, None if not set yet.
+      self._base_mass = None
+      self._leg_masses = [None, None]
+      self._foot_friction = None
       self.ResetPose(add_constraint=True)
+      self._rack_constraint = None
       if self._on_rack:
-        self._pybullet_client.createConstraint(
-            self.quadruped, -1, -1, -1, self._pybullet_client.JOINT_FIXED,
-            [0, 0, 0], [0, 0, 0], [0, 0, 1])
+        self._AddRackConstraint()
     else:
       self._pybullet_client.resetBasePositionAndOrientation(
           self.quadruped, INIT_POSITION, INIT_ORIENTATION)
@@ -155,7 +216,80 @@ class Minitaur(object):
       self.ResetPose(add_constraint=False)
 
     self._overheat_counter = np.zeros(self.num_motors)
-    self._motor_enabled_list = [True] * self.num_motors
+    self._motor_enabled_list = np.ones(self.num_motors, dtype=bool)
+    self.ReceiveObservation()
+
+  def _AddRackConstraint(self):
+    self._rack_constraint = self._pybullet_client.createConstraint(
+        self.quadruped, -1, -1, -1, self._pybullet_client.JOINT_FIXED,
+        [0, 0, 0], [0, 0, 0], [0, 0, 1])
+
+  def SetOnRack(self, on_rack):
+    """Hang the minitaur on the rack or take it off, without reloading it.
+
+    Args:
+      on_rack: Whether the minitaur should be on the rack.
+    """
+    if on_rack == self._on_rack:
+      return
+    self._on_rack = on_rack
+    if on_rack:
+      self._AddRackConstraint()
+    else:
+      self._pybullet_client.removeConstraint(self._rack_constraint)
+      self._rack_constraint = None
+
+  def SetSelfCollisionEnabled(self, self_collision_enabled):
+    """Enable or disable the self collision of the minitaur.
+
+    Self collision is a flag of loadURDF, so the minitaur body is removed and
+    loaded again if the setting changes. The other bodies of the simulation are
+    kept.
+
+    Args:
+      self_collision_enabled: Whether to enable self collision.
+    """
+    if self_collision_enabled == self._self_collision_enabled:
+      return
+    self._self_collision_enabled = self_collision_enabled
+    # Removing the body removes its knee and rack constraints as well.
+    self._pybullet_client.removeBody(self.quadruped)
+    self.Reset(reload_urdf=True)
+
+  def ResetMotorState(self, observed_motor_torques):
+    """Reset the motor bookkeeping after the simulation state was restored.
+
+    Args:
+      observed_motor_torques: The motor torques at the time the simulation
+        state was saved.
+    """
+    self._observed_motor_torques = np.array(observed_motor_torques)
+    self._overheat_counter = np.zeros(self.num_motors)
+    self._motor_enabled_list = np.ones(self.num_motors, dtype=bool)
+    self.ReceiveObservation()
+
+  def ReceiveObservation(self):
+    """Fetch the motor states of the current simulation step.
+
+    The angles, velocities and torques of all motors are read with one
+    getJointStates call. GetMotorAngles(), GetMotorVelocities(),
+    GetMotorTorques(), GetObservation() and ApplyAction() use the states fetched
+    here, so this needs to be called after every stepSimulation() or reset of
+    the simulation state. The base pose is fetched on demand, once per call.
+    """
+    joint_states = self._pybullet_client.getJointStates(self.quadruped,
+                                                        self._motor_id_list)
+    angles, velocities, _, torques = zip(*joint_states)
+    np.multiply(angles, self._motor_direction, out=self._motor_angles)
+    np.multiply(velocities, self._motor_direction, out=self._motor_velocities)
+    np.multiply(torques, self._motor_direction, out=self._joint_torques)
+    self._base_position_and_orientation = None
+
+  def _GetBasePositionAndOrientation(self):
+    if self._base_position_and_orientation is None:
+      self._base_position_and_orientation = (
+          self._pybullet_client.getBasePositionAndOrientation(self.quadruped))
+    return self._base_position_and_orientation
 
   def _SetMotorTorqueById(self, motor_id, torque):
     self._pybullet_client.setJointMotorControl2(
@@ -273,8 +407,7 @@ class Minitaur(object):
     Returns:
       The position of minitaur's base.
     """
-    position, _ = (
-        self._pybullet_client.getBasePositionAndOrientation(self.quadruped))
+    position, _ = self._GetBasePositionAndOrientation()
     return position
 
   def GetBaseOrientation(self):
@@ -283,8 +416,7 @@ class Minitaur(object):
     Returns:
       The orientation of minitaur's base.
     """
-    _, orientation = (
-        self._pybullet_client.getBasePositionAndOrientation(self.quadruped))
+    _, orientation = self._GetBasePositionAndOrientation()
     return orientation
 
   def GetActionDimension(self):
@@ -329,16 +461,24 @@ class Minitaur(object):
     It includes the angles, velocities, torques and the orientation of the base.
 
     Returns:
-      The observation list. observation[0:8] are motor angles. observation[8:16]
-      are motor velocities, observation[16:24] are motor torques.
-      observation[24:28] is the orientation of the base, in quaternion form.
+      The observation array. observation[0:8] are motor angles.
+      observation[8:16] are motor velocities, observation[16:24] are motor
+      torques. observation[24:28] is the orientation of the base, in quaternion
+      form.
     """
-    observation = []
-    observation.extend(self.GetMotorAngles().tolist())
-    observation.extend(self.GetMotorVelocities().tolist())
-    observation.extend(self.GetMotorTorques().tolist())
-    observation.extend(list(self.GetBaseOrientation()))
-    return observation
+    return self.GetObservationView().copy()
+
+  def GetObservationView(self):
+    """Get the observations of minitaur without copying them.
+
+    Returns:
+      The preallocated observation array, see GetObservation(). It is
+      overwritten by the next ReceiveObservation() and GetObservationView().
+    """
+    self._observation[2 * self.num_motors:3 * self.num_motors] = (
+        self.GetMotorTorques())
+    self._observation[3 * self.num_motors:] = self.GetBaseOrientation()
+    return self._observation
 
   def ApplyAction(self, motor_commands):
     """Set the desired motor angles to the motors of the minitaur.
@@ -353,7 +493,7 @@ class Minitaur(object):
       motor_commands: The eight desired motor angles.
     """
     if self._motor_velocity_limit < np.inf:
-      current_motor_angle = self.GetMotorAngles()
+      current_motor_angle = self._motor_angles
       motor_commands_max = (
           current_motor_angle + self.time_step * self._motor_velocity_limit)
       motor_commands_min = (
@@ -362,20 +502,15 @@ class Minitaur(object):
                                motor_commands_max)
 
     if self._accurate_motor_model_enabled or self._pd_control_enabled:
-      q = self.GetMotorAngles()
-      qdot = self.GetMotorVelocities()
+      q = self._motor_angles
+      qdot = self._motor_velocities
       if self._accurate_motor_model_enabled:
         actual_torque, observed_torque = self._motor_model.convert_to_torque(
             motor_commands, q, qdot)
         if self._motor_overheat_protection:
-          for i in range(self.num_motors):
-            if abs(actual_torque[i]) > OVERHEAT_SHUTDOWN_TORQUE:
-              self._overheat_counter[i] += 1
-            else:
-              self._overheat_counter[i] = 0
-            if (self._overheat_counter[i] >
-                OVERHEAT_SHUTDOWN_TIME / self.time_step):
-              self._motor_enabled_list[i] = False
+          UpdateOverheatProtection(actual_torque, self._overheat_counter,
+                                   self._motor_enabled_list,
+                                   OVERHEAT_SHUTDOWN_TIME / self.time_step)
 
         # The torque is already in the observation space because we use
         # GetMotorAngles and GetMotorVelocities.
@@ -385,13 +520,10 @@ class Minitaur(object):
         self._applied_motor_torque = np.multiply(actual_torque,
                                                  self._motor_direction)
 
-        for motor_id, motor_torque, motor_enabled in zip(
-            self._motor_id_list, self._applied_motor_torque,
-            self._motor_enabled_list):
-          if motor_enabled:
-            self._SetMotorTorqueById(motor_id, motor_torque)
-          else:
-            self._SetMotorTorqueById(motor_id, 0)
+        self._applied_motor_torque *= self._motor_enabled_list
+        for motor_id, motor_torque in zip(self._motor_id_list,
+                                          self._applied_motor_torque):
+          self._SetMotorTorqueById(motor_id, motor_torque)
       else:
         torque_commands = -self._kp * (q - motor_commands) - self._kd * qdot
 
@@ -419,12 +551,7 @@ class Minitaur(object):
     Returns:
       Motor angles.
     """
-    motor_angles = [
-        self._pybullet_client.getJointState(self.quadruped, motor_id)[0]
-        for motor_id in self._motor_id_list
-    ]
-    motor_angles = np.multiply(motor_angles, self._motor_direction)
-    return motor_angles
+    return self._motor_angles.copy()
 
   def GetMotorVelocities(self):
     """Get the velocity of all eight motors.
@@ -432,12 +559,7 @@ class Minitaur(object):
     Returns:
       Velocities of all eight motors.
     """
-    motor_velocities = [
-        self._pybullet_client.getJointState(self.quadruped, motor_id)[1]
-        for motor_id in self._motor_id_list
-    ]
-    motor_velocities = np.multiply(motor_velocities, self._motor_direction)
-    return motor_velocities
+    return self._motor_velocities.copy()
 
   def GetMotorTorques(self):
     """Get the amount of torques the motors are exerting.
@@ -448,37 +570,19 @@ class Minitaur(object):
     if self._accurate_motor_model_enabled or self._pd_control_enabled:
       return self._observed_motor_torques
     else:
-      motor_torques = [
-          self._pybullet_client.getJointState(self.quadruped, motor_id)[3]
-          for motor_id in self._motor_id_list
-      ]
-      motor_torques = np.multiply(motor_torques, self._motor_direction)
-    return motor_torques
+      return self._joint_torques.copy()
 
   def ConvertFromLegModel(self, actions):
     """Convert the actions that use leg model to the real motor actions.
 
     Args:
-      actions: The theta, phi of the leg model.
+      actions: The theta, phi of the leg model, shape (8,), or (N, 8) for the
+        actions of N robots.
     Returns:
-      The eight desired motor angles that can be used in ApplyActions().
+      The eight desired motor angles that can be used in ApplyActions(), with
+      the same shape as actions.
     """
-
-    motor_angle = copy.deepcopy(actions)
-    scale_for_singularity = 1
-    offset_for_singularity = 1.5
-    half_num_motors = int(self.num_motors / 2)
-    quater_pi = math.pi / 4
-    for i in range(self.num_motors):
-      action_idx = i // 2
-      forward_backward_component = (-scale_for_singularity * quater_pi * (
-          actions[action_idx + half_num_motors] + offset_for_singularity))
-      extension_component = (-1)**i * quater_pi * actions[action_idx]
-      if i >= half_num_motors:
-        extension_component = -extension_component
-      motor_angle[i] = (
-          math.pi + forward_backward_component + extension_component)
-    return motor_angle
+    return np.dot(actions, LEG_MODEL_MATRIX.T) + LEG_MODEL_OFFSET
 
   def GetBaseMassFromURDF(self):
     """Get the mass of the base from the URDF file."""
@@ -489,8 +593,11 @@ class Minitaur(object):
     return self._leg_masses_urdf
 
   def SetBaseMass(self, base_mass):
+    if base_mass == self._base_mass:
+      return
     self._pybullet_client.changeDynamics(
         self.quadruped, BASE_LINK_ID, mass=base_mass)
+    self._base_mass = base_mass
 
   def SetLegMasses(self, leg_masses):
     """Set the mass of the legs.
@@ -503,12 +610,16 @@ class Minitaur(object):
       leg_masses: The leg masses. leg_masses[0] is the mass of the leg link.
         leg_masses[1] is the mass of the motor.
     """
-    for link_id in LEG_LINK_ID:
-      self._pybullet_client.changeDynamics(
-          self.quadruped, link_id, mass=leg_masses[0])
-    for link_id in MOTOR_LINK_ID:
-      self._pybullet_client.changeDynamics(
-          self.quadruped, link_id, mass=leg_masses[1])
+    if leg_masses[0] != self._leg_masses[0]:
+      for link_id in LEG_LINK_ID:
+        self._pybullet_client.changeDynamics(
+            self.quadruped, link_id, mass=leg_masses[0])
+      self._leg_masses[0] = leg_masses[0]
+    if leg_masses[1] != self._leg_masses[1]:
+      for link_id in MOTOR_LINK_ID:
+        self._pybullet_client.changeDynamics(
+            self.quadruped, link_id, mass=leg_masses[1])
+      self._leg_masses[1] = leg_masses[1]
 
   def SetFootFriction(self, foot_friction):
     """Set the lateral friction of the feet.
@@ -517,9 +628,12 @@ class Minitaur(object):
       foot_friction: The lateral friction coefficient of the foot. This value is
         shared by all four feet.
     """
+    if foot_friction == self._foot_friction:
+      return
     for link_id in FOOT_LINK_ID:
       self._pybullet_client.changeDynamics(
           self.quadruped, link_id, lateralFriction=foot_friction)
+    self._foot_friction = foot_friction
 
   def SetBatteryVoltage(self, voltage):
     if self._accurate_motor_model_enabled:
@@ -1,5 +1,5 @@
 """Randomize the minitaur_gym_env when reset() is called."""
-import random
+import weakref
 import numpy as np
 from . import env_randomizer_base
 
@@ -11,24 +11,137 @@ BATTERY_VOLTAGE_RANGE = (14.8, 16.8)  # Unit: Volt
 MOTOR_VISCOUS_DAMPING_RANGE = (0, 0.01)  # Unit: N*m*s/rad (torque/angular vel)
 MINITAUR_LEG_FRICTION = (0.8, 1.5)  # Unit: dimensionless
 
+# One record of sampled parameters. The mass errors are relative to the masses
+# in the URDF file, the other parameters are absolute.
+PARAMETER_DTYPE = np.dtype([
+    ("base_mass_error", np.float32),
+    ("leg_mass_errors", np.float32, (2,)),
+    ("battery_voltage", np.float32),
+    ("motor_viscous_damping", np.float32),
+    ("foot_friction", np.float32),
+])
+
+
+def _make_rng(seed):
+  # np.random.Generator where numpy provides it, RandomState otherwise. Both
+  # draw the same way from uniform(low, high, size).
+  return getattr(np.random, "default_rng", np.random.RandomState)(seed)
+
+
+class _SamplingState(object):
+  """The random number generator and the pre-sampled batch of one env."""
+
+  def __init__(self, seed, np_random=None):
+    self.rng = _make_rng(seed)
+    self.np_random = np_random  # The env generator the seed was drawn from.
+    self.samples = np.zeros(0, dtype=PARAMETER_DTYPE)
+    self.next_sample = 0
+
 
 class MinitaurEnvRandomizer(env_randomizer_base.EnvRandomizerBase):
-  """A randomizer that change the minitaur_gym_env during every reset."""
+  """A randomizer that change the minitaur_gym_env during every reset.
+
+  The parameters of an env are sampled for batch_size resets at once and used
+  one reset at a time. Unless seed is given, every env that is randomized gets
+  a random number generator and batch of its own, seeded from the np_random of
+  the env and again whenever the env was reseeded. Seeding the envs thus makes
+  the randomization reproducible, also in worker processes and when envs share
+  a randomizer, independent of the order in which they reset. With a seed, all
+  envs draw from one generator and batch.
+  The parameters of the last max_history randomizations are recorded, see
+  parameter_history().
+  """
 
   def __init__(self,
                minitaur_base_mass_err_range=MINITAUR_BASE_MASS_ERROR_RANGE,
                minitaur_leg_mass_err_range=MINITAUR_LEG_MASS_ERROR_RANGE,
                battery_voltage_range=BATTERY_VOLTAGE_RANGE,
-               motor_viscous_damping_range=MOTOR_VISCOUS_DAMPING_RANGE):
+               motor_viscous_damping_range=MOTOR_VISCOUS_DAMPING_RANGE,
+               minitaur_leg_friction_range=MINITAUR_LEG_FRICTION,
+               seed=None,
+               batch_size=64,
+               max_history=1000):
     self._minitaur_base_mass_err_range = minitaur_base_mass_err_range
     self._minitaur_leg_mass_err_range = minitaur_leg_mass_err_range
     self._battery_voltage_range = battery_voltage_range
     self._motor_viscous_damping_range = motor_viscous_damping_range
+    self._minitaur_leg_friction_range = minitaur_leg_friction_range
+    self._batch_size = batch_size
+    self._follow_env = seed is None
+    self._shared_state = None if seed is None else _SamplingState(seed)
+    # Dropped together with the envs, so that recreated envs do not pile up.
+    self._env_states = weakref.WeakKeyDictionary()
+    self._history = np.zeros(max_history, dtype=PARAMETER_DTYPE)
+    self._history_size = 0
+
+  def seed(self, seed):
+    """Seed one generator for all envs, instead of following the env seeds."""
+    self._follow_env = False
+    self._shared_state = _SamplingState(seed)
+
+  def sample(self, num_envs):
+    """Sample the parameters of num_envs envs at once.
+
+    Args:
+      num_envs: The number of parameter records to sample.
+
+    Returns:
+      A structured array of num_envs records with PARAMETER_DTYPE.
+    """
+    if self._shared_state is None:
+      self._shared_state = _SamplingState(None)
+    return self._sample(self._shared_state.rng, num_envs)
+
+  def _sample(self, rng, num_envs):
+    samples = np.zeros(num_envs, dtype=PARAMETER_DTYPE)
+    samples["base_mass_error"] = rng.uniform(
+        self._minitaur_base_mass_err_range[0],
+        self._minitaur_base_mass_err_range[1], num_envs)
+    samples["leg_mass_errors"] = rng.uniform(
+        self._minitaur_leg_mass_err_range[0],
+        self._minitaur_leg_mass_err_range[1], (num_envs, 2))
+    samples["battery_voltage"] = rng.uniform(
+        self._battery_voltage_range[0], self._battery_voltage_range[1],
+        num_envs)
+    samples["motor_viscous_damping"] = rng.uniform(
+        self._motor_viscous_damping_range[0],
+        self._motor_viscous_damping_range[1], num_envs)
+    samples["foot_friction"] = rng.uniform(
+        self._minitaur_leg_friction_range[0],
+        self._minitaur_leg_friction_range[1], num_envs)
+    return samples
 
   def randomize_env(self, env):
-    self._randomize_minitaur(env.minitaur)
+    state = self._state_of(env)
+    if state.next_sample >= len(state.samples):
+      state.samples = self._sample(state.rng, self._batch_size)
+      state.next_sample = 0
+    parameters = state.samples[state.next_sample]
+    state.next_sample += 1
+    self._randomize_minitaur(env.minitaur, parameters)
+
+  def parameter_history(self):
+    """Get the parameters of the last max_history randomizations, oldest first.
 
-  def _randomize_minitaur(self, minitaur):
+    Returns:
+      A structured array with PARAMETER_DTYPE.
+    """
+    capacity = len(self._history)
+    if self._history_size <= capacity:
+      return self._history[:self._history_size].copy()
+    start = self._history_size % capacity
+    return np.concatenate([self._history[start:], self._history[:start]])
+
+  def _state_of(self, env):
+    if not self._follow_env:
+      return self._shared_state
+    state = self._env_states.get(env)
+    if state is None or state.np_random is not env.np_random:
+      state = _SamplingState(env.np_random.randint(2**31 - 1), env.np_random)
+      self._env_states[env] = state
+    return state
+
+  def _randomize_minitaur(self, minitaur, parameters):
     """Randomize various physical properties of minitaur.
 
     It randomizes the mass/inertia of the base, mass/inertia of the legs,
@@ -37,32 +150,20 @@ class MinitaurEnvRandomizer(env_randomizer_base.EnvRandomizerBase):
 
     Args:
       minitaur: the Minitaur instance in minitaur_gym_env environment.
+      parameters: One record of PARAMETER_DTYPE.
     """
-    base_mass = minitaur.GetBaseMassFromURDF()
-    randomized_base_mass = random.uniform(
-        base_mass * (1.0 + self._minitaur_base_mass_err_range[0]),
-        base_mass * (1.0 + self._minitaur_base_mass_err_range[1]))
-    minitaur.SetBaseMass(randomized_base_mass)
-
-    leg_masses = minitaur.GetLegMassesFromURDF()
-    leg_masses_lower_bound = np.array(leg_masses) * (
-        1.0 + self._minitaur_leg_mass_err_range[0])
-    leg_masses_upper_bound = np.array(leg_masses) * (
-        1.0 + self._minitaur_leg_mass_err_range[1])
-    randomized_leg_masses = [
-        np.random.uniform(leg_masses_lower_bound[i], leg_masses_upper_bound[i])
-        for i in range(len(leg_masses))
-    ]
-    minitaur.SetLegMasses(randomized_leg_masses)
-
-    randomized_battery_voltage = random.uniform(BATTERY_VOLTAGE_RANGE[0],
-                                                BATTERY_VOLTAGE_RANGE[1])
-    minitaur.SetBatteryVoltage(randomized_battery_voltage)
-
-    randomized_motor_damping = random.uniform(MOTOR_VISCOUS_DAMPING_RANGE[0],
-                                              MOTOR_VISCOUS_DAMPING_RANGE[1])
-    minitaur.SetMotorViscousDamping(randomized_motor_damping)
-
-    randomized_foot_friction = random.uniform(MINITAUR_LEG_FRICTION[0],
-                                              MINITAUR_LEG_FRICTION[1])
-    minitaur.SetFootFriction(randomized_foot_friction)
+    minitaur.SetBaseMass(minitaur.GetBaseMassFromURDF() *
+                         (1.0 + float(parameters["base_mass_error"])))
+    minitaur.SetLegMasses(
+        np.array(minitaur.GetLegMassesFromURDF()) *
+        (1.0 + parameters["leg_mass_errors"].astype(np.float64)))
+    minitaur.SetBatteryVoltage(float(parameters["battery_voltage"]))
+    minitaur.SetMotorViscousDamping(float(parameters["motor_viscous_damping"]))
+    minitaur.SetFootFriction(float(parameters["foot_friction"]))
+    self._record(parameters)
+
+  def _record(self, parameters):
+    # A ring buffer, so that long runs do not grow the memory.
+    if len(self._history):
+      self._history[self._history_size % len(self._history)] = parameters
+    self._history_size += 1
@@ -19,7 +19,9 @@ from . import bullet_client
 from . import minitaur
 import os
 import pybullet_data
+from . import env_randomizer_base
 from . import minitaur_env_randomizer
+from . import minitaur_state_pool
 from pkg_resources import parse_version
 
 NUM_SUBSTEPS = 5
@@ -32,6 +34,8 @@ ACTION_EPS = 0.01
 OBSERVATION_EPS = 0.01
 RENDER_HEIGHT = 720
 RENDER_WIDTH = 960
+# Default of env_randomizer: a MinitaurEnvRandomizer of the env itself.
+_DEFAULT_RANDOMIZER = object()
 
 class MinitaurBulletEnv(gym.Env):
   """The gym environment for the minitaur.
@@ -70,7 +74,12 @@ class MinitaurBulletEnv(gym.Env):
                on_rack=False,
                render=False,
                kd_for_pd_controllers=0.3,
-               env_randomizer=minitaur_env_randomizer.MinitaurEnvRandomizer()):
+               env_randomizer=_DEFAULT_RANDOMIZER,
+               initial_state_pool_size=0,
+               initial_state_pool_max_uses=10,
+               initial_state_pool_dir=None,
+               motor_control_substeps=1,
+               terrain=None):
     """Initialize the minitaur gym environment.
 
     Args:
@@ -98,14 +107,41 @@ class MinitaurBulletEnv(gym.Env):
         details.
       hard_reset: Whether to wipe the simulation and load everything when reset
         is called. If set to false, reset just place the minitaur back to start
-        position and set its pose to initial configuration.
+        position and set its pose to initial configuration, after applying the
+        changes made with reconfigure_world() to the live world.
       on_rack: Whether to place the minitaur on rack. This is only used to debug
         the walking gait. In this mode, the minitaur's base is hanged midair so
         that its walking gait is clearer to visualize.
       render: Whether to render the simulation.
       kd_for_pd_controllers: kd value for the pd controllers of the motors
       env_randomizer: An EnvRandomizer to randomize the physical properties
-        during reset().
+        during reset(), or a callable that creates one for this env, or None
+        to disable the randomization. Defaults to a MinitaurEnvRandomizer of
+        this env. Randomizers hold sampling state, so pass a factory rather
+        than an instance to share a setting between envs.
+      initial_state_pool_size: The number of settled initial states to keep.
+        If positive, reset() restores one of them instead of stepping the
+        simulation until the minitaur has settled. The env_randomizer is still
+        applied after the restore. While the pool is enabled, the world is only
+        rebuilt to free evicted states, regardless of hard_reset. Zero disables
+        the pool.
+      initial_state_pool_max_uses: The number of resets after which a settled
+        state is replaced by a new one.
+      initial_state_pool_dir: If set, the settled states are saved as .bullet
+        files in this directory and reused by all envs with the same urdf_root
+        and seed, instead of being kept in the memory of the physics server.
+      motor_control_substeps: The number of simulation steps per update of the
+        motor model or PD controller. If larger than one, pybullet advances
+        that many substeps (numSubSteps) per stepSimulation call while the
+        motor commands are held, so the Python loop of step() runs that many
+        times less often. The policy still acts at the rate set by
+        action_repeat, which has to be a multiple of it.
+      terrain: A pybullet_envs.terrain.Terrain to load as the ground instead
+        of plane.urdf. None for the flat plane.
+
+    Raises:
+      ValueError: If the action repeat is not a multiple of
+        motor_control_substeps.
     """
     self._time_step = 0.01
     self._action_repeat = action_repeat
@@ -136,21 +172,45 @@ class MinitaurBulletEnv(gym.Env):
     self._cam_yaw = 0
     self._cam_pitch = -30
     self._hard_reset = True
+    self._ground_id = -1
+    self._terrain = terrain
+    self._loaded_terrain = None
     self._kd_for_pd_controllers = kd_for_pd_controllers
     self._last_frame_time = 0.0
     print("urdf_root=" + self._urdf_root)
+    if env_randomizer is _DEFAULT_RANDOMIZER:
+      env_randomizer = minitaur_env_randomizer.MinitaurEnvRandomizer()
+    elif env_randomizer is not None and not isinstance(
+        env_randomizer, env_randomizer_base.EnvRandomizerBase):
+      env_randomizer = env_randomizer()
     self._env_randomizer = env_randomizer
     # PD control needs smaller time step for stability.
     if pd_control_enabled or accurate_motor_model_enabled:
       self._time_step /= NUM_SUBSTEPS
       self._num_bullet_solver_iterations /= NUM_SUBSTEPS
       self._action_repeat *= NUM_SUBSTEPS
+    if (motor_control_substeps < 1 or
+        self._action_repeat % motor_control_substeps != 0):
+      raise ValueError(
+          "The action repeat {} is not a multiple of motor_control_substeps "
+          "{}.".format(self._action_repeat, motor_control_substeps))
+    self._motor_control_substeps = motor_control_substeps
+    self._control_time_step = self._time_step * motor_control_substeps
+    self._num_control_steps = self._action_repeat // motor_control_substeps
 
     if self._is_render:
       self._pybullet_client = bullet_client.BulletClient(
           connection_mode=pybullet.GUI)
     else:
       self._pybullet_client = bullet_client.BulletClient()
+    self.minitaur = None
+    self._initial_state_pool = None
+    if initial_state_pool_size > 0:
+      self._initial_state_pool = minitaur_state_pool.InitialStatePool(
+          self._pybullet_client,
+          max_size=initial_state_pool_size,
+          max_uses=initial_state_pool_max_uses,
+          directory=initial_state_pool_dir)
 
     self._seed()
     self.reset()
@@ -168,23 +228,78 @@ class MinitaurBulletEnv(gym.Env):
   def set_env_randomizer(self, env_randomizer):
     self._env_randomizer = env_randomizer
 
+  def set_terrain(self, terrain):
+    """Replace the ground at the next reset(), see reconfigure_world().
+
+    Args:
+      terrain: A pybullet_envs.terrain.Terrain, or None for the flat plane.
+    """
+    self._terrain = terrain
+
   def configure(self, args):
     self._args = args
 
+  def reconfigure_world(self, self_collision_enabled=None, on_rack=None):
+    """Change the configuration of the world, effective at the next reset().
+
+    A hard reset rebuilds the world with the new configuration. Otherwise only
+    what changed is updated in the live world: the rack constraint is added or
+    removed, only the minitaur is reloaded if self collision changed and only
+    the ground if set_terrain() changed it. The other bodies are kept.
+
+    Args:
+      self_collision_enabled: Whether to enable self collision, None to keep
+        the current setting.
+      on_rack: Whether to place the minitaur on rack, None to keep the current
+        setting.
+    """
+    if self_collision_enabled is not None:
+      self._self_collision_enabled = self_collision_enabled
+    if on_rack is not None:
+      self._on_rack = on_rack
+
+  def _update_world(self):
+    """Apply the configuration to the live world, see reconfigure_world()."""
+    if self._terrain is not self._loaded_terrain:
+      self._pybullet_client.removeBody(self._ground_id)
+      self._load_ground()
+    self.minitaur.SetSelfCollisionEnabled(self._self_collision_enabled)
+    self.minitaur.SetOnRack(self._on_rack)
+
   def _reset(self):
-    if self._hard_reset:
+    pool = self._initial_state_pool
+    snapshot = None
+    if pool is None:
+      rebuild = self._hard_reset
+    else:
+      # The settled states are only valid in the world they were saved in, so
+      # the world is only rebuilt to free the states the pool has evicted.
+      pool.set_key(self._state_pool_key())
+      rebuild = self.minitaur is None or pool.needs_rebuild()
+      if rebuild:
+        pool.on_reset_simulation()
+    if not rebuild:
+      self._update_world()
+      if pool is not None and pool.is_full():
+        snapshot = pool.restore(self.np_random)
+
+    if rebuild:
       self._pybullet_client.resetSimulation()
       self._pybullet_client.setPhysicsEngineParameter(
           numSolverIterations=int(self._num_bullet_solver_iterations))
-      self._pybullet_client.setTimeStep(self._time_step)
-      self._pybullet_client.loadURDF("%s/plane.urdf" % self._urdf_root)
+      if self._motor_control_substeps > 1:
+        self._pybullet_client.setPhysicsEngineParameter(
+            numSubSteps=self._motor_control_substeps)
+      self._pybullet_client.setTimeStep(self._control_time_step)
+      self._load_ground()
       self._pybullet_client.setGravity(0, 0, -10)
+      self._build_scene()
       acc_motor = self._accurate_motor_model_enabled
       motor_protect = self._motor_overheat_protection
       self.minitaur = (minitaur.Minitaur(
           pybullet_client=self._pybullet_client,
           urdf_root=self._urdf_root,
-          time_step=self._time_step,
+          time_step=self._control_time_step,
           self_collision_enabled=self._self_collision_enabled,
           motor_velocity_limit=self._motor_velocity_limit,
           pd_control_enabled=self._pd_control_enabled,
@@ -195,8 +310,11 @@ class MinitaurBulletEnv(gym.Env):
           motor_overheat_protection=motor_protect,
           on_rack=self._on_rack,
           kd_for_pd_controllers=self._kd_for_pd_controllers))
+    elif snapshot is not None:
+      self.minitaur.ResetMotorState(snapshot.observed_motor_torques)
     else:
       self.minitaur.Reset(reload_urdf=False)
+      self._reset_scene()
 
     if self._env_randomizer is not None:
       self._env_randomizer.randomize_env(self)
@@ -206,15 +324,52 @@ class MinitaurBulletEnv(gym.Env):
     self._objectives = []
     self._pybullet_client.resetDebugVisualizerCamera(
         self._cam_dist, self._cam_yaw, self._cam_pitch, [0, 0, 0])
-    if not self._torque_control_enabled:
-      for _ in range(100):
-        if self._pd_control_enabled or self._accurate_motor_model_enabled:
-          self.minitaur.ApplyAction([math.pi / 2] * 8)
-        self._pybullet_client.stepSimulation()
+    if snapshot is None:
+      if not self._torque_control_enabled:
+        for _ in range(-(-100 // self._motor_control_substeps)):
+          if self._pd_control_enabled or self._accurate_motor_model_enabled:
+            self.minitaur.ApplyAction([math.pi / 2] * 8)
+          self._pybullet_client.stepSimulation()
+          self.minitaur.ReceiveObservation()
+      if pool is not None:
+        pool.add(self.minitaur.GetMotorTorques())
     return self._noisy_observation()
 
+  def _load_ground(self):
+    if self._terrain is None:
+      self._ground_id = self._pybullet_client.loadURDF(
+          "%s/plane.urdf" % self._urdf_root)
+    else:
+      self._ground_id = self._terrain.load(self._pybullet_client)
+    self._loaded_terrain = self._terrain
+
+  def _state_pool_key(self):
+    """The key of the world that the initial state pool saves states of."""
+    terrain_key = None if self._terrain is None else self._terrain.key
+    return (self._urdf_root, self._self_collision_enabled, self._on_rack,
+            self._np_random_seed, terrain_key)
+
+  def _build_scene(self):
+    """Load the bodies other than the ground and the minitaur.
+
+    Called after the simulation was reset and the ground was loaded. Subclasses
+    override it to add objects to the scene. Their state is settled, saved and
+    restored together with the minitaur.
+    """
+    pass
+
+  def _reset_scene(self):
+    """Move the bodies added by _build_scene() back to their start poses.
+
+    Called on a soft reset, after the minitaur was placed back. A reset that
+    restores a settled state from the initial state pool restores these bodies
+    as well.
+    """
+    pass
+
   def _seed(self, seed=None):
     self.np_random, seed = seeding.np_random(seed)
+    self._np_random_seed = seed
     return [seed]
 
   def _transform_action_to_motor_command(self, action):
@@ -255,9 +410,10 @@ class MinitaurBulletEnv(gym.Env):
       self._pybullet_client.resetDebugVisualizerCamera(
           self._cam_dist, self._cam_yaw, self._cam_pitch, base_pos)
     action = self._transform_action_to_motor_command(action)
-    for _ in range(self._action_repeat):
+    for _ in range(self._num_control_steps):
       self.minitaur.ApplyAction(action)
       self._pybullet_client.stepSimulation()
+      self.minitaur.ReceiveObservation()
 
     self._env_step_counter += 1
     reward = self._reward()
@@ -366,14 +522,14 @@ class MinitaurBulletEnv(gym.Env):
     return self._objectives
 
   def _get_observation(self):
-    self._observation = self.minitaur.GetObservation()
+    self._observation = self.minitaur.GetObservationView()
     return self._observation
 
   def _noisy_observation(self):
     self._get_observation()
     observation = np.array(self._observation)
     if self._observation_noise_stdev > 0:
-      observation += (np.random.normal(
+      observation += (self.np_random.normal(
           scale=self._observation_noise_stdev, size=observation.shape) *
                       self.minitaur.GetObservationUpperBound())
     return observation
@@ -0,0 +1,160 @@
+"""A pool of settled initial states for the minitaur_gym_env."""
+import hashlib
+import os
+import numpy as np
+
+
+class _Snapshot(object):
+  """One settled state of the simulation.
+
+  The physics state lives either in the memory of the physics server (state_id)
+  or in a .bullet file (file_name). The motor torques are bookkept in python by
+  the minitaur, so they are stored next to the physics state.
+  """
+
+  def __init__(self, observed_motor_torques, state_id=-1, file_name=None):
+    self.observed_motor_torques = np.array(observed_motor_torques)
+    self.state_id = state_id
+    self.file_name = file_name
+    self.uses = 0
+
+
+class InitialStatePool(object):
+  """Settled initial states that can be restored instead of settling again.
+
+  A reset of the minitaur_gym_env steps the simulation 100 times to let the
+  robot settle on the ground. The pool keeps up to max_size of those settled
+  states and restores a random one instead. A snapshot is evicted after it has
+  been restored max_uses times, so that the pool keeps being refilled with new
+  settled states and the initial states stay diverse.
+
+  The states are only valid for the world they were saved in, so the pool is
+  keyed (e.g. by urdf root and randomizer seed) and cleared when the key
+  changes. The in-memory states of the physics server can only be freed by
+  resetSimulation, so needs_rebuild() tells the env when to rebuild the world.
+  With a directory, the states are saved to .bullet files instead. Those
+  survive resetSimulation and are shared by all envs that use the same key.
+  """
+
+  def __init__(self, pybullet_client, max_size, max_uses=10, directory=None):
+    """Constructs an empty pool.
+
+    Args:
+      pybullet_client: The instance of BulletClient that owns the states.
+      max_size: The maximum number of snapshots in the pool.
+      max_uses: The number of restores after which a snapshot is evicted.
+      directory: If set, save the states to .bullet files in this directory
+        instead of the memory of the physics server.
+    """
+    if max_size < 1:
+      raise ValueError("The pool needs a max_size of at least 1.")
+    self._pybullet_client = pybullet_client
+    self._max_size = max_size
+    self._max_uses = max_uses
+    self._directory = directory
+    self._key = None
+    self._prefix = None
+    self._snapshots = []
+    self._num_server_states = 0
+    self._file_counter = 0
+
+  def __len__(self):
+    return len(self._snapshots)
+
+  def set_key(self, key):
+    """Clear the pool unless the states were saved under the same key.
+
+    Args:
+      key: A tuple that identifies the world the states belong to.
+    """
+    if key == self._key:
+      return
+    self._key = key
+    self._snapshots = []
+    if self._directory is not None:
+      digest = hashlib.sha1(repr(key).encode("utf-8")).hexdigest()[:16]
+      self._prefix = os.path.join(self._directory, "minitaur_%s_" % digest)
+      self._load_files()
+
+  def is_full(self):
+    return len(self._snapshots) >= self._max_size
+
+  def needs_rebuild(self):
+    """Whether the evicted in-memory states should be freed by a rebuild."""
+    return self._num_server_states >= 2 * self._max_size
+
+  def on_reset_simulation(self):
+    """Forget the in-memory states, resetSimulation has deleted them."""
+    self._num_server_states = 0
+    if self._directory is None:
+      self._snapshots = []
+
+  def add(self, observed_motor_torques):
+    """Save the current state of the simulation into the pool."""
+    if self.is_full():
+      return
+    if self._directory is None:
+      snapshot = _Snapshot(observed_motor_torques,
+                           state_id=self._pybullet_client.saveState())
+      self._num_server_states += 1
+    else:
+      file_name = self._new_file_name()
+      self._pybullet_client.saveBullet(file_name + ".bullet")
+      np.save(file_name + ".npy", np.asarray(observed_motor_torques))
+      snapshot = _Snapshot(observed_motor_torques, file_name=file_name)
+    self._snapshots.append(snapshot)
+
+  def restore(self, np_random):
+    """Restore a randomly chosen snapshot into the simulation.
+
+    Args:
+      np_random: The random number generator of the env.
+
+    Returns:
+      The restored snapshot, or None if the pool is empty.
+    """
+    if not self._snapshots:
+      return None
+    index = np_random.randint(len(self._snapshots))
+    snapshot = self._snapshots[index]
+    if snapshot.file_name is None:
+      self._pybullet_client.restoreState(stateId=snapshot.state_id)
+    else:
+      self._pybullet_client.restoreState(fileName=snapshot.file_name + ".bullet")
+    snapshot.uses += 1
+    if snapshot.uses >= self._max_uses:
+      self._evict(index)
+    return snapshot
+
+  def _evict(self, index):
+    snapshot = self._snapshots.pop(index)
+    if snapshot.file_name is not None:
+      for extension in (".bullet", ".npy"):
+        try:
+          os.remove(snapshot.file_name + extension)
+        except OSError:
+          pass  # Another env sharing the directory evicted it already.
+
+  def _new_file_name(self):
+    while True:
+      file_name = "%s%d_%d" % (self._prefix, os.getpid(), self._file_counter)
+      self._file_counter += 1
+      if not os.path.exists(file_name + ".bullet"):
+        return file_name
+
+  def _load_files(self):
+    if not os.path.isdir(self._directory):
+      os.makedirs(self._directory)
+    directory, prefix = os.path.split(self._prefix)
+    for name in sorted(os.listdir(directory)):
+      if self.is_full():
+        break
+      if not (name.startswith(prefix) and name.endswith(".bullet")):
+        continue
+      file_name = os.path.join(directory, name[:-len(".bullet")])
+      try:
+        observed_motor_torques = np.load(file_name + ".npy")
+      except IOError:
+        continue  # Still being written, or evicted by another env.
+      self._snapshots.append(
+          _Snapshot(observed_motor_torques, file_name=file_name))
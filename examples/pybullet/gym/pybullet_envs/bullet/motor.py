@@ -9,6 +9,9 @@ MOTOR_TORQUE_CONSTANT = 0.0954
 MOTOR_VISCOUS_DAMPING = 0
 MOTOR_SPEED_LIMIT = MOTOR_VOLTAGE / (MOTOR_VISCOUS_DAMPING
                                      + MOTOR_TORQUE_CONSTANT)
+# Empirical current (A) to torque (N*m) relation of the motor.
+CURRENT_TABLE = [0, 10, 20, 30, 40, 50, 60]
+TORQUE_TABLE = [0, 1, 1.9, 2.45, 3.0, 3.25, 3.5]
 
 
 class MotorModel(object):
@@ -35,8 +38,8 @@ class MotorModel(object):
     self._voltage = MOTOR_VOLTAGE
     self._torque_constant = MOTOR_TORQUE_CONSTANT
     self._viscous_damping = MOTOR_VISCOUS_DAMPING
-    self._current_table = [0, 10, 20, 30, 40, 50, 60]
-    self._torque_table = [0, 1, 1.9, 2.45, 3.0, 3.25, 3.5]
+    self._current_table = list(CURRENT_TABLE)
+    self._torque_table = list(TORQUE_TABLE)
 
   def set_voltage(self, voltage):
     self._voltage = voltage
@@ -99,3 +102,99 @@ class MotorModel(object):
                               self._torque_table)
     actual_torque = np.multiply(current_sign, actual_torque)
     return actual_torque, observed_torque
+
+
+class BatchMotorModel(object):
+  """The accurate motor model of MotorModel, for the motors of many robots.
+
+  All inputs and outputs have the shape (num_robots, num_motors), and the
+  battery voltage and the viscous damping are per robot arrays, so the torques
+  of all robots are computed in one pass of numpy operations. The current-torque
+  profile is precomputed as one slope and offset per segment of the equally
+  spaced current table, which replaces the np.interp call of MotorModel.
+  """
+
+  def __init__(self,
+               num_robots,
+               torque_control_enabled=False,
+               kp=1.2,
+               kd=0):
+    self._num_robots = num_robots
+    self._torque_control_enabled = torque_control_enabled
+    self._kp = kp
+    self._kd = kd
+    self._resistance = MOTOR_RESISTANCE
+    self._torque_constant = MOTOR_TORQUE_CONSTANT
+    self._voltage = np.full(num_robots, MOTOR_VOLTAGE)
+    self._viscous_damping = np.full(num_robots, float(MOTOR_VISCOUS_DAMPING))
+    current_table = np.asarray(CURRENT_TABLE, dtype=np.float64)
+    torque_table = np.asarray(TORQUE_TABLE, dtype=np.float64)
+    current_steps = np.diff(current_table)
+    if not np.allclose(current_steps, current_steps[0]):
+      raise ValueError("The current table needs to be equally spaced.")
+    # Segment i covers current_table[i] <= current < current_table[i + 1].
+    self._current_step = current_steps[0]
+    self._num_segments = len(current_steps)
+    self._slopes = np.diff(torque_table) / current_steps
+    self._offsets = torque_table[:-1] - self._slopes * current_table[:-1]
+    self._max_torque = torque_table[-1]
+
+  def set_voltage(self, voltage):
+    """Set the battery voltage, a scalar or an array with one per robot."""
+    self._voltage[:] = voltage
+
+  def get_voltage(self):
+    return self._voltage
+
+  def set_viscous_damping(self, viscous_damping):
+    """Set the viscous damping, a scalar or an array with one per robot."""
+    self._viscous_damping[:] = viscous_damping
+
+  def get_viscous_dampling(self):
+    return self._viscous_damping
+
+  def convert_to_torque(self, motor_commands, current_motor_angle,
+                        current_motor_velocity):
+    """Convert the commands (position control or torque control) to torque.
+
+    Args:
+      motor_commands: The desired motor angles if the motors are in position
+        control mode. The pwm signals if the motors are in torque control mode.
+        Shape (num_robots, num_motors).
+      current_motor_angle: The motor angles at the current time step.
+      current_motor_velocity: The motor velocities at the current time step.
+    Returns:
+      actual_torque: The torques that need to be applied to the motors.
+      observed_torque: The torques observed by the sensors.
+    """
+    if self._torque_control_enabled:
+      pwm = np.asarray(motor_commands, dtype=np.float64)
+    else:
+      pwm = (-self._kp * (current_motor_angle - motor_commands)
+             - self._kd * current_motor_velocity)
+    pwm = np.clip(pwm, -1.0, 1.0)
+    voltage = self._voltage[:, np.newaxis]
+    viscous_damping = self._viscous_damping[:, np.newaxis]
+
+    observed_torque = np.clip(
+        self._torque_constant * (pwm * voltage / self._resistance),
+        -OBSERVED_TORQUE_LIMIT, OBSERVED_TORQUE_LIMIT)
+
+    # Net voltage is clipped at 50V by diodes on the motor controller.
+    voltage_net = np.clip(pwm * voltage -
+                          (self._torque_constant + viscous_damping)
+                          * current_motor_velocity,
+                          -VOLTAGE_CLIPPING, VOLTAGE_CLIPPING)
+    current = voltage_net / self._resistance
+    current_magnitude = np.absolute(current)
+
+    # Saturate torque based on empirical current relation. The torque table
+    # increases monotonically, so currents beyond the table are saturated by
+    # clamping the extrapolated last segment.
+    segment = np.minimum((current_magnitude / self._current_step).astype(int),
+                         self._num_segments - 1)
+    actual_torque = np.minimum(
+        self._offsets[segment] + self._slopes[segment] * current_magnitude,
+        self._max_torque)
+    actual_torque *= np.sign(current)
+    return actual_torque, observed_torque
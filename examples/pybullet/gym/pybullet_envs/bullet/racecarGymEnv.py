@@ -11,7 +11,6 @@ import numpy as np
 import time
 import pybullet
 from . import racecar
-import random
 from . import bullet_client
 import pybullet_data
 from pkg_resources import parse_version
@@ -76,8 +75,8 @@ class RacecarGymEnv(gym.Env):
     #	newpos = [pos[0],pos[1],pos[2]-0.1]
     #	self._p.resetBasePositionAndOrientation(i,newpos,orn)
 
-    dist = 5 +2.*random.random()
-    ang = 2.*3.1415925438*random.random()
+    dist = 5 +2.*self.np_random.uniform()
+    ang = 2.*3.1415925438*self.np_random.uniform()
 
     ballx = dist * math.sin(ang)
     bally = dist * math.cos(ang)
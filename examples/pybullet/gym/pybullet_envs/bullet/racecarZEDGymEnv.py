@@ -12,7 +12,6 @@ import time
 import pybullet
 from . import bullet_client
 from . import racecar
-import random
 import pybullet_data
 from pkg_resources import parse_version
 
@@ -79,8 +78,8 @@ class RacecarZEDGymEnv(gym.Env):
       newpos = [pos[0],pos[1],pos[2]+0.1]
       self._p.resetBasePositionAndOrientation(i,newpos,orn)
 
-    dist = 5 +2.*random.random()
-    ang = 2.*3.1415925438*random.random()
+    dist = 5 +2.*self.np_random.uniform()
+    ang = 2.*3.1415925438*self.np_random.uniform()
 
     ballx = dist * math.sin(ang)
     bally = dist * math.cos(ang)
@@ -11,7 +11,6 @@ import numpy as np
 import time
 import pybullet as p
 from . import simpleHumanoid
-import random
 from pkg_resources import parse_version
 
 import pybullet_data
@@ -58,8 +57,8 @@ class SimpleHumanoidGymEnv(gym.Env):
     p.setTimeStep(self._timeStep)
     p.loadURDF(os.path.join(self._urdfRoot,"plane.urdf"))
 
-    dist = 5 +2.*random.random()
-    ang = 2.*3.1415925438*random.random()
+    dist = 5 +2.*self.np_random.uniform()
+    ang = 2.*3.1415925438*self.np_random.uniform()
 
     ballx = dist * math.sin(ang)
     bally = dist * math.cos(ang)
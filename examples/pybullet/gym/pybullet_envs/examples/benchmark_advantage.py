@@ -0,0 +1,74 @@
+import os
+import inspect
+currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parentdir = os.path.dirname(os.path.dirname(currentdir))
+os.sys.path.insert(0,parentdir)
+import argparse
+import time
+import numpy as np
+import tensorflow as tf
+from pybullet_envs.agents.ppo import advantage
+from pybullet_envs.agents.ppo import utility
+
+
+def episodes(args):
+	"""Random rewards and values of args.batch episodes, zero after the end of each."""
+	rng = np.random.RandomState(args.seed)
+	length = rng.randint(args.max_length // 2, args.max_length + 1, args.batch).astype(np.int32)
+	length[0] = args.max_length
+	mask = np.arange(args.max_length)[None, :] < length[:, None]
+	reward = (rng.normal(size=(args.batch, args.max_length)) * mask).astype(np.float32)
+	value = (rng.normal(size=(args.batch, args.max_length)) * mask).astype(np.float32)
+	return reward, value, length
+
+
+def timed(func, repeats):
+	"""Result of func and its mean duration in milliseconds."""
+	result = func()
+	start = time.time()
+	for _ in range(repeats):
+		func()
+	return result, 1000.0 * (time.time() - start) / repeats
+
+
+def main():
+	parser = argparse.ArgumentParser(formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+	parser.add_argument('--batch', help='Number of episodes', type=int, default=30)
+	parser.add_argument('--max_length', help='Padded length of the episodes', type=int, default=1000)
+	parser.add_argument('--discount', type=float, default=0.995)
+	parser.add_argument('--lambda_', type=float, default=0.95)
+	parser.add_argument('--repeats', type=int, default=20)
+	parser.add_argument('--seed', type=int, default=0)
+	parser.add_argument('--no_scipy', help='Use the discount matrix even if SciPy is available', type=int, default=0)
+	args = parser.parse_args()
+	if args.no_scipy:
+		advantage.signal = None
+	reward, value, length = episodes(args)
+	kernels = [
+		("discounted_return",
+			lambda r, v, l: utility.discounted_return(r, l, args.discount),
+			lambda: advantage.discounted_return(reward, length, args.discount)),
+		("lambda_return",
+			lambda r, v, l: utility.lambda_return(r, v, l, args.discount, args.lambda_),
+			lambda: advantage.lambda_return(reward, value, length, args.discount, args.lambda_)),
+		("lambda_advantage",
+			lambda r, v, l: utility.lambda_advantage(r, v, l, args.discount),
+			lambda: advantage.lambda_advantage(reward, value, length, args.discount)),
+	]
+	reward_ph = tf.placeholder(tf.float32, (None, args.max_length))
+	value_ph = tf.placeholder(tf.float32, (None, args.max_length))
+	length_ph = tf.placeholder(tf.int32, (None,))
+	feed = {reward_ph: reward, value_ph: value, length_ph: length}
+	method = "lfilter" if advantage.signal is not None else "matrix"
+	print("batch %d, max_length %d, NumPy method: %s" % (args.batch, args.max_length, method))
+	print("%-20s %14s %14s %10s %12s" % ("kernel", "tf.scan (ms)", "NumPy (ms)", "speedup", "max error"))
+	with tf.Session() as sess:
+		for name, in_graph, host in kernels:
+			op = in_graph(reward_ph, value_ph, length_ph)
+			expected, graph_ms = timed(lambda: sess.run(op, feed), args.repeats)
+			result, host_ms = timed(host, args.repeats)
+			error = np.abs(result - expected).max()
+			print("%-20s %14.3f %14.3f %9.2fx %12.2e" % (name, graph_ms, host_ms, graph_ms / host_ms, error))
+
+if __name__ == '__main__':
+	main()
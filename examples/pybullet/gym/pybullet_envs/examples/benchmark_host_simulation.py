@@ -0,0 +1,78 @@
+import os
+import inspect
+currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parentdir = os.path.dirname(os.path.dirname(currentdir))
+os.sys.path.insert(0,parentdir)
+import argparse
+import time
+import tensorflow as tf
+from pybullet_envs.agents import configs
+from pybullet_envs.agents import tools
+from pybullet_envs.agents import train_ppo
+from pybullet_envs.agents import utility
+
+
+def in_graph_rate(config, args):
+	"""Steps/sec of tools.simulate, one session run per step of all agents."""
+	tf.reset_default_graph()
+	batch_env = utility.define_batch_env(
+		lambda: train_ppo._create_environment(config),
+		config.num_agents, args.env_processes)
+	graph = utility.define_simulation_graph(batch_env, config.algorithm, config)
+	feed = {graph.is_training: False, graph.should_log: False, graph.do_report: False, graph.force_reset: False}
+	with tf.Session() as sess:
+		sess.run(tf.global_variables_initializer())
+		feed[graph.force_reset] = True
+		sess.run(graph.done, feed)
+		feed[graph.force_reset] = False
+		start = time.time()
+		for _ in range(args.steps):
+			sess.run(graph.done, feed)
+		elapsed = time.time() - start
+	batch_env.close()
+	return args.steps * config.num_agents / elapsed
+
+
+def host_rate(config, args):
+	"""Steps/sec of tools.RolloutDriver, one session run per step of all agents for the policy only."""
+	tf.reset_default_graph()
+	batch_env = utility.define_host_batch_env(
+		lambda: train_ppo._create_environment(config),
+		config.num_agents, args.env_processes)
+	graph = utility.define_host_simulation_graph(batch_env, config.algorithm, config.host_algorithm, config)
+	feed = {graph.is_training: False, graph.should_log: False, graph.do_report: False, graph.force_reset: False}
+	with tf.Session() as sess:
+		sess.run(tf.global_variables_initializer())
+		graph.driver.run(sess, feed, 1, reset=True)
+		start = time.time()
+		steps = 0
+		while steps < args.steps:
+			chunk = min(args.chunk, args.steps - steps)
+			graph.driver.run(sess, feed, chunk)
+			steps += chunk
+		elapsed = time.time() - start
+	batch_env.close()
+	return args.steps * config.num_agents / elapsed
+
+
+def main():
+	parser = argparse.ArgumentParser(formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+	parser.add_argument('--configs', help='Agents configurations to compare', nargs='+', default=['pybullet_ant', 'pybullet_minitaur'])
+	parser.add_argument('--steps', help='Number of steps of every agent', type=int, default=2000)
+	parser.add_argument('--chunk', help='Steps of every agent per RolloutDriver.run call', type=int, default=100)
+	parser.add_argument('--num_agents', help='Number of agents, 0 to use the value of the configuration', type=int, default=0)
+	parser.add_argument('--env_processes', help='Step the environments in separate processes', type=int, default=1)
+	args = parser.parse_args()
+	print("%-20s %-10s %12s %12s" % ("config", "driver", "steps/sec", "speedup"))
+	for name in args.configs:
+		config = tools.AttrDict(getattr(configs, name)())
+		if args.num_agents:
+			with config.unlocked:
+				config.num_agents = args.num_agents
+		graph_rate = in_graph_rate(config, args)
+		rate = host_rate(config, args)
+		print("%-20s %-10s %12.1f %11.2fx" % (name, "in-graph", graph_rate, 1.0))
+		print("%-20s %-10s %12.1f %11.2fx" % (name, "host", rate, rate / graph_rate))
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,58 @@
+import os
+import inspect
+currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parentdir = os.path.dirname(os.path.dirname(currentdir))
+os.sys.path.insert(0,parentdir)
+import argparse
+import math
+import time
+import numpy as np
+from pybullet_envs.bullet import minitaur_gym_env
+
+
+def sine_gait(t, amplitude=0.1, speed=1):
+	"""Leg model action of the sine gait of minitaur_gym_env_example.SinePolicyExample, without steering."""
+	a1 = math.sin(t * speed) * amplitude
+	a2 = math.sin(t * speed + math.pi) * amplitude
+	return [a1, a2, a2, a1, a1, a2, a2, a1]
+
+
+def trajectory(substeps, args):
+	"""
+	Runs the sine gait with motor_control_substeps=substeps.
+	Returns the (steps, 3) base positions, the (steps, 8) motor angles and the steps/sec.
+	"""
+	env = minitaur_gym_env.MinitaurBulletEnv(
+		motor_control_substeps=substeps,
+		env_randomizer=None,
+		motor_overheat_protection=False)
+	env.seed(args.seed)
+	env.reset()
+	positions = np.zeros((args.steps, 3))
+	angles = np.zeros((args.steps, 8))
+	start = time.time()
+	for i in range(args.steps):
+		env.step(sine_gait(i * 0.01))
+		positions[i] = env.minitaur.GetBasePosition()
+		angles[i] = env.minitaur.GetMotorAngles()
+	elapsed = time.time() - start
+	env.close()
+	return positions, angles, args.steps / elapsed
+
+
+def main():
+	parser = argparse.ArgumentParser(formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+	parser.add_argument('--substeps', help='motor_control_substeps to compare, the first one is the reference', type=int, nargs='+', default=[1, 5])
+	parser.add_argument('--steps', help='Number of env steps per trajectory', type=int, default=1000)
+	parser.add_argument('--seed', help='Seed of the environment', type=int, default=0)
+	args = parser.parse_args()
+	ref_positions, ref_angles, ref_rate = trajectory(args.substeps[0], args)
+	print("%-10s %12s %16s %16s %12s" % ("substeps", "steps/sec", "speedup", "base err (m)", "angle err (rad)"))
+	for substeps in args.substeps:
+		positions, angles, rate = trajectory(substeps, args)
+		base_error = np.sqrt(np.mean(np.sum((positions - ref_positions)**2, axis=1)))
+		angle_error = np.sqrt(np.mean((angles - ref_angles)**2))
+		print("%-10d %12.1f %15.2fx %16.5f %12.5f" % (substeps, rate, rate / ref_rate, base_error, angle_error))
+
+if __name__ == '__main__':
+	main()
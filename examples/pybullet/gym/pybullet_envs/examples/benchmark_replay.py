@@ -0,0 +1,68 @@
+import os
+import inspect
+currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parentdir = os.path.dirname(os.path.dirname(currentdir))
+os.sys.path.insert(0,parentdir)
+import argparse
+import hashlib
+import multiprocessing
+import time
+import numpy as np
+
+
+def rollout(args):
+	"""
+	Seeded episode of env_id in a fresh process, with actions drawn from their own seeded RandomState.
+	Returns the sha1 of all observations, rewards and done flags, the number of steps and the elapsed time.
+	"""
+	env_id, seed, steps = args
+	import pybullet_envs
+	import gym
+	env = gym.make(env_id)
+	env.seed(seed)
+	actions = np.random.RandomState(seed)
+	digest = hashlib.sha1()
+	start = time.time()
+	obs = env.reset()
+	digest.update(np.asarray(obs, dtype=np.float64).tobytes())
+	for i in range(steps):
+		low, high = env.action_space.low, env.action_space.high
+		obs, reward, done, _ = env.step(actions.uniform(low, high))
+		digest.update(np.asarray(obs, dtype=np.float64).tobytes())
+		digest.update(np.asarray([reward, done], dtype=np.float64).tobytes())
+		if done:
+			obs = env.reset()
+			digest.update(np.asarray(obs, dtype=np.float64).tobytes())
+	elapsed = time.time() - start
+	env.close()
+	return digest.hexdigest(), steps, elapsed
+
+
+def verify(env_id, args):
+	pool = multiprocessing.Pool(args.processes, maxtasksperchild=1)
+	try:
+		results = pool.map(rollout, [(env_id, args.seed, args.steps)] * args.runs, chunksize=1)
+	finally:
+		pool.close()
+		pool.join()
+	digests = set(digest for digest, _, _ in results)
+	steps_per_sec = sum(steps for _, steps, _ in results) / sum(elapsed for _, _, elapsed in results)
+	status = "identical" if len(digests) == 1 else "DIFFERENT (%d distinct)" % len(digests)
+	print("%-36s %d runs %s  %s  %8.1f steps/sec" % (env_id, args.runs, status, results[0][0][:12], steps_per_sec))
+	return len(digests) == 1
+
+
+def main():
+	parser = argparse.ArgumentParser(formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+	parser.add_argument('--env', help='environment IDs', nargs='+', default=['MinitaurBulletEnv-v0', 'AntBulletEnv-v0', 'KukaBulletEnv-v0'])
+	parser.add_argument('--runs', help='Number of runs to compare, each in a fresh process', type=int, default=3)
+	parser.add_argument('--processes', help='Number of runs in parallel', type=int, default=1)
+	parser.add_argument('--steps', help='Number of steps per run', type=int, default=500)
+	parser.add_argument('--seed', help='Seed of the environments and actions', type=int, default=0)
+	args = parser.parse_args()
+	ok = [verify(env_id, args) for env_id in args.env]
+	if not all(ok):
+		os.sys.exit(1)
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,51 @@
+import os
+import inspect
+currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parentdir = os.path.dirname(os.path.dirname(currentdir))
+os.sys.path.insert(0,parentdir)
+import pybullet_envs
+import gym
+import argparse
+import time
+
+
+def entry_point(spec):
+	return str(getattr(spec, 'entry_point', None) or getattr(spec, '_entry_point', ''))
+
+
+def registered_envs(pattern):
+	return sorted(spec.id for spec in gym.envs.registry.all()
+		if spec.id.find('Bullet')>=0 and entry_point(spec).find(pattern)>=0)
+
+
+def rate(count, func):
+	start = time.time()
+	for i in range(count):
+		func()
+	return count / (time.time() - start)
+
+
+def benchmark(env_id, args):
+	env = gym.make(env_id)
+	env.reset()  # the first reset loads the models and takes the snapshot
+	action = env.action_space.sample() * 0.0
+	resets_per_sec = rate(args.resets, env.reset)
+	steps_per_sec = rate(args.steps, lambda: env.step(action))
+	env.close()
+	print("%-40s %9.1f resets/sec %9.1f steps/sec  (reset = %.2f steps)" % (
+		env_id, resets_per_sec, steps_per_sec, steps_per_sec / resets_per_sec))
+
+
+def main():
+	parser = argparse.ArgumentParser(formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+	parser.add_argument('--env', help='environment ID, default: all registered envs matching --entry_point', default=None)
+	parser.add_argument('--entry_point', help='only benchmark envs whose entry point contains this', default='gym_locomotion_envs')
+	parser.add_argument('--resets', help='Number of resets to measure', type=int, default=200)
+	parser.add_argument('--steps', help='Number of steps to measure', type=int, default=200)
+	args = parser.parse_args()
+	env_ids = [args.env] if args.env else registered_envs(args.entry_point)
+	for env_id in env_ids:
+		benchmark(env_id, args)
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,107 @@
+import os
+import inspect
+currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parentdir = os.path.dirname(os.path.dirname(currentdir))
+os.sys.path.insert(0,parentdir)
+import pybullet_envs
+import gym
+import argparse
+import time
+import collections
+import pybullet as p
+
+
+class CallCounter:
+	"""
+	Counts pybullet client/server calls by patching the functions on the pybullet module.
+	The envs look up p.<function> at call time, so the patched versions are picked up.
+	"""
+	def __init__(self):
+		self.counts = collections.Counter()
+		self.originals = {}
+
+	def install(self):
+		for name in dir(p):
+			func = getattr(p, name)
+			if name.startswith("_") or not callable(func) or name in self.originals:
+				continue
+			self.originals[name] = func
+			setattr(p, name, self._wrap(name, func))
+
+	def uninstall(self):
+		for name, func in self.originals.items():
+			setattr(p, name, func)
+		self.originals = {}
+
+	def _wrap(self, name, func):
+		def counted(*args, **kwargs):
+			self.counts[name] += 1
+			return func(*args, **kwargs)
+		return counted
+
+	def reset(self):
+		self.counts.clear()
+
+
+def per_joint_reads(robot):
+	return [j.current_relative_position() for j in robot.ordered_joints]
+
+
+def batched_reads(robot):
+	return robot.joint_states()
+
+
+def per_part_pose_reads(robot):
+	return [part.state_fields_of_pose_of(part.bodies[part.bodyIndex], part.bodyPartIndex) for part in robot.parts.values()]
+
+
+def cached_pose_reads(robot):
+	robot.invalidate_cached_state()  # what a new simulation step does to the cache
+	return robot.parts_cache.positions()
+
+
+def measure(counter, steps, func):
+	counter.reset()
+	start = time.time()
+	for i in range(steps):
+		func()
+	elapsed = time.time() - start
+	calls = sum(counter.counts.values())
+	return float(calls) / steps, 1e6 * elapsed / steps, dict(counter.counts)
+
+
+def benchmark(args):
+	env = gym.make(args.env)
+	env.reset()
+	robot = env.env.robot
+	action = env.action_space.sample() * 0.0
+
+	counter = CallCounter()
+	counter.install()
+	try:
+		print("env=%s, %d ordered joints, %d parts" % (args.env, len(robot.ordered_joints), len(robot.parts)))
+		for label, func in [
+				("per-joint getJointState", lambda: per_joint_reads(robot)),
+				("batched getJointStates", lambda: batched_reads(robot)),
+				("per-part pose queries", lambda: per_part_pose_reads(robot)),
+				("BodyPartsCache refresh", lambda: cached_pose_reads(robot))]:
+			calls, usec, detail = measure(counter, args.steps, func)
+			print("%-26s %6.1f calls/read %9.1f usec/read  %s" % (label, calls, usec, detail))
+
+		calls, usec, detail = measure(counter, args.steps, lambda: env.step(action))
+		print("%-26s %6.1f calls/step %9.1f usec/step" % ("env.step", calls, usec))
+		for name, count in sorted(detail.items(), key=lambda x: -x[1]):
+			print("  %-32s %6.2f per step" % (name, float(count) / args.steps))
+	finally:
+		counter.uninstall()
+
+
+def main():
+	parser = argparse.ArgumentParser(formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+	parser.add_argument('--env', help='environment ID', default='HumanoidBulletEnv-v0')
+	parser.add_argument('--steps', help='Number of steps to measure', type=int, default=1000)
+	args = parser.parse_args()
+	benchmark(args)
+
+if __name__ == '__main__':
+	main()
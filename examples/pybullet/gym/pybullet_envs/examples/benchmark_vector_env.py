@@ -0,0 +1,43 @@
+import os
+import inspect
+currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parentdir = os.path.dirname(os.path.dirname(currentdir))
+os.sys.path.insert(0,parentdir)
+import pybullet_envs
+from pybullet_envs import gym_locomotion_envs
+import argparse
+import time
+import numpy as np
+
+
+def benchmark(args):
+	make_env = getattr(gym_locomotion_envs, args.env)
+	env = gym_locomotion_envs.VectorWalkerEnv(make_env, args.robots)
+	env.seed(args.seed)
+	env.reset()
+	rng = np.random.RandomState(args.seed)
+	start = time.time()
+	for i in range(args.steps):
+		actions = rng.uniform(-1, 1, size=(env.num_envs,) + env.action_space.shape)
+		obs, rewards, dones, _ = env.step(actions)
+		done_indices = np.nonzero(dones)[0]
+		if len(done_indices):
+			env.reset(done_indices)
+	elapsed = time.time() - start
+	samples = args.steps * env.num_envs
+	print("%s x %d robots: %d samples in %.2f s, %.0f samples/sec, %.0f steps/sec" % (
+		args.env, env.num_envs, samples, elapsed, samples / elapsed, args.steps / elapsed))
+	env.close()
+
+
+def main():
+	parser = argparse.ArgumentParser(formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+	parser.add_argument('--env', help='WalkerBaseBulletEnv class in gym_locomotion_envs', default='AntBulletEnv')
+	parser.add_argument('--robots', help='Number of robots in the world', type=int, default=64)
+	parser.add_argument('--steps', help='Number of vector steps', type=int, default=200)
+	parser.add_argument('--seed', help='RNG seed', type=int, default=0)
+	args = parser.parse_args()
+	benchmark(args)
+
+if __name__ == '__main__':
+	main()
@@ -1,23 +1,26 @@
-from .scene_stadium import SinglePlayerStadiumScene
+from .scene_stadium import SinglePlayerStadiumScene, MultiLaneStadiumScene
 from .env_bases import MJCFBaseBulletEnv
+from robot_bases import ContactSummary
 import numpy as np
 import pybullet as p
 from robot_locomotors import Hopper, Walker2D, HalfCheetah, Ant, Humanoid, HumanoidFlagrun, HumanoidFlagrunHarder
 
 
 class WalkerBaseBulletEnv(MJCFBaseBulletEnv):
-	def __init__(self, robot, render=False):
+	def __init__(self, robot, render=False, terrain=None):
 		print("WalkerBase::__init__ start")
 		MJCFBaseBulletEnv.__init__(self, robot, render)
+		self.terrain = terrain  # a terrain.Terrain as the ground instead of the stadium
 		
 		self.camera_x = 0
 		self.walk_target_x = 1e3  # kilometer away
 		self.walk_target_y = 0
 		self.stateId=-1
+		self.ground_ids = None
 		
 
 	def create_single_player_scene(self):
-		self.stadium_scene = SinglePlayerStadiumScene(gravity=9.8, timestep=0.0165/4, frame_skip=4)
+		self.stadium_scene = SinglePlayerStadiumScene(gravity=9.8, timestep=0.0165/4, frame_skip=4, terrain=self.terrain)
 		return self.stadium_scene
 
 	def _reset(self):
@@ -26,14 +29,16 @@ class WalkerBaseBulletEnv(MJCFBaseBulletEnv):
 			p.restoreState(self.stateId)
 		
 		r = MJCFBaseBulletEnv._reset(self)
-		p.configureDebugVisualizer(p.COV_ENABLE_RENDERING,0)
-
-		self.parts, self.jdict, self.ordered_joints, self.robot_body = self.robot.addToScene(
-			self.stadium_scene.ground_plane_mjcf)
-		self.ground_ids = set([(self.parts[f].bodies[self.parts[f].bodyIndex], self.parts[f].bodyPartIndex) for f in
-							   self.foot_ground_object_names])
-		p.configureDebugVisualizer(p.COV_ENABLE_RENDERING,1)
-		if (self.stateId<0):
+
+		if self.ground_ids is None: # the robot and ground bodies are never reloaded, so their parts only need to be found once
+			p.configureDebugVisualizer(p.COV_ENABLE_RENDERING,0)
+			self.parts, self.jdict, self.ordered_joints, self.robot_body = self.robot.addToScene(
+				self.stadium_scene.ground_plane_mjcf, self.stadium_scene.ground_plane_key)
+			self.ground_ids = set([(self.parts[f].bodies[self.parts[f].bodyIndex], self.parts[f].bodyPartIndex) for f in
+								   self.foot_ground_object_names])
+			self.feet_ground_contacts = ContactSummary(self.robot.feet, self.ground_ids)
+			p.configureDebugVisualizer(p.COV_ENABLE_RENDERING,1)
+		if (self.stateId<0 and not self.scene.multiplayer): # a multiplayer world is shared, it can't be restored for one robot
 			self.stateId=p.saveState()
 			#print("saving state self.stateId:",self.stateId)
 			
@@ -71,15 +76,9 @@ class WalkerBaseBulletEnv(MJCFBaseBulletEnv):
 		progress = float(self.potential - potential_old)
 
 		feet_collision_cost = 0.0
-		for i,f in enumerate(self.robot.feet): # TODO: Maybe calculating feet contacts could be done within the robot code
-			contact_ids = set((x[2], x[4]) for x in f.contact_list())
-			#print("CONTACT OF '%d' WITH %d" % (contact_ids, ",".join(contact_names)) )
-			if (self.ground_ids & contact_ids):
-                        	#see Issue 63: https://github.com/openai/roboschool/issues/63
-				#feet_collision_cost += self.foot_collision_cost
-				self.robot.feet_contact[i] = 1.0
-			else:
-				self.robot.feet_contact[i] = 0.0
+		#see Issue 63: https://github.com/openai/roboschool/issues/63
+		#feet_collision_cost += self.foot_collision_cost
+		self.robot.feet_contact[:] = self.feet_ground_contacts.update()
 
 
 		electricity_cost  = self.electricity_cost  * float(np.abs(a*self.robot.joint_speeds).mean())  # let's assume we have DC motor with controller, and reverse current braking
@@ -122,29 +121,29 @@ class WalkerBaseBulletEnv(MJCFBaseBulletEnv):
 		self.camera.move_and_look_at(self.camera_x, y-2.0, 1.4, x, y, 1.0)
 
 class HopperBulletEnv(WalkerBaseBulletEnv):
-	def __init__(self):
+	def __init__(self, terrain=None):
 		self.robot = Hopper()
-		WalkerBaseBulletEnv.__init__(self, self.robot)
+		WalkerBaseBulletEnv.__init__(self, self.robot, terrain=terrain)
 
 class Walker2DBulletEnv(WalkerBaseBulletEnv):
-	def __init__(self):
+	def __init__(self, terrain=None):
 		self.robot = Walker2D()
-		WalkerBaseBulletEnv.__init__(self, self.robot)
+		WalkerBaseBulletEnv.__init__(self, self.robot, terrain=terrain)
 
 class HalfCheetahBulletEnv(WalkerBaseBulletEnv):
-	def __init__(self):
+	def __init__(self, terrain=None):
 		self.robot = HalfCheetah()
-		WalkerBaseBulletEnv.__init__(self, self.robot)
+		WalkerBaseBulletEnv.__init__(self, self.robot, terrain=terrain)
 
 class AntBulletEnv(WalkerBaseBulletEnv):
-	def __init__(self):
+	def __init__(self, terrain=None):
 		self.robot = Ant()
-		WalkerBaseBulletEnv.__init__(self, self.robot)
+		WalkerBaseBulletEnv.__init__(self, self.robot, terrain=terrain)
 
 class HumanoidBulletEnv(WalkerBaseBulletEnv):
-	def __init__(self, robot=Humanoid()):
+	def __init__(self, robot=Humanoid(), terrain=None):
 		self.robot = robot
-		WalkerBaseBulletEnv.__init__(self, self.robot)
+		WalkerBaseBulletEnv.__init__(self, self.robot, terrain=terrain)
 		self.electricity_cost  = 4.25*WalkerBaseBulletEnv.electricity_cost
 		self.stall_torque_cost = 4.25*WalkerBaseBulletEnv.stall_torque_cost
 
@@ -173,3 +172,78 @@ class HumanoidFlagrunHarderBulletEnv(HumanoidBulletEnv):
 		s.zero_at_running_strip_start_line = False
 		return s
 
+
+class VectorWalkerEnv:
+	"""
+	N copies of a walker env running in one physics world, each robot in its own lane of a
+	MultiLaneStadiumScene. All robots are advanced by a single stepSimulation per step, and
+	observations, rewards and dones are returned as (N, obs_dim), (N,) and (N,) arrays.
+
+	make_env must return a new WalkerBaseBulletEnv with its own robot instance, for example
+	AntBulletEnv or lambda: HumanoidBulletEnv(Humanoid()).
+	"""
+
+	def __init__(self, make_env, num_robots, lane_spacing=MultiLaneStadiumScene.lane_spacing):
+		self.envs = [make_env() for i in range(num_robots)]
+		assert len(set(id(env.robot) for env in self.envs)) == num_robots, "every lane needs its own robot"
+		self.num_envs = num_robots
+		self.action_space = self.envs[0].action_space
+		self.observation_space = self.envs[0].observation_space
+		self.physicsClientId = -1
+		self.ownsPhysicsClient = False
+		self.scene = None
+		obs_dim = self.observation_space.shape[0]
+		self.observations = np.zeros((num_robots, obs_dim), dtype=np.float32)
+		self.rewards = np.zeros(num_robots, dtype=np.float32)
+		self.dones = np.zeros(num_robots, dtype=bool)
+		self.lane_spacing = lane_spacing
+
+	def seed(self, seed=None):
+		return [env.seed(None if seed is None else seed + i)[0] for i, env in enumerate(self.envs)]
+
+	def _create_scene(self):
+		if (p.getConnectionInfo()['isConnected']):
+			self.physicsClientId = 0
+		else:
+			self.ownsPhysicsClient = True
+			self.physicsClientId = p.connect(p.DIRECT)
+		self.scene = MultiLaneStadiumScene(gravity=9.8, timestep=0.0165/4, frame_skip=4)
+		self.scene.players_count = self.num_envs
+		self.scene.lane_spacing = self.lane_spacing
+		self.scene.episode_restart()
+		for i, env in enumerate(self.envs):
+			env.scene = env.stadium_scene = self.scene
+			env.physicsClientId = self.physicsClientId
+			env.robot.player_n = i
+
+	def reset(self, indices=None):
+		"Resets the given lanes (default: all) and returns the observations of all lanes."
+		if self.scene is None:
+			self._create_scene()
+			indices = None
+		if indices is None:
+			indices = range(self.num_envs)
+		for i in indices:
+			self.observations[i] = self.envs[i].reset()
+			self.dones[i] = False
+		return self.observations.copy()
+
+	def step(self, actions):
+		actions = np.asarray(actions)
+		for env, a in zip(self.envs, actions):
+			env.robot.apply_action(a)
+		self.scene.global_step()
+		infos = []
+		for i, (env, a) in enumerate(zip(self.envs, actions)):
+			state, reward, done, info = env.step(a)  # multiplayer scene: only collects state and rewards
+			self.observations[i] = state
+			self.rewards[i] = reward
+			self.dones[i] = done
+			infos.append(info)
+		return self.observations.copy(), self.rewards.copy(), self.dones.copy(), infos
+
+	def close(self):
+		if self.ownsPhysicsClient and self.physicsClientId >= 0:
+			p.disconnect(self.physicsClientId)
+		self.physicsClientId = -1
+		self.scene = None
@@ -8,6 +8,36 @@ os.sys.path.insert(0,parentdir)
 import pybullet_data
 
 
+class ModelInfo:
+	"""
+	Body, link and joint names and joint limits of the bodies loaded from one model file.
+	Queried from the server once, then shared by every robot that loads the same file with the same flags, see model_info().
+	"""
+	def __init__(self, bodies):
+		self.bodies = []  # per body: (base part name, body name, [(joint name, part name, lower limit, upper limit)])
+		for i, body in enumerate(bodies):
+			part_name, robot_name = p.getBodyInfo(body)
+			joints = []
+			for j in range(p.getNumJoints(body)):
+				jointInfo = p.getJointInfo(body, j)
+				joints.append((jointInfo[1].decode("utf8"), jointInfo[12].decode("utf8"), jointInfo[8], jointInfo[9]))
+			self.bodies.append((part_name.decode("utf8"), robot_name.decode("utf8"), joints))
+
+_model_infos = {}
+
+def model_info(bodies, model_key=None):
+	"""
+	ModelInfo of bodies, cached process-wide under model_key, usually (model path, load flags).
+	Without a model_key the server is queried every time.
+	"""
+	if model_key is None:
+		return ModelInfo(bodies)
+	info = _model_infos.get(model_key)
+	if info is None or len(info.bodies) != len(bodies):
+		info = _model_infos[model_key] = ModelInfo(bodies)
+	return info
+
+
 class XmlBasedRobot:
 	"""
 	Base class for mujoco .xml based agents.
@@ -21,6 +51,8 @@ class XmlBasedRobot:
 		self.jdict = None
 		self.ordered_joints = None
 		self.robot_body = None
+		self.joint_batch = None
+		self.parts_cache = None
 
 		high = np.ones([action_dim])
 		self.action_space = gym.spaces.Box(-high, high)
@@ -31,7 +63,7 @@ class XmlBasedRobot:
 		self.robot_name = robot_name
 		self.self_collision = self_collision
 
-	def addToScene(self, bodies):
+	def addToScene(self, bodies, model_key=None):
 		if self.parts is not None:
 			parts = self.parts
 		else:
@@ -50,21 +82,16 @@ class XmlBasedRobot:
 		if np.isscalar(bodies):	# streamline the case where bodies is actually just one body
 			bodies = [bodies]
 
+		info = model_info(bodies, model_key)
+
 		dump = 0
 		for i in range(len(bodies)):
-			if p.getNumJoints(bodies[i]) == 0:
-				part_name, robot_name = p.getBodyInfo(bodies[i], 0)
-				self.robot_name = robot_name.decode("utf8")
-				part_name = part_name.decode("utf8")
-				parts[part_name] = BodyPart(part_name, bodies, i, -1)
-			for j in range(p.getNumJoints(bodies[i])):
+			base_name, body_name, body_joints = info.bodies[i]
+			if len(body_joints) == 0:
+				self.robot_name = body_name
+				parts[base_name] = BodyPart(base_name, bodies, i, -1)
+			for j, (joint_name, part_name, lower_limit, upper_limit) in enumerate(body_joints):
 				p.setJointMotorControl2(bodies[i],j,p.POSITION_CONTROL,positionGain=0.1,velocityGain=0.1,force=0)
-				jointInfo = p.getJointInfo(bodies[i], j)
-				joint_name=jointInfo[1]
-				part_name=jointInfo[12]
-
-				joint_name = joint_name.decode("utf8")
-				part_name = part_name.decode("utf8")
 
 				if dump: print("ROBOT PART '%s'" % part_name)
 				if dump: print("ROBOT JOINT '%s'" % joint_name)  # limits = %+0.2f..%+0.2f effort=%0.3f speed=%0.3f" % ((joint_name,) + j.limits()) )
@@ -79,11 +106,11 @@ class XmlBasedRobot:
 					self.robot_body = parts[self.robot_name]
 
 				if joint_name[:6] == "ignore":
-					Joint(joint_name, bodies, i, j).disable_motor()
+					Joint(joint_name, bodies, i, j, (lower_limit, upper_limit)).disable_motor()
 					continue
 
 				if joint_name[:8] != "jointfix":
-					joints[joint_name] = Joint(joint_name, bodies, i, j)
+					joints[joint_name] = Joint(joint_name, bodies, i, j, (lower_limit, upper_limit))
 					ordered_joints.append(joints[joint_name])
 
 					joints[joint_name].power_coef = 100.0
@@ -93,11 +120,35 @@ class XmlBasedRobot:
 				# self.ordered_joints.append(joints[joint_name])
 				# self.jdict[joint_name] = joints[joint_name]
 
+		self.parts_cache = BodyPartsCache(self, parts.values())
+		self.joint_batch = JointBatch(ordered_joints)
 		return parts, joints, ordered_joints, self.robot_body
 
 	def reset_pose(self, position, orientation):
 		self.parts[self.robot_name].reset_pose(position, orientation)
 
+	def joint_states(self):
+		"""
+		Positions, velocities and limit-normalized (-1..+1) positions of all ordered_joints,
+		fetched with one getJointStates call per body. The returned float32 arrays are
+		preallocated and overwritten by the next call.
+		"""
+		return self.ordered_joint_batch().fetch()
+
+	def set_joint_torques(self, torques):
+		"Torque control of all ordered_joints with one setJointMotorControlArray call per body."
+		self.ordered_joint_batch().set_torques(torques)
+
+	def ordered_joint_batch(self):
+		if self.joint_batch is None or not self.joint_batch.matches(self.ordered_joints):
+			self.joint_batch = JointBatch(self.ordered_joints)
+		return self.joint_batch
+
+	def invalidate_cached_state(self):
+		"Call after teleporting joints or links outside of a simulation step."
+		if self.parts_cache is not None:
+			self.parts_cache.invalidate()
+
 class MJCFBasedRobot(XmlBasedRobot):
 	"""
 	Base class for mujoco .xml based agents.
@@ -106,6 +157,7 @@ class MJCFBasedRobot(XmlBasedRobot):
 	def __init__(self, model_xml, robot_name, action_dim, obs_dim, self_collision=True):
 		XmlBasedRobot.__init__(self, robot_name, action_dim, obs_dim, self_collision)
 		self.model_xml = model_xml
+		self.model_path = os.path.join(pybullet_data.getDataPath(), "mjcf", model_xml)
 		self.doneLoading=0
 	def reset(self):
 		
@@ -114,12 +166,14 @@ class MJCFBasedRobot(XmlBasedRobot):
 			self.ordered_joints = []
 			self.doneLoading=1
 			if self.self_collision:
-				self.objects = p.loadMJCF(os.path.join(pybullet_data.getDataPath(),"mjcf", self.model_xml), flags=p.URDF_USE_SELF_COLLISION|p.URDF_USE_SELF_COLLISION_EXCLUDE_ALL_PARENTS)
-				self.parts, self.jdict, self.ordered_joints, self.robot_body = self.addToScene(self.objects	)
+				flags = p.URDF_USE_SELF_COLLISION|p.URDF_USE_SELF_COLLISION_EXCLUDE_ALL_PARENTS
+				self.objects = p.loadMJCF(self.model_path, flags=flags)
+				self.parts, self.jdict, self.ordered_joints, self.robot_body = self.addToScene(self.objects, (self.model_path, flags))
 			else:
-				self.objects = p.loadMJCF(os.path.join(pybullet_data.getDataPath(),"mjcf", self.model_xml))
-				self.parts, self.jdict, self.ordered_joints, self.robot_body = self.addToScene(self.objects)
+				self.objects = p.loadMJCF(self.model_path)
+				self.parts, self.jdict, self.ordered_joints, self.robot_body = self.addToScene(self.objects, (self.model_path, -1))
 		self.robot_specific_reset()
+		self.invalidate_cached_state()
 
 		s = self.calc_state()  # optimization: calc_state() can calculate something in self.* for calc_potential() to use
 
@@ -138,6 +192,7 @@ class URDFBasedRobot(XmlBasedRobot):
 		XmlBasedRobot.__init__(self, robot_name, action_dim, obs_dim, self_collision)
 
 		self.model_urdf = model_urdf
+		self.model_path = os.path.join(pybullet_data.getDataPath(), model_urdf)
 		self.basePosition = basePosition
 		self.baseOrientation = baseOrientation
 		self.fixed_base = fixed_base
@@ -149,19 +204,22 @@ class URDFBasedRobot(XmlBasedRobot):
 
 		if self.self_collision:
 			self.parts, self.jdict, self.ordered_joints, self.robot_body = self.addToScene(
-				p.loadURDF(os.path.join(pybullet_data.getDataPath(), self.model_urdf),
+				p.loadURDF(self.model_path,
 				basePosition=self.basePosition,
 				baseOrientation=self.baseOrientation,
 				useFixedBase=self.fixed_base,
-				flags=p.URDF_USE_SELF_COLLISION))
+				flags=p.URDF_USE_SELF_COLLISION),
+				(self.model_path, p.URDF_USE_SELF_COLLISION))
 		else:
 			self.parts, self.jdict, self.ordered_joints, self.robot_body = self.addToScene(
-				p.loadURDF(os.path.join(pybullet_data.getDataPath(), self.model_urdf),
+				p.loadURDF(self.model_path,
 				basePosition=self.basePosition,
 				baseOrientation=self.baseOrientation,
-				useFixedBase=self.fixed_base))
+				useFixedBase=self.fixed_base),
+				(self.model_path, 0))
 
 		self.robot_specific_reset()
+		self.invalidate_cached_state()
 
 		s = self.calc_state()  # optimization: calc_state() can calculate something in self.* for calc_potential() to use
 		self.potential = self.calc_potential()
@@ -186,10 +244,12 @@ class SDFBasedRobot(XmlBasedRobot):
 	def reset(self):
 		self.ordered_joints = []
 
+		model_path = os.path.join("models_robot", self.model_sdf)
 		self.parts, self.jdict, self.ordered_joints, self.robot_body = self.addToScene( # TODO: Not sure if this works, try it with kuka
-			p.loadSDF(os.path.join("models_robot", self.model_sdf)))
+			p.loadSDF(model_path), (model_path, 0))
 
 		self.robot_specific_reset()
+		self.invalidate_cached_state()
 
 		s = self.calc_state()  # optimization: calc_state() can calculate something in self.* for calc_potential() to use
 		self.potential = self.calc_potential()
@@ -218,6 +278,8 @@ class BodyPart:
 		self.bodies = bodies
 		self.bodyIndex = bodyIndex
 		self.bodyPartIndex = bodyPartIndex
+		self.cache = None  # BodyPartsCache of the owning robot, if any
+		self.cache_slot = -1
 		self.initialPosition = self.current_position()
 		self.initialOrientation = self.current_orientation()
 		self.bp_pose = Pose_Helper(self)
@@ -230,9 +292,13 @@ class BodyPart:
 		return np.array([x, y, z, a, b, c, d])
 
 	def get_pose(self):
+		if self.cache is not None and self.cache.is_active():
+			return self.cache.pose(self.cache_slot)
 		return self.state_fields_of_pose_of(self.bodies[self.bodyIndex], self.bodyPartIndex)
 
 	def speed(self):
+		if self.cache is not None and self.cache.is_active():
+			return self.cache.speed(self.cache_slot)
 		if self.bodyPartIndex == -1:
 			(vx, vy, vz), _ = p.getBaseVelocity(self.bodies[self.bodyIndex])
 		else:
@@ -250,33 +316,144 @@ class BodyPart:
 
 	def reset_position(self, position):
 		p.resetBasePositionAndOrientation(self.bodies[self.bodyIndex], position, self.get_orientation())
+		self._invalidate_cache()
 
 	def reset_orientation(self, orientation):
 		p.resetBasePositionAndOrientation(self.bodies[self.bodyIndex], self.get_position(), orientation)
+		self._invalidate_cache()
 
 	def reset_velocity(self, linearVelocity=[0,0,0], angularVelocity =[0,0,0]):
 		p.resetBaseVelocity(self.bodies[self.bodyIndex], linearVelocity, angularVelocity)
+		self._invalidate_cache()
 
 	def reset_pose(self, position, orientation):
 		p.resetBasePositionAndOrientation(self.bodies[self.bodyIndex], position, orientation)
+		self._invalidate_cache()
 
 	def pose(self):
 		return self.bp_pose
 
+	def _invalidate_cache(self):
+		if self.cache is not None:
+			self.cache.invalidate()
+
 	def contact_list(self):
 		return p.getContactPoints(self.bodies[self.bodyIndex], -1, self.bodyPartIndex, -1)
 
 
+class BodyPartsCache:
+	"""
+	Pose (xyz + quaternion) of all BodyParts of a robot, stored in an (N_parts, 7) array and
+	fetched at most once per simulation step. Entries are keyed by the scene step counter
+	and dropped when a part is teleported or the robot is reset, so repeated pose(), xyz(),
+	rpy() and speed() queries within one step cost no extra server calls.
+	"""
+	def __init__(self, robot, parts):
+		self.robot = robot
+		self.parts = list(parts)
+		self.poses = np.zeros((len(self.parts), 7))
+		self.speeds = np.zeros((len(self.parts), 3))
+		self.speed_valid = np.zeros(len(self.parts), dtype=bool)
+		self.epoch = 0
+		self.key = None
+		for n, part in enumerate(self.parts):
+			part.cache = self
+			part.cache_slot = n
+
+	def is_active(self):
+		"Caching needs a scene step counter; robots outside of a scene query the server directly."
+		return getattr(self.robot, "scene", None) is not None
+
+	def invalidate(self):
+		self.epoch += 1
+
+	def refresh(self):
+		key = (self.robot.scene.step_counter, self.epoch) if self.is_active() else None
+		if key is not None and key == self.key:
+			return
+		self.key = key
+		self.speed_valid[:] = False
+		for n, part in enumerate(self.parts):
+			body_id = part.bodies[part.bodyIndex]
+			if part.bodyPartIndex == -1:
+				pos, orn = p.getBasePositionAndOrientation(body_id)
+			else:
+				# the link velocity comes with the same call, so speed() is free for links
+				state = p.getLinkState(body_id, part.bodyPartIndex, computeLinkVelocity=1)
+				pos, orn = state[0], state[1]
+				self.speeds[n] = state[6]
+				self.speed_valid[n] = True
+			self.poses[n, :3] = pos
+			self.poses[n, 3:] = orn
+
+	def positions(self):
+		"(N_parts, 3) view of all part positions, in the order of robot.parts.values()."
+		self.refresh()
+		return self.poses[:, :3]
+
+	def pose(self, slot):
+		self.refresh()
+		return self.poses[slot].copy()
+
+	def speed(self, slot):
+		self.refresh()
+		if not self.speed_valid[slot]:
+			part = self.parts[slot]
+			self.speeds[slot] = p.getBaseVelocity(part.bodies[part.bodyIndex])[0]
+			self.speed_valid[slot] = True
+		return self.speeds[slot].copy()
+
+
+class ContactSummary:
+	"""
+	Tracks which of a list of BodyParts touch any of a set of (bodyUniqueId, linkIndex)
+	pairs, e.g. feet against the floor. Uses one getContactPoints query per body that owns
+	tracked parts, instead of one query per part, and buckets the contacts by link index.
+	"""
+	LINK_STRIDE = 1 << 16  # encodes (body, link) pairs as body*LINK_STRIDE + link + 1
+
+	def __init__(self, parts, other_ids):
+		self.count = len(parts)
+		self.in_contact = np.zeros(self.count, dtype=bool)
+		self.other_keys = np.array([self._key(body_id, link_id) for body_id, link_id in other_ids], dtype=np.int64)
+		groups = {}
+		self.groups = []  # (body unique id, link indices, slots in the parts list)
+		for n, part in enumerate(parts):
+			body_id = part.bodies[part.bodyIndex]
+			if body_id not in groups:
+				groups[body_id] = ([], [])
+				self.groups.append((body_id, groups[body_id]))
+			groups[body_id][0].append(part.bodyPartIndex)
+			groups[body_id][1].append(n)
+		self.groups = [(body_id, np.array(links, dtype=np.int64), np.array(slots, dtype=np.int32)) for body_id, (links, slots) in self.groups]
+
+	def _key(self, body_id, link_id):
+		return body_id * self.LINK_STRIDE + link_id + 1
+
+	def update(self):
+		"Returns a boolean vector, one entry per tracked part, overwritten by the next call."
+		self.in_contact[:] = False
+		for body_id, links, slots in self.groups:
+			points = p.getContactPoints(bodyA=body_id)
+			if not points:
+				continue
+			contacts = np.array([(x[3], x[2], x[4]) for x in points], dtype=np.int64)  # linkIndexA, bodyUniqueIdB, linkIndexB
+			touching = np.isin(self._key(contacts[:, 1], contacts[:, 2]), self.other_keys)
+			self.in_contact[slots] = np.isin(links, contacts[touching, 0])
+		return self.in_contact
+
+
 class Joint:
-	def __init__(self, joint_name, bodies, bodyIndex, jointIndex):
+	def __init__(self, joint_name, bodies, bodyIndex, jointIndex, limits=None):
 		self.bodies = bodies
 		self.bodyIndex = bodyIndex
 		self.jointIndex = jointIndex
 		self.joint_name = joint_name
 		
-		jointInfo = p.getJointInfo(self.bodies[self.bodyIndex], self.jointIndex)
-		self.lowerLimit = jointInfo[8]
-		self.upperLimit = jointInfo[9]
+		if limits is None:  # not known from a ModelInfo
+			jointInfo = p.getJointInfo(self.bodies[self.bodyIndex], self.jointIndex)
+			limits = jointInfo[8], jointInfo[9]
+		self.lowerLimit, self.upperLimit = limits
 		
 		self.power_coeff = 0
 
@@ -331,3 +508,66 @@ class Joint:
 
 	def disable_motor(self):
 		p.setJointMotorControl2(self.bodies[self.bodyIndex],self.jointIndex,controlMode=p.POSITION_CONTROL, targetPosition=0, targetVelocity=0, positionGain=0.1, velocityGain=0.1, force=0)
+
+
+class JointBatch:
+	"""
+	Index tables to read or drive a list of Joints (possibly spread over several bodies)
+	with a single getJointStates / setJointMotorControlArray call per body.
+	"""
+	def __init__(self, joints):
+		self.joints = joints
+		self.count = len(joints)
+		self.groups = []  # (body unique id, joint indices, slots in the joints list)
+		by_body = {}
+		for n, j in enumerate(joints):
+			body_id = j.bodies[j.bodyIndex]
+			if body_id not in by_body:
+				by_body[body_id] = ([], [])
+				self.groups.append((body_id, by_body[body_id]))
+			by_body[body_id][0].append(j.jointIndex)
+			by_body[body_id][1].append(n)
+		self.groups = [(body_id, indices, np.array(slots, dtype=np.int32)) for body_id, (indices, slots) in self.groups]
+
+		lower = np.array([j.lowerLimit for j in joints], dtype=np.float64)
+		upper = np.array([j.upperLimit for j in joints], dtype=np.float64)
+		self.pos_mid = 0.5 * (lower + upper)
+		self.pos_range = upper - lower
+
+		self.positions = np.zeros(self.count, dtype=np.float32)
+		self.velocities = np.zeros(self.count, dtype=np.float32)
+		self.relative_positions = np.zeros(self.count, dtype=np.float32)
+		self._q = np.zeros(self.count, dtype=np.float64)
+		self._qdot = np.zeros(self.count, dtype=np.float64)
+
+	def matches(self, joints):
+		return joints is self.joints and len(joints) == self.count
+
+	def fetch(self):
+		for body_id, indices, slots in self.groups:
+			states = p.getJointStates(body_id, indices)
+			self._q[slots] = [s[0] for s in states]
+			self._qdot[slots] = [s[1] for s in states]
+		self.positions[:] = self._q
+		self.velocities[:] = self._qdot
+		self.relative_positions[:] = 2 * (self._q - self.pos_mid) / self.pos_range
+		return self.positions, self.velocities, self.relative_positions
+
+	def set_torques(self, torques):
+		for body_id, indices, slots in self.groups:
+			p.setJointMotorControlArray(body_id, indices, p.TORQUE_CONTROL, forces=torques[slots])
+
+	def reset_states(self, positions, velocities):
+		"""
+		Same as Joint.reset_current_position for every joint. pybullet has no batched
+		resetJointState, but the motors are disabled with one call per body.
+		"""
+		positions = np.broadcast_to(positions, (self.count,))
+		velocities = np.broadcast_to(velocities, (self.count,))
+		for j, x, vx in zip(self.joints, positions, velocities):
+			p.resetJointState(j.bodies[j.bodyIndex], j.jointIndex, targetValue=float(x), targetVelocity=float(vx))
+		for body_id, indices, slots in self.groups:
+			zeros = [0.0] * len(indices)
+			gains = [0.1] * len(indices)
+			p.setJointMotorControlArray(body_id, indices, p.POSITION_CONTROL, targetPositions=zeros,
+				targetVelocities=zeros, forces=zeros, positionGains=gains, velocityGains=gains)
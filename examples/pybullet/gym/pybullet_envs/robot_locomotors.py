@@ -3,7 +3,7 @@ import numpy as np
 import pybullet as p
 import os
 import pybullet_data
-from robot_bases import BodyPart
+from robot_bases import BodyPart, JointBatch
 
 class WalkerBase(MJCFBasedRobot):
 	def __init__(self, fn, robot_name, action_dim, obs_dim, power):
@@ -16,30 +16,34 @@ class WalkerBase(MJCFBasedRobot):
 		self.body_xyz=[0,0,0]
 
 	def robot_specific_reset(self):
-		for j in self.ordered_joints:
-			j.reset_current_position(self.np_random.uniform(low=-0.1, high=0.1), 0)
+		self.ordered_joint_batch().reset_states(self.np_random.uniform(low=-0.1, high=0.1, size=len(self.ordered_joints)), 0)
 
 		self.feet = [self.parts[f] for f in self.foot_list]
 		self.feet_contact = np.array([0.0 for f in self.foot_list], dtype=np.float32)
 		self.scene.actor_introduce(self)
 		self.initial_z = None
+		self.joint_power = None  # subclasses adjust power_coef after this, see apply_action
 
 	def apply_action(self, a):
 		assert (np.isfinite(a).all())
-		for n, j in enumerate(self.ordered_joints):
-			j.set_motor_torque(self.power * j.power_coef * float(np.clip(a[n], -1, +1)))
+		if self.joint_power is None:
+			self.joint_power = self.power * np.array([j.power_coef for j in self.ordered_joints])
+		self.set_joint_torques(self.joint_power * np.clip(a, -1, +1))
 
 	def calc_state(self):
-		j = np.array([j.current_relative_position() for j in self.ordered_joints], dtype=np.float32).flatten()
+		_, joint_velocities, joint_relative_positions = self.joint_states()
+		j = np.empty(2 * len(joint_velocities), dtype=np.float32)
 		# even elements [0::2] position, scaled to -1..+1 between limits
 		# odd elements  [1::2] angular speed, scaled to show -1..+1
+		j[0::2] = joint_relative_positions
+		j[1::2] = 0.1 * joint_velocities
 		self.joint_speeds = j[1::2]
 		self.joints_at_limit = np.count_nonzero(np.abs(j[0::2]) > 0.99)
 
 		body_pose = self.robot_body.pose()
-		parts_xyz = np.array([p.pose().xyz() for p in self.parts.values()]).flatten()
+		parts_xyz = self.parts_cache.positions()
 		self.body_xyz = (
-		parts_xyz[0::3].mean(), parts_xyz[1::3].mean(), body_pose.xyz()[2])  # torso z is more informative than mean z
+		parts_xyz[:, 0].mean(), parts_xyz[:, 1].mean(), body_pose.xyz()[2])  # torso z is more informative than mean z
 		self.body_rpy = body_pose.rpy()
 		z = self.body_xyz[2]
 		if self.initial_z == None:
@@ -156,6 +160,8 @@ class Humanoid(WalkerBase):
 		self.motor_names += ["left_shoulder1", "left_shoulder2", "left_elbow"]
 		self.motor_power += [75, 75, 75]
 		self.motors = [self.jdict[n] for n in self.motor_names]
+		self.motor_batch = JointBatch(self.motors)
+		self.motor_gain = np.array(self.motor_power, dtype=np.float64) * self.power
 		if self.random_yaw:
 			position = [0,0,0]
 			orientation = [0,0,0]
@@ -183,8 +189,7 @@ class Humanoid(WalkerBase):
 	def apply_action(self, a):
 		assert( np.isfinite(a).all() )
 		force_gain = 1
-		for i, m, power in zip(range(17), self.motors, self.motor_power):
-			m.set_motor_torque(float(force_gain * power * self.power * np.clip(a[i], -1, +1)))
+		self.motor_batch.set_torques(force_gain * self.motor_gain * np.clip(a[:len(self.motors)], -1, +1))
 
 	def alive_bonus(self, z, pitch):
 		return +2 if z > 0.78 else -1   # 2 here because 17 joints produce a lot of electricity cost just from policy noise, living must be better than dying
@@ -20,6 +20,7 @@ class Scene:
         self.human_render_detected = False  # if user wants render("human"), we open test window
 
         self.multiplayer_robots = {}
+        self.step_counter = 0  # lets robots cache per-step queries, see robot_bases.BodyPartsCache
 
     def test_window(self):
         "Call this function every frame, to see what's going on. Not necessary in learning."
@@ -41,6 +42,7 @@ class Scene:
     def episode_restart(self):
         "This function gets overridden by specific scene, to reset specific objects into their start positions"
         self.cpp_world.clean_everything()
+        self.step_counter += 1
         #self.cpp_world.test_window_history_reset()
 
     def global_step(self):
@@ -49,6 +51,7 @@ class Scene:
         observations from robots using step() with the same action.
         """
         self.cpp_world.step(self.frame_skip)
+        self.step_counter += 1
 
 class SingleRobotEmptyScene(Scene):
     multiplayer = False  # this class is used "as is" for InvertedPendulum, Reacher
@@ -14,18 +14,30 @@ class StadiumScene(Scene):
 	stadium_halflen   = 105*0.25	# FOOBALL_FIELD_HALFLEN
 	stadium_halfwidth = 50*0.25	 # FOOBALL_FIELD_HALFWID
 	stadiumLoaded=0
+	terrain = None  # a terrain.Terrain to load instead of the stadium, None for the stadium
+
+	def __init__(self, gravity, timestep, frame_skip, terrain=None):
+		Scene.__init__(self, gravity, timestep, frame_skip)
+		if terrain is not None:
+			self.terrain = terrain
 	
 	def episode_restart(self):
 		
 		Scene.episode_restart(self)   # contains cpp_world.clean_everything()
 		if (self.stadiumLoaded==0):
 			self.stadiumLoaded=1
+			if self.terrain is not None:
+				filename = self.terrain.urdf_path()
+				self.ground_plane_mjcf = [self.terrain.load(p)]  # its link is named "floor", like the one of the stadium
+				self.ground_plane_key = (filename, 0)
+				return
 			
 			# stadium_pose = cpp_household.Pose()
 			# if self.zero_at_running_strip_start_line:
 			#	 stadium_pose.set_xyz(27, 21, 0)  # see RUN_STARTLINE, RUN_RAD constants
 			filename = os.path.join(pybullet_data.getDataPath(),"stadium_no_collision.sdf")
 			self.ground_plane_mjcf = p.loadSDF(filename)
+			self.ground_plane_key = (filename, 0)  # model_key for robot.addToScene(ground_plane_mjcf)
 			
 			for i in self.ground_plane_mjcf:
 				p.changeDynamics(i,-1,lateralFriction=0.8, restitution=0.5)
@@ -44,3 +56,27 @@ class MultiplayerStadiumScene(StadiumScene):
 		StadiumScene.actor_introduce(self, robot)
 		i = robot.player_n - 1  # 0 1 2 => -1 0 +1
 		robot.move_robot(0, i, 0)
+
+class MultiLaneStadiumScene(StadiumScene):
+	"""
+	Many robots stepped together in one world by a single global_step(). Robot player_n runs
+	along the x axis in its own lane, lane_spacing meters apart, so the robots never touch.
+	"""
+	multiplayer = True
+	players_count = 1
+	lane_spacing = 5.0
+
+	def lane_y(self, player_n):
+		return self.lane_spacing * (player_n - 0.5 * (self.players_count - 1))
+
+	def actor_introduce(self, robot):
+		StadiumScene.actor_introduce(self, robot)
+		if getattr(robot, "lane_base_poses", None) is None:
+			# the robot was just loaded around (0,0,0): remember that as the start pose of its lane
+			robot.lane_base_poses = [p.getBasePositionAndOrientation(b) for b in robot.objects]
+		lane_y = self.lane_y(robot.player_n)
+		for b, (pos, orn) in zip(robot.objects, robot.lane_base_poses):
+			p.resetBasePositionAndOrientation(b, [pos[0], pos[1] + lane_y, pos[2]], orn)
+			p.resetBaseVelocity(b, [0, 0, 0], [0, 0, 0])
+		robot.walk_target_y = lane_y
+		robot.invalidate_cached_state()
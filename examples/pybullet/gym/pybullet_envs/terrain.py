@@ -0,0 +1,202 @@
+"""
+Heightfield terrains for the locomotion envs.
+
+The generators return the heights of a (rows, cols) grid with cell_size meters between the grid
+points as a NumPy array, with height zero at the center of the grid, where the robots start.
+Terrain writes a heightfield as a triangle mesh OBJ file plus a URDF that loads it as a static
+concave ground, and caches both on disk by a hash of its parameters.
+"""
+import os
+import hashlib
+import tempfile
+import numpy as np
+
+DEFAULT_CACHE_DIR = os.path.join(tempfile.gettempdir(), "pybullet_terrains")
+
+URDF_TEMPLATE = """<?xml version="0.0" ?>
+<robot name="terrain">
+  <link name="floor">
+  <contact>
+      <lateral_friction value="%(lateral_friction)f"/>
+  </contact>
+    <inertial>
+      <origin rpy="0 0 0" xyz="0 0 0"/>
+       <mass value=".0"/>
+       <inertia ixx="0" ixy="0" ixz="0" iyy="0" iyz="0" izz="0"/>
+    </inertial>
+    <visual>
+      <origin rpy="0 0 0" xyz="0 0 0"/>
+      <geometry>
+		<mesh filename="%(obj)s" scale="1 1 1"/>
+      </geometry>
+       <material name="white">
+        <color rgba="1 1 1 1"/>
+      </material>
+    </visual>
+		<collision concave="yes">
+      <origin rpy="0 0 0" xyz="0 0 0"/>
+      <geometry>
+		<mesh filename="%(obj)s" scale="1 1 1"/>
+      </geometry>
+    </collision>
+  </link>
+</robot>
+"""
+
+
+def grid_coordinates(shape, cell_size):
+	"(x, y) of the grid points in meters, each of the given shape, with (0, 0) at the center of the grid"
+	rows, cols = shape
+	y, x = np.mgrid[0:rows, 0:cols].astype(np.float64)
+	return (x - 0.5*(cols-1))*cell_size, (y - 0.5*(rows-1))*cell_size
+
+
+def _level_center(heights):
+	rows, cols = heights.shape
+	return heights - heights[rows//2, cols//2]
+
+
+def _fade(t):
+	return t*t*t*(t*(t*6 - 15) + 10)
+
+
+def _perlin_octave(shape, periods, rng):
+	"Gradient noise in about [-0.7, 0.7] with periods lattice cells along each axis of the grid"
+	rows, cols = shape
+	angles = 2*np.pi*rng.uniform(size=(periods[0]+1, periods[1]+1))
+	gx, gy = np.cos(angles), np.sin(angles)
+	y = np.arange(rows)*(float(periods[0])/rows)
+	x = np.arange(cols)*(float(periods[1])/cols)
+	y0 = y.astype(int)[:, None]
+	x0 = x.astype(int)[None, :]
+	fy = (y - y0[:, 0])[:, None]
+	fx = (x - x0[0, :])[None, :]
+	def corner(dy, dx):
+		return gx[y0+dy, x0+dx]*(fx-dx) + gy[y0+dy, x0+dx]*(fy-dy)
+	u, v = _fade(fx), _fade(fy)
+	bottom = corner(0, 0) + u*(corner(0, 1) - corner(0, 0))
+	top = corner(1, 0) + u*(corner(1, 1) - corner(1, 0))
+	return bottom + v*(top - bottom)
+
+
+def perlin(shape, cell_size, height=0.05, feature_size=1.0, octaves=4, persistence=0.5, seed=0):
+	"""
+	Rolling hills of fractal Perlin noise, roughly within [-height, height].
+	feature_size is the size of the coarsest bumps in meters, every further octave halves it.
+	"""
+	rng = np.random.RandomState(seed)
+	heights = np.zeros(shape)
+	amplitude, total = 1.0, 0.0
+	for octave in range(octaves):
+		size = feature_size / 2**octave
+		periods = [max(1, int(np.ceil(n*cell_size/size))) for n in shape]
+		heights += amplitude*_perlin_octave(shape, periods, rng)
+		total += amplitude
+		amplitude *= persistence
+	return _level_center(heights*(height*np.sqrt(2)/total))
+
+
+def stairs(shape, cell_size, step_length=0.3, step_height=0.05):
+	"Flat behind the center, then stairs going up along +x"
+	x, _ = grid_coordinates(shape, cell_size)
+	return np.floor(np.maximum(x, 0)/step_length)*step_height
+
+
+def slope(shape, cell_size, grade=0.1, direction=0.0):
+	"A plane rising by grade meters per meter towards the yaw angle direction, in radians"
+	x, y = grid_coordinates(shape, cell_size)
+	return grade*(x*np.cos(direction) + y*np.sin(direction))
+
+
+def random_boxes(shape, cell_size, num_boxes=100, min_size=0.1, max_size=0.5, max_height=0.05, clear_radius=0.5, seed=0):
+	"""
+	Overlapping boxes with random footprints and heights up to max_height on a flat ground.
+	No box reaches within clear_radius meters of the center.
+	"""
+	rng = np.random.RandomState(seed)
+	rows, cols = shape
+	sizes = np.maximum(1, (rng.uniform(min_size, max_size, (num_boxes, 2))/cell_size).astype(int))
+	starts = (rng.uniform(size=(num_boxes, 2))*np.maximum(0, np.array(shape) - sizes)).astype(int)
+	box_heights = rng.uniform(0, max_height, num_boxes)
+	heights = np.zeros(shape)
+	for (r, c), (h, w), box_height in zip(starts, sizes, box_heights):
+		np.maximum(heights[r:r+h, c:c+w], box_height, out=heights[r:r+h, c:c+w])
+	x, y = grid_coordinates(shape, cell_size)
+	heights[x*x + y*y < clear_radius*clear_radius] = 0
+	return heights
+
+
+GENERATORS = {
+	"perlin": perlin,
+	"stairs": stairs,
+	"slope": slope,
+	"random_boxes": random_boxes,
+}
+
+
+def write_obj(heights, cell_size, file_name):
+	"Writes the heightfield as a mesh of 2*(rows-1)*(cols-1) triangles, facing up"
+	rows, cols = heights.shape
+	x, y = grid_coordinates(heights.shape, cell_size)
+	vertices = np.stack([x, y, heights], axis=-1).reshape(-1, 3)
+	index = np.arange(1, rows*cols + 1).reshape(rows, cols)  # OBJ indices start at 1
+	a, b, c, d = index[:-1, :-1], index[:-1, 1:], index[1:, 1:], index[1:, :-1]
+	faces = np.concatenate([
+		np.stack([a, b, c], axis=-1).reshape(-1, 3),
+		np.stack([a, c, d], axis=-1).reshape(-1, 3)])
+	with open(file_name, "w") as f:
+		f.write("o Terrain\n")
+		# One formatting pass over the whole block instead of a write per row.
+		f.write(("v %.5f %.5f %.5f\n" * len(vertices)) % tuple(vertices.ravel()))
+		f.write(("f %d %d %d\n" * len(faces)) % tuple(faces.ravel()))
+
+
+def write_urdf(obj_file_name, file_name, lateral_friction=1.0):
+	"Writes a URDF of a static ground with the mesh obj_file_name, which has to be in the same directory"
+	with open(file_name, "w") as f:
+		f.write(URDF_TEMPLATE % dict(obj=os.path.basename(obj_file_name), lateral_friction=lateral_friction))
+
+
+class Terrain:
+	"""
+	A ground generated by one of the GENERATORS, e.g. Terrain("stairs", step_height=0.03).
+	The OBJ and URDF files are written on first use and shared by all terrains with the same
+	parameters, also between processes, so sweeping a curriculum of terrains only pays for the new ones.
+	"""
+	def __init__(self, kind, shape=(200, 200), cell_size=0.1, lateral_friction=1.0, cache_dir=None, **params):
+		if kind not in GENERATORS:
+			raise ValueError("Unknown terrain kind %s, expected one of %s" % (kind, sorted(GENERATORS)))
+		self.kind = kind
+		self.shape = tuple(shape)
+		self.cell_size = cell_size
+		self.lateral_friction = lateral_friction
+		self.cache_dir = cache_dir or DEFAULT_CACHE_DIR
+		self.params = params
+		self.key = (kind, self.shape, cell_size, lateral_friction, tuple(sorted(params.items())))
+
+	def heights(self):
+		return GENERATORS[self.kind](self.shape, self.cell_size, **self.params)
+
+	def urdf_path(self):
+		"Path of the URDF file of the terrain, generated and written unless it is cached already"
+		digest = hashlib.sha1(repr(self.key).encode("utf-8")).hexdigest()[:16]
+		base = os.path.join(self.cache_dir, "terrain_%s" % digest)
+		if os.path.exists(base + ".urdf"):
+			return base + ".urdf"
+		if not os.path.isdir(self.cache_dir):
+			try:
+				os.makedirs(self.cache_dir)
+			except OSError:
+				pass  # created by another process in the meantime
+		# Write under temporary names and rename, so that other processes never load a partial file.
+		# The URDF comes last, its existence means that the terrain is complete.
+		tmp = "%s.%d.tmp" % (base, os.getpid())
+		write_obj(self.heights(), self.cell_size, tmp)
+		os.rename(tmp, base + ".obj")
+		write_urdf(base + ".obj", tmp, self.lateral_friction)
+		os.rename(tmp, base + ".urdf")
+		return base + ".urdf"
+
+	def load(self, client):
+		"Loads the terrain with client (the pybullet module or a BulletClient), returns its body id"
+		return client.loadURDF(self.urdf_path(), useFixedBase=True)